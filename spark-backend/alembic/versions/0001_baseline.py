@@ -0,0 +1,130 @@
+"""Baseline schema, as created by Base.metadata.create_all before migrations existed
+
+Revision ID: 0001_baseline
+Revises:
+Create Date: 2026-10-17
+
+Databases that were created by create_all have no alembic_version table, so
+`alembic upgrade head` starts here on them; tables and indexes that already
+exist are left as they are.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001_baseline"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _create_table(name, *columns):
+    if not sa.inspect(op.get_bind()).has_table(name):
+        op.create_table(name, *columns)
+
+
+def _create_index(name, table, columns, unique=False):
+    if name not in {i["name"] for i in sa.inspect(op.get_bind()).get_indexes(table)}:
+        op.create_index(name, table, columns, unique=unique)
+
+
+def upgrade():
+    _create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("email", sa.String(), nullable=False),
+        sa.Column("password", sa.String(), nullable=False),
+        sa.Column("is_active", sa.Boolean(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    )
+    _create_index("ix_users_id", "users", ["id"])
+    _create_index("ix_users_email", "users", ["email"], unique=True)
+
+    _create_table(
+        "password_resets",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("email", sa.String(), nullable=True),
+        sa.Column("token", sa.String(), nullable=True),
+        sa.Column("expires_at", sa.DateTime(), nullable=True),
+    )
+    _create_index("ix_password_resets_id", "password_resets", ["id"])
+    _create_index("ix_password_resets_email", "password_resets", ["email"])
+
+    _create_table(
+        "profiles",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False, unique=True),
+        sa.Column("full_name", sa.String(), nullable=False),
+        sa.Column("bio", sa.Text(), nullable=True),
+        sa.Column("birthdate", sa.Date(), nullable=True),
+        sa.Column("gender", sa.String(), nullable=True),
+        sa.Column("interests", sa.String(), nullable=True),
+        sa.Column("age_min", sa.Integer(), nullable=True),
+        sa.Column("age_max", sa.Integer(), nullable=True),
+        sa.Column("interests_tags", sa.JSON(), nullable=True),
+    )
+    _create_index("ix_profiles_id", "profiles", ["id"])
+
+    _create_table(
+        "profile_images",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("profile_id", sa.Integer(), sa.ForeignKey("profiles.id", ondelete="CASCADE"), nullable=True),
+        sa.Column("url", sa.String(), nullable=False),
+        sa.Column("cloudinary_public_id", sa.String(), nullable=False),
+        sa.Column("position", sa.Integer(), nullable=True),
+    )
+    _create_index("ix_profile_images_id", "profile_images", ["id"])
+
+    _create_table(
+        "user_locations",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False, unique=True),
+        sa.Column("latitude", sa.Float(), nullable=False),
+        sa.Column("longitude", sa.Float(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    )
+    _create_index("ix_user_locations_id", "user_locations", ["id"])
+
+    _create_table(
+        "swipes",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("liker_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("liked_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("is_like", sa.Boolean(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    )
+    _create_index("ix_swipes_id", "swipes", ["id"])
+
+    _create_table(
+        "matches",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user1_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("user2_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    )
+    _create_index("ix_matches_id", "matches", ["id"])
+
+    _create_table(
+        "messages",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("sender_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=True),
+        sa.Column("receiver_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=True),
+        sa.Column("content", sa.String(), nullable=False),
+        sa.Column("timestamp", sa.DateTime(), nullable=True),
+        sa.Column("is_read", sa.Boolean(), nullable=True),
+    )
+    _create_index("ix_messages_id", "messages", ["id"])
+
+    _create_table(
+        "blocks",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("blocker_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("blocked_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    )
+    _create_index("ix_blocks_id", "blocks", ["id"])
+
+
+def downgrade():
+    for table in ("blocks", "messages", "matches", "swipes", "user_locations",
+                  "profile_images", "profiles", "password_resets", "users"):
+        op.drop_table(table)
@@ -0,0 +1,191 @@
+"""Columns, tables and indexes added for discovery, chat summaries and write-behind swipes
+
+Revision ID: 0002_discovery_chat_schema
+Revises: 0001_baseline
+Create Date: 2026-10-17
+
+Until this tree had migrations, create_all could already have created some of these
+tables and indexes on a running database, so every step checks before it runs.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002_discovery_chat_schema"
+down_revision = "0001_baseline"
+branch_labels = None
+depends_on = None
+
+
+def _has_table(table):
+    return sa.inspect(op.get_bind()).has_table(table)
+
+
+def _has_column(table, column):
+    return column in {c["name"] for c in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def _create_index(name, table, columns, unique=False):
+    if name not in {i["name"] for i in sa.inspect(op.get_bind()).get_indexes(table)}:
+        op.create_index(name, table, columns, unique=unique)
+
+
+BACKFILL_CHUNK_SIZE = 1000
+
+# Frozen copies of the app's encoders as of this revision, so the backfill keeps
+# writing the same data if app.core.geo or app.crud.interest change later.
+GEOHASH_PRECISION = 3
+GEOHASH_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def _encode_geohash(latitude, longitude):
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, bit_count, even = [], 0, 0, True
+    while len(chars) < GEOHASH_PRECISION:
+        value, bounds = (longitude, lon_range) if even else (latitude, lat_range)
+        mid = (bounds[0] + bounds[1]) / 2
+        if value >= mid:
+            bits, bounds[0] = bits * 2 + 1, mid
+        else:
+            bits, bounds[1] = bits * 2, mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(GEOHASH_BASE32[bits])
+            bits, bit_count = 0, 0
+    return "".join(chars)
+
+
+def _encode_mask(tag_ids):
+    # Bit n set for tag id n, stored as little-endian bytes; no tags is b""
+    mask = 0
+    for tag_id in tag_ids:
+        mask |= 1 << tag_id
+    return mask.to_bytes((mask.bit_length() + 7) // 8, "little")
+
+
+def _backfill_geohashes():
+    # Discovery only looks at rows whose geohash falls in nearby cells, so rows stored
+    # before the column existed would drop out of every deck until the user moved.
+    bind = op.get_bind()
+    locations = sa.table(
+        "user_locations", sa.column("id"), sa.column("latitude"), sa.column("longitude"), sa.column("geohash")
+    )
+    rows = bind.execute(
+        sa.select(locations.c.id, locations.c.latitude, locations.c.longitude).where(locations.c.geohash.is_(None))
+    ).all()
+    update = locations.update().where(locations.c.id == sa.bindparam("row_id")).values(geohash=sa.bindparam("cell"))
+    for start in range(0, len(rows), BACKFILL_CHUNK_SIZE):
+        bind.execute(update, [
+            {"row_id": row.id, "cell": _encode_geohash(row.latitude, row.longitude)}
+            for row in rows[start:start + BACKFILL_CHUNK_SIZE]
+        ])
+
+
+def _backfill_interest_masks():
+    # Without a stored mask every discovery read would intern the profile's tags again
+    bind = op.get_bind()
+    profiles = sa.table(
+        "profiles", sa.column("id"), sa.column("interests_tags", sa.JSON()), sa.column("interests_mask", sa.LargeBinary())
+    )
+    tags = sa.table("interest_tags", sa.column("id"), sa.column("name"))
+
+    rows = bind.execute(
+        sa.select(profiles.c.id, profiles.c.interests_tags).where(profiles.c.interests_mask.is_(None))
+    ).all()
+    if not rows:
+        return
+
+    known = dict(bind.execute(sa.select(tags.c.name, tags.c.id)).all())
+    new_names = sorted({name for row in rows for name in (row.interests_tags or [])} - set(known))
+    if new_names:
+        bind.execute(tags.insert(), [{"name": name} for name in new_names])
+        known = dict(bind.execute(sa.select(tags.c.name, tags.c.id)).all())
+
+    update = profiles.update().where(profiles.c.id == sa.bindparam("row_id")).values(interests_mask=sa.bindparam("mask"))
+    for start in range(0, len(rows), BACKFILL_CHUNK_SIZE):
+        bind.execute(update, [
+            {"row_id": row.id, "mask": _encode_mask(known[name] for name in set(row.interests_tags or []))}
+            for row in rows[start:start + BACKFILL_CHUNK_SIZE]
+        ])
+
+
+def upgrade():
+    if not _has_column("user_locations", "geohash"):
+        op.add_column("user_locations", sa.Column("geohash", sa.String(), nullable=True))
+    _create_index("ix_user_locations_geohash", "user_locations", ["geohash"])
+    _backfill_geohashes()
+
+    if not _has_column("profiles", "interests_mask"):
+        op.add_column("profiles", sa.Column("interests_mask", sa.LargeBinary(), nullable=True))
+    _create_index("ix_profiles_gender_birthdate", "profiles", ["gender", "birthdate"])
+    _create_index("ix_profile_images_profile_id_position", "profile_images", ["profile_id", "position"])
+
+    if not _has_column("swipes", "event_id"):
+        op.add_column("swipes", sa.Column("event_id", sa.String(), nullable=True))
+    _create_index("ix_swipes_liker_id_liked_id", "swipes", ["liker_id", "liked_id"])
+    _create_index("uq_swipes_event_id", "swipes", ["event_id"], unique=True)
+
+    _create_index("ix_blocks_blocker_id_blocked_id", "blocks", ["blocker_id", "blocked_id"])
+    _create_index("ix_blocks_blocked_id_blocker_id", "blocks", ["blocked_id", "blocker_id"])
+    _create_index("ix_messages_sender_id_receiver_id_timestamp", "messages", ["sender_id", "receiver_id", "timestamp"])
+
+    if not _has_column("matches", "last_activity_at"):
+        op.add_column("matches", sa.Column("last_activity_at", sa.DateTime(timezone=True), nullable=True))
+        op.execute("UPDATE matches SET last_activity_at = COALESCE(created_at, CURRENT_TIMESTAMP)")
+        with op.batch_alter_table("matches") as batch:
+            batch.alter_column("last_activity_at", existing_type=sa.DateTime(timezone=True), nullable=False)
+    _create_index("ix_matches_user1_id_last_activity_at_id", "matches", ["user1_id", "last_activity_at", "id"])
+    _create_index("ix_matches_user2_id_last_activity_at_id", "matches", ["user2_id", "last_activity_at", "id"])
+
+    if not _has_table("interest_tags"):
+        op.create_table(
+            "interest_tags",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("name", sa.String(), nullable=False, unique=True),
+        )
+    _create_index("ix_interest_tags_id", "interest_tags", ["id"])
+
+    if not _has_table("conversations"):
+        op.create_table(
+            "conversations",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("user1_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+            sa.Column("user2_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+            sa.Column("last_message_id", sa.Integer(), sa.ForeignKey("messages.id", ondelete="SET NULL"), nullable=True),
+            sa.Column("last_message_preview", sa.String(), nullable=True),
+            sa.Column("last_message_at", sa.DateTime(), nullable=True),
+            sa.Column("unread_count_user1", sa.Integer(), nullable=False),
+            sa.Column("unread_count_user2", sa.Integer(), nullable=False),
+            sa.UniqueConstraint("user1_id", "user2_id", name="uq_conversations_user_pair"),
+        )
+    _create_index("ix_conversations_id", "conversations", ["id"])
+
+    _backfill_interest_masks()
+
+
+def downgrade():
+    op.drop_table("conversations")
+    op.drop_table("interest_tags")
+
+    op.drop_index("ix_matches_user2_id_last_activity_at_id", table_name="matches")
+    op.drop_index("ix_matches_user1_id_last_activity_at_id", table_name="matches")
+    with op.batch_alter_table("matches") as batch:
+        batch.drop_column("last_activity_at")
+
+    op.drop_index("ix_messages_sender_id_receiver_id_timestamp", table_name="messages")
+    op.drop_index("ix_blocks_blocked_id_blocker_id", table_name="blocks")
+    op.drop_index("ix_blocks_blocker_id_blocked_id", table_name="blocks")
+
+    op.drop_index("uq_swipes_event_id", table_name="swipes")
+    op.drop_index("ix_swipes_liker_id_liked_id", table_name="swipes")
+    with op.batch_alter_table("swipes") as batch:
+        batch.drop_column("event_id")
+
+    op.drop_index("ix_profile_images_profile_id_position", table_name="profile_images")
+    op.drop_index("ix_profiles_gender_birthdate", table_name="profiles")
+    with op.batch_alter_table("profiles") as batch:
+        batch.drop_column("interests_mask")
+
+    op.drop_index("ix_user_locations_geohash", table_name="user_locations")
+    with op.batch_alter_table("user_locations") as batch:
+        batch.drop_column("geohash")
@@ -0,0 +1,38 @@
+"""Hot-path composite indexes and uniqueness for match pairs and reset tokens
+
+Revision ID: 0003_hot_path_indexes
+Revises: 0002_discovery_chat_schema
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+revision = "0003_hot_path_indexes"
+down_revision = "0002_discovery_chat_schema"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Concurrent mutual likes could insert the same pair twice; keep the oldest row
+    op.execute(
+        "DELETE FROM matches WHERE id NOT IN "
+        "(SELECT MIN(id) FROM matches GROUP BY user1_id, user2_id)"
+    )
+    op.create_index("uq_matches_user1_id_user2_id", "matches", ["user1_id", "user2_id"], unique=True)
+
+    op.execute(
+        "DELETE FROM password_resets WHERE token IS NOT NULL AND id NOT IN "
+        "(SELECT MAX(id) FROM password_resets WHERE token IS NOT NULL GROUP BY token)"
+    )
+    op.create_index("ix_password_resets_token", "password_resets", ["token"], unique=True)
+
+    # Reverse-like lookups (liked_by set loads) and "my latest swipe" for undo
+    op.create_index("ix_swipes_liked_id_liker_id", "swipes", ["liked_id", "liker_id"])
+    op.create_index("ix_swipes_liker_id_created_at", "swipes", ["liker_id", "created_at"])
+
+
+def downgrade():
+    op.drop_index("ix_swipes_liker_id_created_at", table_name="swipes")
+    op.drop_index("ix_swipes_liked_id_liker_id", table_name="swipes")
+    op.drop_index("ix_password_resets_token", table_name="password_resets")
+    op.drop_index("uq_matches_user1_id_user2_id", table_name="matches")
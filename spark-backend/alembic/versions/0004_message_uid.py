@@ -0,0 +1,25 @@
+"""Client-visible message uid assigned before the row is written
+
+Revision ID: 0004_message_uid
+Revises: 0003_hot_path_indexes
+Create Date: 2026-10-17
+"""
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0004_message_uid"
+down_revision = "0003_hot_path_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("messages", sa.Column("uid", sa.String(), nullable=True))
+    # Existing rows keep a NULL uid, which the unique index allows
+    op.create_index("uq_messages_uid", "messages", ["uid"], unique=True)
+
+
+def downgrade():
+    op.drop_index("uq_messages_uid", table_name="messages")
+    with op.batch_alter_table("messages") as batch:
+        batch.drop_column("uid")
@@ -2,45 +2,94 @@ from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends
 from sqlalchemy.orm import Session
 from app.api.v1.deps import get_db_websocket
 from app.crud import chat as chat_crud
+from app.crud import unread
+from app.crud.message_writer import message_writer, prepare_message
 from app.api.v1.websocket_manager import manager
 from app.database import get_db
 from app.api.v1.deps import get_current_user
 from app.models.user import User
 from app.core.logger import logger
+from app.core.db_threads import run_db
+from app.core.config import settings
+import asyncio
 import json
 
 router = APIRouter(prefix="/chat", tags=["chat"])
 
+# The socket keeps its session for hours, so each call ends its transaction
+# and hands the connection back to the pool.
+
+def _load_sender_name(db: Session, user_id: int):
+    try:
+        current_user = db.query(User).filter(User.id == user_id).first()
+        return current_user.profile.full_name if current_user and current_user.profile else "Somebody"
+    finally:
+        db.rollback()
+
+def _store_message(db: Session, sender_id: int, receiver_id: int, content: str):
+    try:
+        new_msg = chat_crud.create_message(db, sender_id=sender_id, receiver_id=receiver_id, content=content)
+        unread.increment(receiver_id, sender_id)
+        return new_msg.uid, new_msg.timestamp
+    finally:
+        db.rollback()
+
+def _mark_read(db: Session, receiver_id: int, sender_id: int):
+    chat_crud.mark_messages_as_read(db, receiver_id=receiver_id, sender_id=sender_id)
+    unread.reset(receiver_id, sender_id)
+
+async def _ack_when_stored(websocket: WebSocket, stored, uid: str):
+    # Write-behind: the receiver already has the message, the sender hears once it is committed
+    try:
+        await stored
+        ack = {"type": "message_stored", "message_uid": uid}
+    except Exception:
+        ack = {"type": "message_failed", "message_uid": uid}
+    try:
+        await websocket.send_json(ack)
+    except Exception as e:
+        logger.info(f"Could not ack message {uid}, socket already closed: {e}")
+
 @router.websocket("/ws/{user_id}")
 async def websocket_endpoint(websocket: WebSocket, user_id: int, db: Session = Depends(get_db_websocket)):
     await manager.connect(user_id, websocket)
-    current_user = db.query(User).filter(User.id == user_id).first()
-    sender_name = current_user.profile.full_name if current_user and current_user.profile else "Somebody"
+    pending_acks = set()
 
     try:
+        sender_name = await run_db(_load_sender_name, db, user_id)
         while True:
             data = await websocket.receive_text()
             message_data = json.loads(data)
 
             logger.info(f"Chat message sent", extra={"user_id": user_id, "receiver_id": message_data['receiver_id'], "content_length": len(message_data['content']) if message_data['content'] else 0})
 
-            new_msg = chat_crud.create_message(
-                db,
-                sender_id=user_id,
-                receiver_id=message_data['receiver_id'],
-                content=message_data['content']
-            )
+            stored = None
+            if settings.CHAT_WRITE_BEHIND and message_writer.running:
+                message = prepare_message(user_id, message_data['receiver_id'], message_data['content'])
+                stored = message_writer.submit(message)
+                uid, timestamp = message["uid"], message["timestamp"]
+            else:
+                uid, timestamp = await run_db(_store_message, db, user_id, message_data['receiver_id'], message_data['content'])
 
             payload = {
                 "sender_id": user_id,
                 "sender_name": sender_name,
                 "content": message_data['content'],
-                "timestamp": new_msg.timestamp.isoformat(),
+                "message_uid": uid,
+                "timestamp": timestamp.isoformat(),
                 "type": "new_message"
             }
             await manager.send_personal_message(payload, message_data['receiver_id'])
+
+            if stored is not None:
+                # The ack waits for the group commit in its own task, so the loop keeps reading
+                ack = asyncio.create_task(_ack_when_stored(websocket, stored, uid))
+                pending_acks.add(ack)
+                ack.add_done_callback(pending_acks.discard)
     except WebSocketDisconnect:
-        manager.disconnect(user_id)
+        pass
+    finally:
+        await manager.disconnect(user_id, websocket)
 
 @router.get("/conversation/{other_user_id}")
 def get_history(other_user_id: int, db: Session = Depends(get_db), current_user = Depends(get_current_user)):
@@ -50,8 +99,11 @@ def get_history(other_user_id: int, db: Session = Depends(get_db), current_user
 @router.post("/mark-read/{sender_id}")
 async def mark_read(sender_id: int, db: Session = Depends(get_db), current_user = Depends(get_current_user)):
     logger.info(f"Marking messages as read", extra={"user_id": current_user.id, "sender_id": sender_id})
-    chat_crud.mark_messages_as_read(db, receiver_id=current_user.id, sender_id=sender_id)
+    await run_db(_mark_read, db, current_user.id, sender_id)
     await manager.send_personal_message({"type": "messages_read", "reader_id": current_user.id}, sender_id)
     return {"status": "ok"}
 
-
+@router.get("/unread")
+def get_unread(db: Session = Depends(get_db), current_user = Depends(get_current_user)):
+    counts = unread.get_unread_counts(db, current_user.id)
+    return {"total": sum(counts.values()), "by_sender": {str(k): v for k, v in counts.items()}}
@@ -1,14 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, File, Form, UploadFile
-from app.schemas.user import PasswordChange, ProfileUpdate, LocationUpdate, DiscoveryUserResponse, SwipeCreate
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, File, Form, Query, UploadFile
+from app.schemas.user import PasswordChange, ProfileUpdate, LocationUpdate, DiscoveryUserResponse, DiscoveryPageResponse, MatchPageResponse, SwipeCreate, SwipeBatchCreate, SwipeBatchResponse
 from app.crud import user as user_crud
+from app.crud import discovery_deck
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.api.v1.deps import get_current_user
 from app.models.user import User
 import cloudinary.uploader
-from typing import List
+from typing import List, Optional
 from app.api.v1.websocket_manager import manager
 from app.core.logger import logger
+from app.core.config import settings
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
@@ -93,17 +95,47 @@ def update_location(loc_in: LocationUpdate, db: Session = Depends(get_db), curre
 def discovery(db: Session = Depends(get_db), current_user = Depends(get_current_user)):
     return user_crud.get_discovery_users(db, current_user.id)
 
+@router.get("/discovery/page", response_model=DiscoveryPageResponse)
+def discovery_page(
+    cursor: Optional[str] = None,
+    limit: int = Query(settings.DISCOVERY_PAGE_SIZE, ge=1, le=settings.DISCOVERY_MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user)
+):
+    return user_crud.get_discovery_page(db, current_user.id, cursor=cursor, page_size=limit)
+
 @router.post("/swipe")
-def swipe(swipe_in: SwipeCreate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+def swipe(swipe_in: SwipeCreate, background_tasks: BackgroundTasks, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
     swipe_obj, is_match = user_crud.create_swipe(db, current_user.id, swipe_in)
+
+    if discovery_deck.needs_refill(current_user.id):
+        background_tasks.add_task(user_crud.refill_discovery_deck, current_user.id)
     logger.info(f"User swiped", extra={"user_id": current_user.id, "target_user_id": swipe_in.liked_id, "is_match": is_match})
     return {"status": "ok", "is_match": is_match}
 
+@router.post("/swipes/batch", response_model=SwipeBatchResponse)
+def swipe_batch(batch_in: SwipeBatchCreate, background_tasks: BackgroundTasks, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    results = user_crud.create_swipes_batch(db, current_user.id, batch_in.swipes)
+
+    if discovery_deck.needs_refill(current_user.id):
+        background_tasks.add_task(user_crud.refill_discovery_deck, current_user.id)
+    logger.info(f"User swiped in batch", extra={"user_id": current_user.id, "count": len(results), "matches": sum(r["is_match"] for r in results)})
+    return {"results": results}
+
 @router.get("/matches", response_model=List[dict])
 def list_matches(db: Session = Depends(get_db), current_user = Depends(get_current_user)):
     logger.info(f"Matches list requested", extra={"user_id": current_user.id})
     return user_crud.get_user_matches(db, current_user.id)
 
+@router.get("/matches/page", response_model=MatchPageResponse)
+def list_matches_page(
+    cursor: Optional[str] = None,
+    limit: int = Query(settings.MATCHES_PAGE_SIZE, ge=1, le=settings.MATCHES_MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user)
+):
+    return user_crud.get_match_page(db, current_user.id, cursor=cursor, page_size=limit)
+
 @router.post("/{user_id}/block")
 async def block_user(user_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
     if user_id == current_user.id:
@@ -122,17 +154,23 @@ async def block_user(user_id: int, db: Session = Depends(get_db), current_user:
     return {"message": "User blocked."}
 
 @router.post("/swipe/undo", response_model=None)
-def undo_swipe(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    undone_action = user_crud.undo_last_swipe(db, user_id=current_user.id)
-
-    if not undone_action:
+def undo_swipe(
+    steps: int = Query(1, ge=1, le=settings.SWIPE_UNDO_DEPTH),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    undone = user_crud.undo_swipes(db, user_id=current_user.id, steps=steps)
+
+    if not undone:
         raise HTTPException(status_code=404, detail="No swipe history found to undo")
     
-    logger.info(f"Swipe undone", extra={"user_id": current_user.id, "undone_user_id": undone_action.liked_id})
+    undone_user_ids = [entry["liked_id"] for entry in undone]
+    logger.info(f"Swipe undone", extra={"user_id": current_user.id, "undone_user_ids": undone_user_ids})
     return {
         "status": "success", 
-        "message": "Last swipe has been undone",
-        "undone_user_id": undone_action.liked_id
+        "message": "Last swipe has been undone" if len(undone) == 1 else f"Last {len(undone)} swipes have been undone",
+        "undone_user_id": undone_user_ids[0],
+        "undone_user_ids": undone_user_ids
     }
 
 
@@ -1,20 +1,92 @@
-from typing import Dict
+import asyncio
+import json
+import uuid
+from typing import Dict, Set
 from fastapi import WebSocket
+from prometheus_client import Gauge
+from app.core.logger import logger
+from app.core.ws_broker import RedisBroker, user_channel, channel_user
+
+# Per worker; a per-user label would create one series per user, see connection_count()
+OPEN_CONNECTIONS = Gauge("spark_websocket_connections", "Open WebSocket connections")
+CONNECTED_USERS = Gauge("spark_websocket_connected_users", "Users with at least one open WebSocket connection")
 
 class ConnectionManager:
-    def __init__(self):
-        self.activate_connections: Dict[int, WebSocket] = {}
+    """Sockets connected to this worker, any number per user.
+
+    Every message is also published to the broker, tagged with this worker's id, so
+    the user's sockets on other workers (or containers) get it as well; each worker
+    subscribes to the channels of its own users and ignores its own publishes.
+    """
+
+    def __init__(self, broker=None):
+        self.activate_connections: Dict[int, Set[WebSocket]] = {}
+        self.broker = broker if broker is not None else RedisBroker()
+        self.worker_id = uuid.uuid4().hex
+
+    async def start(self):
+        await self.broker.start(self._on_broker_message)
+
+    async def stop(self):
+        await self.broker.stop()
+
+    def connection_count(self, user_id: int = None):
+        if user_id is not None:
+            return len(self.activate_connections.get(user_id, ()))
+        return sum(len(sockets) for sockets in self.activate_connections.values())
 
     async def connect(self, user_id: int, websocket: WebSocket):
         await websocket.accept()
-        self.activate_connections[user_id] = websocket
+        sockets = self.activate_connections.setdefault(user_id, set())
+        first = not sockets
+        sockets.add(websocket)
+        OPEN_CONNECTIONS.inc()
+        if not first:
+            return
+
+        CONNECTED_USERS.inc()
+        try:
+            await self.broker.subscribe(user_channel(user_id))
+        except Exception as e:
+            logger.warning(f"WebSocket broker unavailable, user {user_id} only gets messages sent on this worker: {e}")
+
+    async def disconnect(self, user_id: int, websocket: WebSocket):
+        sockets = self.activate_connections.get(user_id)
+        if not sockets or websocket not in sockets:
+            return
+        sockets.discard(websocket)
+        OPEN_CONNECTIONS.dec()
+        if sockets:
+            return
 
-    def disconnect(self, user_id: int):
-        if user_id in self.activate_connections:
-            del self.activate_connections[user_id]
+        del self.activate_connections[user_id]
+        CONNECTED_USERS.dec()
+        try:
+            await self.broker.unsubscribe(user_channel(user_id))
+        except Exception as e:
+            logger.warning(f"Failed to unsubscribe user {user_id} from the WebSocket broker: {e}")
+
+    async def _send_local(self, message: dict, user_id: int):
+        sockets = list(self.activate_connections.get(user_id, ()))
+        if not sockets:
+            return
+        results = await asyncio.gather(*(socket.send_json(message) for socket in sockets), return_exceptions=True)
+        for socket, result in zip(sockets, results):
+            if isinstance(result, Exception):
+                logger.info(f"Dropping dead WebSocket of user {user_id}: {result}")
+                await self.disconnect(user_id, socket)
 
     async def send_personal_message(self, message: dict, user_id: int):
-        if user_id in self.activate_connections:
-            await self.activate_connections[user_id].send_json(message)
+        # Local sockets do not wait for the broker round trip
+        await self._send_local(message, user_id)
+        try:
+            await self.broker.publish(user_channel(user_id), json.dumps({"origin": self.worker_id, "message": message}))
+        except Exception as e:
+            logger.warning(f"Failed to publish WebSocket message for user {user_id}: {e}")
+
+    async def _on_broker_message(self, channel: str, data: str):
+        envelope = json.loads(data)
+        if envelope["origin"] != self.worker_id:
+            await self._send_local(envelope["message"], channel_user(channel))
 
-manager = ConnectionManager()
\ No newline at end of file
+manager = ConnectionManager()
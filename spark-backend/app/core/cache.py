@@ -0,0 +1,222 @@
+import json
+import random
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from prometheus_client import Counter, REGISTRY
+from app.core.redis import redis_client, redis_binary
+from app.core import cache_codec
+from app.core.logger import logger
+
+LOCK_TIMEOUT = 10
+WAIT_INTERVAL = 0.05
+JITTER_RATIO = 0.1
+
+L1_MAX_ENTRIES = 1024
+L1_TTL = 5
+INVALIDATION_CHANNEL = "cache:invalidate"
+
+CACHE_REQUESTS = Counter("spark_cache_requests", "Cache lookups by tier and result", ["tier", "result"])
+
+_RELEASE_LOCK = redis_client.register_script("""
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+""")
+
+class LocalCache:
+    """Size-bounded in-process LRU with per-entry TTLs (the L1 tier in front of Redis)."""
+
+    def __init__(self, max_entries: int = L1_MAX_ENTRIES, ttl: int = L1_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def evict(self, *keys: str):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+local_cache = LocalCache()
+
+def cache_stats():
+    """Hit/miss counts per tier for this worker."""
+    return {
+        f"{tier}_{result}": REGISTRY.get_sample_value("spark_cache_requests_total", {"tier": tier, "result": result}) or 0
+        for tier in ("l1", "l2")
+        for result in ("hit", "miss")
+    }
+
+def jittered(ttl: int) -> int:
+    """Spread expiries so keys written together do not all expire together."""
+    return int(ttl * (1 + random.uniform(0, JITTER_RATIO)))
+
+@contextmanager
+def single_flight(key: str, timeout: int = LOCK_TIMEOUT):
+    """Yield True for the one caller allowed to recompute `key`.
+
+    If Redis is unavailable every caller is treated as the leader, so requests
+    still succeed, just without stampede protection.
+    """
+    lock_key = f"lock:{key}"
+    token = uuid.uuid4().hex
+    try:
+        acquired = bool(redis_client.set(lock_key, token, nx=True, ex=timeout))
+    except Exception as e:
+        logger.warning(f"Cache lock unavailable for {key}: {e}")
+        yield True
+        return
+
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            try:
+                _RELEASE_LOCK(keys=[lock_key], args=[token])
+            except Exception as e:
+                logger.warning(f"Failed to release cache lock for {key}: {e}")
+
+def wait_for(read, timeout: int = LOCK_TIMEOUT):
+    """Poll `read` until it returns something other than None, or give up."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        time.sleep(WAIT_INTERVAL)
+        value = read()
+        if value is not None:
+            return value
+    return None
+
+def _is_entry(entry) -> bool:
+    return isinstance(entry, dict) and "value" in entry and isinstance(entry.get("fresh_until"), (int, float))
+
+def _read(key: str):
+    try:
+        raw = redis_binary.get(key)
+        if not raw:
+            return None
+        entry = cache_codec.decode(raw)
+    except cache_codec.CodecError as e:
+        logger.warning(f"Dropping unreadable cache entry {key}: {e}")
+        return None
+    except Exception as e:
+        logger.error(f"Redis error reading {key}: {e}")
+        return None
+
+    # Keys written before entries carried a soft TTL hold the bare value, e.g. a JSON list
+    if not _is_entry(entry):
+        logger.warning(f"Ignoring cache entry {key} in an old format")
+        return None
+    return entry
+
+def _read_fresh_local(key: str):
+    entry = local_cache.get(key)
+    if entry and entry["fresh_until"] > time.time():
+        CACHE_REQUESTS.labels(tier="l1", result="hit").inc()
+        return entry
+    CACHE_REQUESTS.labels(tier="l1", result="miss").inc()
+    return None
+
+def _write(key: str, value, soft_ttl: int, hard_ttl: int):
+    entry = {"value": value, "fresh_until": time.time() + jittered(soft_ttl)}
+    local_cache.set(key, entry)
+    try:
+        redis_binary.set(key, cache_codec.encode(entry), ex=jittered(hard_ttl))
+    except Exception as e:
+        logger.warning(f"Cache save failed for {key}: {e}")
+
+def get_or_compute(key: str, compute, soft_ttl: int, hard_ttl: int):
+    """Read-through cache with single-flight recompute and stale-while-revalidate.
+
+    Fresh entries are returned directly. Past the soft TTL one caller recomputes
+    while the rest keep serving the stale value; past the hard TTL the key is gone
+    and concurrent callers wait for the leader instead of piling onto the database.
+    """
+    entry = _read_fresh_local(key)
+    if entry:
+        return entry["value"]
+
+    entry = _read(key)
+    if entry and entry["fresh_until"] > time.time():
+        CACHE_REQUESTS.labels(tier="l2", result="hit").inc()
+        local_cache.set(key, entry)
+        logger.info("Cache hit", extra={"cache_key": key})
+        return entry["value"]
+    CACHE_REQUESTS.labels(tier="l2", result="miss").inc()
+
+    with single_flight(key) as leader:
+        if leader:
+            value = compute()
+            _write(key, value, soft_ttl, hard_ttl)
+            logger.info("Cache miss - Data cached", extra={"cache_key": key, "stale": entry is not None})
+            return value
+
+    if entry:
+        logger.info("Cache stale hit - refresh in progress", extra={"cache_key": key})
+        return entry["value"]
+
+    entry = wait_for(lambda: _read(key))
+    if entry:
+        return entry["value"]
+    return compute()
+
+def invalidate(*keys: str):
+    """Drop keys from Redis and from the L1 of every worker."""
+    local_cache.evict(*keys)
+    try:
+        redis_client.delete(*keys)
+        redis_client.publish(INVALIDATION_CHANNEL, json.dumps(list(keys)))
+    except Exception as e:
+        logger.warning(f"Failed to delete cache keys {keys}: {e}")
+
+def _on_invalidation(message):
+    try:
+        local_cache.evict(*json.loads(message["data"]))
+    except (TypeError, ValueError) as e:
+        logger.warning(f"Ignoring malformed cache invalidation: {e}")
+
+_listener = None
+
+def start_invalidation_listener():
+    """Subscribe this worker's L1 to invalidations published by any worker."""
+    global _listener
+    if _listener is not None:
+        return
+    try:
+        pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(**{INVALIDATION_CHANNEL: _on_invalidation})
+        _listener = pubsub.run_in_thread(sleep_time=1, daemon=True)
+    except Exception as e:
+        logger.warning(f"Cache invalidation listener unavailable, L1 relies on its TTL: {e}")
+
+def stop_invalidation_listener():
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
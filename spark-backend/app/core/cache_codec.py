@@ -0,0 +1,49 @@
+import json
+import zlib
+import orjson
+
+# Payload layout: [format version][flags][body]. The version byte selects the
+# serializer, so the format can change without misreading older entries.
+FORMAT_VERSION = 1
+FLAG_ZLIB = 0x01
+COMPRESS_THRESHOLD = 2048
+COMPRESS_LEVEL = 1
+
+_SERIALIZERS = {
+    1: (orjson.dumps, orjson.loads),
+}
+
+class CodecError(ValueError):
+    pass
+
+def encode(value, version: int = FORMAT_VERSION) -> bytes:
+    dumps, _ = _SERIALIZERS[version]
+    body = dumps(value)
+    flags = 0
+    if len(body) > COMPRESS_THRESHOLD:
+        body = zlib.compress(body, COMPRESS_LEVEL)
+        flags |= FLAG_ZLIB
+    return bytes((version, flags)) + body
+
+def decode(data: bytes):
+    if not data:
+        raise CodecError("Empty cache payload")
+
+    # Entries written before the codec existed are plain JSON text
+    if data[:1] in (b"{", b"["):
+        try:
+            return json.loads(data)
+        except ValueError as e:
+            raise CodecError(f"Unreadable legacy cache payload: {e}") from e
+
+    version, flags, body = data[0], data[1], data[2:]
+    if version not in _SERIALIZERS:
+        raise CodecError(f"Unknown cache format version {version}")
+
+    _, loads = _SERIALIZERS[version]
+    try:
+        if flags & FLAG_ZLIB:
+            body = zlib.decompress(body)
+        return loads(body)
+    except (zlib.error, ValueError) as e:
+        raise CodecError(f"Corrupt cache payload: {e}") from e
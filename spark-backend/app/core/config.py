@@ -8,6 +8,22 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 1440
+
+    DISCOVERY_PAGE_SIZE: int = 20
+    DISCOVERY_MAX_PAGE_SIZE: int = 100
+    MATCHES_PAGE_SIZE: int = 20
+    MATCHES_MAX_PAGE_SIZE: int = 100
+
+    # Acknowledge swipes from a Redis stream and let scripts/flush_swipes.py store them
+    SWIPE_WRITE_BEHIND: bool = False
+    # How many swipes back a user can undo
+    SWIPE_UNDO_DEPTH: int = 10
+    # Blocking DB calls from async chat handlers run in at most this many threads; keep it within the pool size
+    CHAT_DB_CONCURRENCY: int = 10
+    # Deliver chat messages at once and group-commit them every CHAT_FLUSH_INTERVAL_MS or CHAT_FLUSH_MAX_MESSAGES
+    CHAT_WRITE_BEHIND: bool = False
+    CHAT_FLUSH_INTERVAL_MS: int = 10
+    CHAT_FLUSH_MAX_MESSAGES: int = 100
     
     CLOUDINARY_CLOUD_NAME: str
     CLOUDINARY_API_KEY: str
@@ -0,0 +1,11 @@
+import anyio
+from app.core.config import settings
+
+db_limiter = anyio.CapacityLimiter(settings.CHAT_DB_CONCURRENCY)
+
+async def run_db(func, *args):
+    """Run blocking database work in a worker thread so the event loop keeps serving other sockets.
+
+    At most CHAT_DB_CONCURRENCY calls run at once; the rest wait without holding a pooled connection.
+    """
+    return await anyio.to_thread.run_sync(func, *args, limiter=db_limiter)
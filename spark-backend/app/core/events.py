@@ -0,0 +1,52 @@
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, wait
+from app.core.logger import logger
+
+PROFILE_UPDATED = "profile_updated"
+LOCATION_UPDATED = "location_updated"
+IMAGES_UPDATED = "images_updated"
+MESSAGE_CREATED = "message_created"
+MESSAGES_READ = "messages_read"
+
+_subscribers = defaultdict(list)
+_background_subscribers = defaultdict(list)
+
+# One worker, so background handlers see events in the order they were published
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="events")
+_pending = set()
+_pending_lock = threading.Lock()
+
+def subscribe(event_type: str, background: bool = False):
+    """Register a handler. Background handlers run after `publish` returns, off the request."""
+    def decorator(handler):
+        (_background_subscribers if background else _subscribers)[event_type].append(handler)
+        return handler
+    return decorator
+
+def _dispatch(handler, event_type: str, payload: dict):
+    try:
+        handler(**payload)
+    except Exception as e:
+        logger.warning(f"Event handler {handler.__name__} failed for {event_type}: {e}", extra=payload)
+
+def _done(future):
+    with _pending_lock:
+        _pending.discard(future)
+
+def publish(event_type: str, **payload):
+    """Dispatch an event to every subscriber; a failing consumer never fails the write."""
+    for handler in _subscribers[event_type]:
+        _dispatch(handler, event_type, payload)
+
+    for handler in _background_subscribers[event_type]:
+        future = _executor.submit(_dispatch, handler, event_type, payload)
+        with _pending_lock:
+            _pending.add(future)
+        future.add_done_callback(_done)
+
+def drain(timeout: float = None):
+    """Wait for the background handlers queued so far, e.g. at shutdown."""
+    with _pending_lock:
+        pending = list(_pending)
+    wait(pending, timeout=timeout)
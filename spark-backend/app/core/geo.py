@@ -0,0 +1,81 @@
+import math
+
+EARTH_RADIUS_KM = 6371
+KM_PER_DEGREE_LAT = 111.32
+
+# Precision 3 gives ~156 km x 156 km cells at the equator, so a 200 km search
+# radius touches a couple of dozen cells instead of the whole table.
+GEOHASH_PRECISION = 3
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def encode_geohash(latitude: float, longitude: float, precision: int = GEOHASH_PRECISION) -> str:
+    lat_lo, lat_hi = -90.0, 90.0
+    lon_lo, lon_hi = -180.0, 180.0
+    chars = []
+    bits, bit_count, even = 0, 0, True
+
+    while len(chars) < precision:
+        if even:
+            mid = (lon_lo + lon_hi) / 2
+            if longitude >= mid:
+                bits = bits * 2 + 1
+                lon_lo = mid
+            else:
+                bits = bits * 2
+                lon_hi = mid
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            if latitude >= mid:
+                bits = bits * 2 + 1
+                lat_lo = mid
+            else:
+                bits = bits * 2
+                lat_hi = mid
+
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_BASE32[bits])
+            bits, bit_count = 0, 0
+
+    return "".join(chars)
+
+
+def geohash_cell_size(precision: int = GEOHASH_PRECISION):
+    total_bits = 5 * precision
+    lon_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lon_bits
+
+
+def _steps(lo: float, hi: float, step: float):
+    value = lo
+    while value < hi:
+        yield value
+        value += step
+    yield hi
+
+
+def geohash_cells_within(latitude: float, longitude: float, radius_km: float, precision: int = GEOHASH_PRECISION):
+    """Return every geohash cell that overlaps the bounding box of the search circle."""
+    cell_height, cell_width = geohash_cell_size(precision)
+
+    dlat = radius_km / KM_PER_DEGREE_LAT
+    lat_lo, lat_hi = max(latitude - dlat, -90.0), min(latitude + dlat, 90.0)
+
+    # Longitude degrees shrink towards the poles, so size the box for the widest latitude.
+    cos_lat = math.cos(math.radians(max(abs(lat_lo), abs(lat_hi))))
+    dlon = radius_km / (KM_PER_DEGREE_LAT * cos_lat) if cos_lat > 1e-6 else 180.0
+    if dlon >= 180.0:
+        lon_lo, lon_hi = -180.0, 180.0
+    else:
+        lon_lo, lon_hi = longitude - dlon, longitude + dlon
+
+    cells = set()
+    for lat in _steps(lat_lo, lat_hi, cell_height):
+        for lon in _steps(lon_lo, lon_hi, cell_width):
+            wrapped_lon = ((lon + 180.0) % 360.0) - 180.0
+            cells.add(encode_geohash(lat, wrapped_lon, precision))
+    return sorted(cells)
@@ -0,0 +1,45 @@
+import numpy as np
+from app.core.geo import EARTH_RADIUS_KM
+
+NEARBY_KM = 30
+
+
+def haversine_many(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    lat1, lon1 = np.radians(lat), np.radians(lon)
+    lat2, lon2 = np.radians(lats), np.radians(lons)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return EARTH_RADIUS_KM * (2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a)))
+
+
+def rank_candidates(lat: float, lon: float, lats, lons, common_counts, radius_km: float, limit: int = None):
+    """Score every candidate in one pass and return (indices, distances) of the top rows.
+
+    Ordering matches the scalar discovery sort: nearby (<= 30 km) first, then more
+    common interests, then shorter distance, ties keeping input order.
+    """
+    lats = np.asarray(lats, dtype=np.float64)
+    lons = np.asarray(lons, dtype=np.float64)
+    common = np.asarray(common_counts, dtype=np.int64)
+
+    distances = haversine_many(lat, lon, lats, lons)
+    in_range = np.flatnonzero(distances <= radius_km)
+    if in_range.size == 0:
+        return in_range, distances[in_range]
+
+    dist = np.round(distances[in_range], 1)
+    common = common[in_range]
+    far = (dist > NEARBY_KM).astype(np.int64)
+    deci_km = np.rint(dist * 10).astype(np.int64)
+
+    # Pack the sort tuple into one integer key; the input position breaks ties so
+    # the order is total and argpartition can safely cut the top rows.
+    key = (far << 40) | ((common.max() - common) << 20) | deci_km
+    key = key * in_range.size + np.arange(in_range.size, dtype=np.int64)
+
+    if limit is not None and limit < key.size:
+        top = np.argpartition(key, limit)[:limit]
+        order = top[np.argsort(key[top])]
+    else:
+        order = np.argsort(key)
+
+    return in_range[order], dist[order]
@@ -3,4 +3,7 @@ import os
 
 REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
 
-redis_client = redis.from_url(REDIS_URL, decode_responses = True)
\ No newline at end of file
+redis_client = redis.from_url(REDIS_URL, decode_responses = True)
+
+# Raw bytes connection for cache payloads written by app.core.cache_codec
+redis_binary = redis.from_url(REDIS_URL)
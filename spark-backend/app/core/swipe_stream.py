@@ -0,0 +1,93 @@
+import os
+import socket
+from datetime import datetime
+import redis
+from app.core.redis import redis_client
+
+STREAM_KEY = "swipes:stream"
+CONSUMER_GROUP = "swipe-flushers"
+# Entries a crashed worker left unacknowledged for this long are taken over by another worker
+CLAIM_IDLE_MS = 60_000
+
+def consumer_name():
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+def _encode(event: dict):
+    return {
+        "event_id": event["event_id"],
+        "liker_id": event["liker_id"],
+        "liked_id": event["liked_id"],
+        "is_like": int(event["is_like"]),
+        "created_at": event["created_at"].isoformat(),
+    }
+
+def _decode(fields: dict):
+    return {
+        "event_id": fields["event_id"],
+        "liker_id": int(fields["liker_id"]),
+        "liked_id": int(fields["liked_id"]),
+        "is_like": fields["is_like"] == "1",
+        "created_at": datetime.fromisoformat(fields["created_at"]),
+    }
+
+class RedisSwipeStream:
+    """Durable queue of swipe events on a Redis stream, consumed through a consumer group.
+
+    Entries stay in the group's pending list until acknowledged, so a worker that
+    dies mid-flush gets them redelivered (at-least-once).
+    """
+
+    def __init__(self, client=redis_client, key: str = STREAM_KEY, group: str = CONSUMER_GROUP):
+        self.client = client
+        self.key = key
+        self.group = group
+        # Events the database rejected, kept for inspection instead of blocking the stream
+        self.dead_key = f"{key}:dead"
+        self._group_ready = False
+
+    def _ensure_group(self):
+        if self._group_ready:
+            return
+        try:
+            self.client.xgroup_create(self.key, self.group, id="0", mkstream=True)
+        except redis.ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+        self._group_ready = True
+
+    def append(self, event: dict):
+        return self.client.xadd(self.key, _encode(event))
+
+    def read(self, consumer: str, count: int, block_ms: int = None):
+        """Return up to `count` (entry_id, event) pairs, redelivering unacknowledged entries first."""
+        self._ensure_group()
+        entries = self.client.xreadgroup(self.group, consumer, {self.key: "0"}, count=count)
+        pending = entries[0][1] if entries else []
+        if not pending:
+            _, pending, *_ = self.client.xautoclaim(self.key, self.group, consumer, CLAIM_IDLE_MS, count=count)
+        if not pending:
+            entries = self.client.xreadgroup(self.group, consumer, {self.key: ">"}, count=count, block=block_ms)
+            pending = entries[0][1] if entries else []
+        return [(entry_id, _decode(fields)) for entry_id, fields in pending if fields]
+
+    def ack(self, entry_ids):
+        if not entry_ids:
+            return
+        pipe = self.client.pipeline()
+        pipe.xack(self.key, self.group, *entry_ids)
+        pipe.xdel(self.key, *entry_ids)
+        pipe.execute()
+
+    def dead_letter(self, events):
+        """Keep events that can never be stored; the caller still acks them."""
+        if not events:
+            return
+        pipe = self.client.pipeline()
+        for event in events:
+            pipe.xadd(self.dead_key, _encode(event))
+        pipe.execute()
+
+    def backlog(self):
+        return self.client.xlen(self.key)
+
+swipe_stream = RedisSwipeStream()
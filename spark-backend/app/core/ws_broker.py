@@ -0,0 +1,74 @@
+import asyncio
+import redis.asyncio as redis_async
+from app.core.redis import REDIS_URL
+from app.core.logger import logger
+
+# One channel per user: a worker subscribes while it holds that user's socket,
+# so a publish reaches exactly the workers that can deliver it.
+CHANNEL_PREFIX = "ws:user:"
+LISTEN_TIMEOUT = 1.0
+
+def user_channel(user_id: int):
+    return f"{CHANNEL_PREFIX}{user_id}"
+
+def channel_user(channel: str):
+    return int(channel[len(CHANNEL_PREFIX):])
+
+class RedisBroker:
+    """Relays WebSocket messages between workers over Redis pub/sub.
+
+    `handler(channel, data)` is awaited for every message on a subscribed channel.
+    """
+
+    def __init__(self, url: str = REDIS_URL):
+        self.url = url
+        self._client = None
+        self._pubsub = None
+        self._listener = None
+        self._handler = None
+        self._subscriptions = None
+
+    async def start(self, handler):
+        self._handler = handler
+        self._client = redis_async.from_url(self.url, decode_responses=True)
+        self._pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+        # PubSub opens its connection on the first command; concurrent first subscribes would each open one
+        self._subscriptions = asyncio.Lock()
+
+    async def stop(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            self._listener = None
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+            self._pubsub = None
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def publish(self, channel: str, data: str):
+        await self._client.publish(channel, data)
+
+    async def subscribe(self, channel: str):
+        async with self._subscriptions:
+            await self._pubsub.subscribe(channel)
+        # The pubsub connection only exists after the first subscribe
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def unsubscribe(self, channel: str):
+        async with self._subscriptions:
+            await self._pubsub.unsubscribe(channel)
+
+    async def _listen(self):
+        while True:
+            try:
+                message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=LISTEN_TIMEOUT)
+                if message is not None:
+                    await self._handler(message["channel"], message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # redis-py resubscribes on reconnect, so keep listening
+                logger.warning(f"WebSocket broker listener error: {e}")
+                await asyncio.sleep(LISTEN_TIMEOUT)
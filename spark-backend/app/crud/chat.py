@@ -1,14 +1,104 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import or_, and_
+from sqlalchemy import or_, and_, case, func, select, update, insert, delete
+from sqlalchemy.exc import IntegrityError
 from app.models.chat import Message
+from app.models.conversation import Conversation
+from app.models.match import Match
+from app.core import events
+
+PREVIEW_LENGTH = 200
+BACKFILL_CHUNK_SIZE = 1000
+
+def _pair(user_a: int, user_b: int):
+    return min(user_a, user_b), max(user_a, user_b)
+
+def _unread_column(user1_id: int, receiver_id: int):
+    return "unread_count_user1" if receiver_id == user1_id else "unread_count_user2"
+
+def _touch_conversation(db: Session, msg: Message, unread_counts: dict = None):
+    """Point the pair's summary row at `msg`. `unread_counts` maps receiver id to new
+    unread messages and defaults to one for `msg`'s receiver."""
+    u1, u2 = _pair(msg.sender_id, msg.receiver_id)
+    unread = {_unread_column(u1, receiver_id): count for receiver_id, count in (unread_counts or {msg.receiver_id: 1}).items()}
+    values = {
+        "last_message_id": msg.id,
+        "last_message_preview": msg.content[:PREVIEW_LENGTH],
+        "last_message_at": msg.timestamp,
+    }
+    # Increment in SQL so concurrent senders do not overwrite each other's counts
+    increments = {column: getattr(Conversation, column) + count for column, count in unread.items()}
+
+    updated = db.execute(
+        update(Conversation)
+        .where(Conversation.user1_id == u1, Conversation.user2_id == u2)
+        .values(**values, **increments)
+    ).rowcount
+    if updated:
+        return
+
+    try:
+        with db.begin_nested():
+            db.execute(insert(Conversation).values(user1_id=u1, user2_id=u2, **values, **unread))
+    except IntegrityError:
+        # Another writer created the row first
+        db.execute(
+            update(Conversation)
+            .where(Conversation.user1_id == u1, Conversation.user2_id == u2)
+            .values(**values, **increments)
+        )
 
 def create_message(db: Session, sender_id: int, receiver_id: int, content: str):
     db_msg = Message(sender_id=sender_id, receiver_id=receiver_id, content=content)
     db.add(db_msg)
+    db.flush()
+    _touch_conversation(db, db_msg)
+
+    u1, u2 = _pair(sender_id, receiver_id)
+    db.execute(
+        update(Match)
+        .where(Match.user1_id == u1, Match.user2_id == u2)
+        .values(last_activity_at=db_msg.timestamp)
+    )
     db.commit()
     db.refresh(db_msg)
+
+    events.publish(events.MESSAGE_CREATED, sender_id=sender_id, receiver_id=receiver_id)
     return db_msg
 
+def create_messages_batch(db: Session, messages: list):
+    """Store messages whose uid and timestamp were assigned up front, in one transaction.
+
+    One multi-row insert, then one conversation and one match update per pair in the
+    batch rather than per message. Returns the stored rows.
+    """
+    rows = db.execute(
+        insert(Message).returning(
+            Message.id, Message.uid, Message.sender_id, Message.receiver_id, Message.content, Message.timestamp
+        ),
+        [{**message, "is_read": False} for message in messages]
+    ).all()
+
+    by_pair = {}
+    for row in sorted(rows, key=lambda row: (row.timestamp, row.id)):
+        by_pair.setdefault(_pair(row.sender_id, row.receiver_id), []).append(row)
+
+    for (u1, u2), pair_rows in by_pair.items():
+        unread_counts = {}
+        for row in pair_rows:
+            unread_counts[row.receiver_id] = unread_counts.get(row.receiver_id, 0) + 1
+        last = pair_rows[-1]
+        _touch_conversation(db, last, unread_counts)
+        db.execute(
+            update(Match)
+            .where(Match.user1_id == u1, Match.user2_id == u2)
+            .values(last_activity_at=last.timestamp)
+        )
+    db.commit()
+
+    for pair_rows in by_pair.values():
+        events.publish(events.MESSAGE_CREATED, sender_id=pair_rows[-1].sender_id, receiver_id=pair_rows[-1].receiver_id)
+    return rows
+
 def get_conversation(db: Session, user1_id: int, user2_id: int, limit: int = 50):
     return db.query(Message).filter(
         or_(
@@ -17,12 +107,92 @@ def get_conversation(db: Session, user1_id: int, user2_id: int, limit: int = 50)
         )
     ).order_by(Message.timestamp.asc()).limit(limit).all()
 
+def get_conversation_summary(db: Session, user_a: int, user_b: int):
+    u1, u2 = _pair(user_a, user_b)
+    return db.query(Conversation).filter(Conversation.user1_id == u1, Conversation.user2_id == u2).first()
+
+def get_inbox(db: Session, user_id: int, limit: int = 50):
+    """One row per conversation, most recent first, with this user's unread count."""
+    other_id = case((Conversation.user1_id == user_id, Conversation.user2_id), else_=Conversation.user1_id)
+    unread = case((Conversation.user1_id == user_id, Conversation.unread_count_user1), else_=Conversation.unread_count_user2)
+    rows = db.execute(
+        select(other_id.label("user_id"), Conversation.last_message_id, Conversation.last_message_preview,
+               Conversation.last_message_at, unread.label("unread_count"))
+        .where(or_(Conversation.user1_id == user_id, Conversation.user2_id == user_id))
+        .order_by(Conversation.last_message_at.desc(), Conversation.id.desc())
+        .limit(limit)
+    )
+    return [dict(row._mapping) for row in rows]
+
 def mark_messages_as_read(db: Session, receiver_id: int, sender_id: int):
-    db.query(Message).filter(
+    read = db.query(Message).filter(
         Message.receiver_id == receiver_id,
         Message.sender_id == sender_id,
         Message.is_read == False
     ).update({"is_read": True}, synchronize_session=False)
+
+    u1, u2 = _pair(receiver_id, sender_id)
+    db.execute(
+        update(Conversation)
+        .where(Conversation.user1_id == u1, Conversation.user2_id == u2)
+        .values(**{_unread_column(u1, receiver_id): 0})
+    )
     db.commit()
 
-    
+    if read:
+        events.publish(events.MESSAGES_READ, sender_id=sender_id, receiver_id=receiver_id)
+
+def delete_conversation(db: Session, user_a: int, user_b: int):
+    """Delete the pair's messages and summary row; the caller commits."""
+    # One delete per direction, each a range on the (sender_id, receiver_id, timestamp) index
+    for sender_id, receiver_id in ((user_a, user_b), (user_b, user_a)):
+        db.execute(delete(Message).where(Message.sender_id == sender_id, Message.receiver_id == receiver_id))
+
+    u1, u2 = _pair(user_a, user_b)
+    db.execute(delete(Conversation).where(Conversation.user1_id == u1, Conversation.user2_id == u2))
+
+def backfill_conversations(db: Session):
+    """Rebuild every conversation row from the messages table. Returns the number of rows written."""
+    # SQLite spells LEAST/GREATEST as the multi-argument MIN/MAX
+    sqlite = db.get_bind().dialect.name == "sqlite"
+    user1 = (func.min if sqlite else func.least)(Message.sender_id, Message.receiver_id)
+    user2 = (func.max if sqlite else func.greatest)(Message.sender_id, Message.receiver_id)
+
+    ranked = select(
+        Message.id, Message.content, Message.timestamp,
+        user1.label("user1_id"), user2.label("user2_id"),
+        func.row_number().over(
+            partition_by=(user1, user2), order_by=(Message.timestamp.desc(), Message.id.desc())
+        ).label("rn")
+    ).subquery()
+
+    unread = select(
+        user1.label("user1_id"), user2.label("user2_id"),
+        func.sum(case((and_(Message.receiver_id == user1, Message.is_read == False), 1), else_=0)).label("unread1"),
+        func.sum(case((and_(Message.receiver_id == user2, Message.is_read == False), 1), else_=0)).label("unread2"),
+    ).group_by(user1, user2).subquery()
+
+    rows = db.execute(
+        select(ranked, unread.c.unread1, unread.c.unread2)
+        .join(unread, and_(unread.c.user1_id == ranked.c.user1_id, unread.c.user2_id == ranked.c.user2_id))
+        .where(ranked.c.rn == 1)
+    ).all()
+
+    conversations = [
+        {
+            "user1_id": row.user1_id,
+            "user2_id": row.user2_id,
+            "last_message_id": row.id,
+            "last_message_preview": row.content[:PREVIEW_LENGTH],
+            "last_message_at": row.timestamp,
+            "unread_count_user1": row.unread1,
+            "unread_count_user2": row.unread2,
+        }
+        for row in rows
+    ]
+
+    db.execute(delete(Conversation))
+    for start in range(0, len(conversations), BACKFILL_CHUNK_SIZE):
+        db.execute(insert(Conversation), conversations[start:start + BACKFILL_CHUNK_SIZE])
+    db.commit()
+    return len(conversations)
@@ -0,0 +1,238 @@
+import secrets
+import time
+from app.core.redis import redis_client, redis_binary
+from app.core import cache_codec
+from app.core.logger import logger
+from app.core import events
+from app.core.cache import jittered
+
+DECK_SIZE = 200
+DECK_LOW_WATER = 50
+# Profile, image and location changes patch decks through events, so decks can live longer
+DECK_TTL = 3600
+# Past this age one request rebuilds the deck while others keep reading the old one
+DECK_SOFT_TTL = 900
+
+# The deck is an ordered candidate queue per user:
+#   discovery:deck:{id}       ZSET  candidate id -> rank position
+#   discovery:cards:{id}      HASH  candidate id -> card encoded with cache_codec
+#   discovery:deck_meta:{id}  HASH  next_rank, snapshot version and built_at (present once built)
+#   discovery:appears_in:{id} SET   viewers whose deck currently holds this candidate
+
+def _deck_key(user_id: int):
+    return f"discovery:deck:{user_id}"
+
+def _cards_key(user_id: int):
+    return f"discovery:cards:{user_id}"
+
+def _meta_key(user_id: int):
+    return f"discovery:deck_meta:{user_id}"
+
+def _appears_in_key(candidate_id: int):
+    return f"discovery:appears_in:{candidate_id}"
+
+# Snapshot reads are one round trip: meta, ids and cards come back together
+_READ_DECK = redis_binary.register_script("""
+if redis.call('exists', KEYS[1]) == 0 then
+    return false
+end
+local meta = redis.call('hmget', KEYS[1], 'version', 'built_at')
+local ids = redis.call('zrange', KEYS[2], ARGV[1], ARGV[2])
+local cards = {}
+if #ids > 0 then
+    cards = redis.call('hmget', KEYS[3], unpack(ids))
+end
+return {meta[1], meta[2], cards}
+""")
+
+_READ_PAGE = redis_binary.register_script("""
+local meta = redis.call('hmget', KEYS[1], 'version', 'built_at')
+local version = meta[1]
+if not version then
+    return false
+end
+local after = ARGV[1]
+if ARGV[2] ~= version then
+    after = '-1'
+end
+local count = tonumber(ARGV[3])
+local rows = redis.call('zrangebyscore', KEYS[2], '(' .. after, '+inf', 'WITHSCORES', 'LIMIT', 0, count + 1)
+local ids = {}
+for i = 1, math.min(#rows, 2 * count), 2 do
+    ids[#ids + 1] = rows[i]
+end
+local cards = {}
+if #ids > 0 then
+    cards = redis.call('hmget', KEYS[3], unpack(ids))
+end
+return {version, after, rows, cards}
+""")
+
+def _decode_cards(cards):
+    return [cache_codec.decode(card) for card in cards if card]
+
+def read_deck_snapshot(user_id: int, start: int = 0, count: int = None):
+    """Return (cards, version, built_at) in rank order, or None when the user has no deck yet."""
+    end = -1 if count is None else start + count - 1
+    result = _READ_DECK(keys=[_meta_key(user_id), _deck_key(user_id), _cards_key(user_id)], args=[start, end])
+    if not result:
+        return None
+    version, built_at, cards = result
+    return (
+        _decode_cards(cards),
+        version.decode() if version else None,
+        float(built_at) if built_at else None,
+    )
+
+def read_deck(user_id: int, start: int = 0, count: int = None):
+    """Return cards in rank order, or None when the user has no deck yet."""
+    snapshot = read_deck_snapshot(user_id, start, count)
+    return None if snapshot is None else snapshot[0]
+
+def deck_lock_key(user_id: int):
+    return _deck_key(user_id)
+
+def is_stale(built_at: float):
+    return built_at is None or time.time() - built_at > DECK_SOFT_TTL
+
+def read_page(user_id: int, after_rank: float, version: str, count: int):
+    """Return (cards, last_rank, version, has_more) for the cards ranked after `after_rank`.
+
+    A cursor from an older snapshot restarts at the top of the current deck, since
+    rank positions are only meaningful within the deck they were issued for.
+    Returns None when the user has no deck yet.
+    """
+    result = _READ_PAGE(
+        keys=[_meta_key(user_id), _deck_key(user_id), _cards_key(user_id)],
+        args=[after_rank, version or "", count]
+    )
+    if not result:
+        return None
+    current_version, after, rows, cards = result
+    current_version = current_version.decode()
+
+    has_more = len(rows) > 2 * count
+    if not rows:
+        return [], float(after), current_version, False
+    last_rank = float(rows[min(len(rows), 2 * count) - 1])
+    return _decode_cards(cards), last_rank, current_version, has_more
+
+def deck_ids(user_id: int):
+    return {int(i) for i in redis_client.zrange(_deck_key(user_id), 0, -1)}
+
+def deck_size(user_id: int):
+    return redis_client.zcard(_deck_key(user_id))
+
+def needs_refill(user_id: int):
+    try:
+        return redis_client.exists(_meta_key(user_id)) and deck_size(user_id) < DECK_LOW_WATER
+    except Exception as e:
+        logger.warning(f"Failed to read deck size for user {user_id}: {e}")
+        return False
+
+def _append(pipe, user_id: int, cards: list, first_rank: int, version: str = None):
+    if cards:
+        pipe.zadd(_deck_key(user_id), {str(card["id"]): first_rank + i for i, card in enumerate(cards)})
+        pipe.hset(_cards_key(user_id), mapping={str(card["id"]): cache_codec.encode(card) for card in cards})
+        for card in cards:
+            pipe.sadd(_appears_in_key(card["id"]), user_id)
+            pipe.expire(_appears_in_key(card["id"]), DECK_TTL)
+    pipe.hset(_meta_key(user_id), "next_rank", first_rank + len(cards))
+    if version is not None:
+        pipe.hset(_meta_key(user_id), mapping={"version": version, "built_at": time.time()})
+    ttl = jittered(DECK_TTL)
+    for key in (_deck_key(user_id), _cards_key(user_id), _meta_key(user_id)):
+        pipe.expire(key, ttl)
+
+def replace_deck(user_id: int, cards: list):
+    pipe = redis_binary.pipeline()
+    pipe.delete(_deck_key(user_id), _cards_key(user_id), _meta_key(user_id))
+    _append(pipe, user_id, cards, 0, version=secrets.token_hex(4))
+    pipe.execute()
+
+def append_to_deck(user_id: int, cards: list):
+    next_rank = int(redis_client.hget(_meta_key(user_id), "next_rank") or 0)
+    pipe = redis_binary.pipeline()
+    _append(pipe, user_id, cards, next_rank)
+    pipe.execute()
+
+def pop_from_deck(user_id: int, candidate_id: int):
+    pop_many_from_deck(user_id, [candidate_id])
+
+def pop_many_from_deck(user_id: int, candidate_ids):
+    try:
+        pipe = redis_client.pipeline()
+        for candidate_id in candidate_ids:
+            pipe.zrem(_deck_key(user_id), str(candidate_id))
+            pipe.hdel(_cards_key(user_id), str(candidate_id))
+            pipe.srem(_appears_in_key(candidate_id), user_id)
+        pipe.execute()
+    except Exception as e:
+        logger.warning(f"Failed to pop candidates {list(candidate_ids)} from deck of user {user_id}: {e}")
+
+def invalidate_deck(user_id: int):
+    try:
+        redis_client.delete(_deck_key(user_id), _cards_key(user_id), _meta_key(user_id))
+    except Exception as e:
+        logger.warning(f"Failed to delete discovery deck for user {user_id}: {e}")
+
+# Profile fields that decide whether the user fits a viewer's filters at all
+FILTER_FIELDS = {"gender", "birthdate"}
+# Fields that only shape the user's own deck: their preferences and their side of common interests
+OWN_DECK_FIELDS = {"interests", "age_min", "age_max", "interests_tags"}
+# Profile field -> card field, patched in place in every deck holding the card
+CARD_FIELDS = {"full_name": "full_name", "bio": "bio", "interests_tags": "interests"}
+
+@events.subscribe(events.LOCATION_UPDATED, background=True)
+def drop_from_decks(user_id: int, **_):
+    """The user's eligibility may have changed: drop their card everywhere and rebuild their own deck.
+
+    Refills re-evaluate them against each viewer's filters, so they come back where they still fit.
+    """
+    viewers = redis_client.smembers(_appears_in_key(user_id))
+    pipe = redis_client.pipeline()
+    for viewer_id in viewers:
+        pipe.zrem(_deck_key(viewer_id), str(user_id))
+        pipe.hdel(_cards_key(viewer_id), str(user_id))
+    pipe.delete(_appears_in_key(user_id))
+    pipe.delete(_deck_key(user_id), _cards_key(user_id), _meta_key(user_id))
+    pipe.execute()
+
+@events.subscribe(events.PROFILE_UPDATED, background=True)
+def apply_profile_changes(user_id: int, changes: dict, **_):
+    if changes.keys() & FILTER_FIELDS:
+        drop_from_decks(user_id)
+        return
+
+    # Common-interest counts and order catch up when each viewer's deck is rebuilt
+    patch = {CARD_FIELDS[field]: value for field, value in changes.items() if field in CARD_FIELDS}
+    if patch:
+        patch_cards(user_id, patch)
+    if changes.keys() & OWN_DECK_FIELDS:
+        invalidate_deck(user_id)
+
+@events.subscribe(events.IMAGES_UPDATED, background=True)
+def patch_card_images(user_id: int, images: list, **_):
+    patch_cards(user_id, {"images": images})
+
+def patch_cards(user_id: int, fields: dict):
+    """Update the user's card in every deck that holds it."""
+    viewers = list(redis_client.smembers(_appears_in_key(user_id)))
+    if not viewers:
+        return
+
+    cards = redis_binary.pipeline()
+    for viewer_id in viewers:
+        cards.hget(_cards_key(viewer_id), str(user_id))
+
+    pipe = redis_client.pipeline()
+    patches = redis_binary.pipeline()
+    for viewer_id, card in zip(viewers, cards.execute()):
+        if card:
+            patched = cache_codec.decode(card)
+            patched.update(fields)
+            patches.hset(_cards_key(viewer_id), str(user_id), cache_codec.encode(patched))
+        else:
+            pipe.srem(_appears_in_key(user_id), viewer_id)
+    patches.execute()
+    pipe.execute()
@@ -0,0 +1,70 @@
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from app.models.interest import InterestTag
+from app.models.profile import Profile
+
+# Process-local copy of the interest_tags dictionary. IDs are assigned by the
+# database, so the cache only ever holds mappings that exist there.
+_tag_ids = {}
+_tag_names = {}
+
+def clear_tag_cache():
+    _tag_ids.clear()
+    _tag_names.clear()
+
+def _remember(rows):
+    for tag_id, name in rows:
+        _tag_ids[name] = tag_id
+        _tag_names[tag_id] = name
+
+def intern_tags(db: Session, names):
+    wanted = set(names or [])
+    missing = sorted(n for n in wanted if n not in _tag_ids)
+
+    if missing:
+        _remember(db.query(InterestTag.id, InterestTag.name).filter(InterestTag.name.in_(missing)).all())
+        new_names = [n for n in missing if n not in _tag_ids]
+        if new_names:
+            # Own session: committing the caller's would expire everything it has loaded,
+            # e.g. the candidates being ranked for discovery
+            with Session(bind=db.get_bind()) as tag_db:
+                try:
+                    tag_db.add_all([InterestTag(name=n) for n in new_names])
+                    tag_db.commit()
+                except IntegrityError:
+                    # Another worker interned the same tag first
+                    tag_db.rollback()
+                _remember(tag_db.query(InterestTag.id, InterestTag.name).filter(InterestTag.name.in_(new_names)).all())
+
+    return sorted(_tag_ids[n] for n in wanted)
+
+def mask_from_ids(tag_ids):
+    mask = 0
+    for tag_id in tag_ids:
+        mask |= 1 << tag_id
+    return mask
+
+def encode_mask(mask: int) -> bytes:
+    return mask.to_bytes((mask.bit_length() + 7) // 8, "little")
+
+def decode_mask(data: bytes) -> int:
+    return int.from_bytes(data or b"", "little")
+
+def tags_to_mask(db: Session, names) -> bytes:
+    return encode_mask(mask_from_ids(intern_tags(db, names)))
+
+def profile_mask(db: Session, profile: Profile) -> int:
+    if profile.interests_mask is not None:
+        return decode_mask(profile.interests_mask)
+    # Migration 0002 backfills masks; this only covers rows written without one since
+    return mask_from_ids(intern_tags(db, profile.interests_tags))
+
+def common_count(mask_a: int, mask_b: int) -> int:
+    return (mask_a & mask_b).bit_count()
+
+def mask_to_tags(db: Session, mask: int):
+    tag_ids = [i for i in range(mask.bit_length()) if mask >> i & 1]
+    unknown = [i for i in tag_ids if i not in _tag_names]
+    if unknown:
+        _remember(db.query(InterestTag.id, InterestTag.name).filter(InterestTag.id.in_(unknown)).all())
+    return [_tag_names[i] for i in tag_ids if i in _tag_names]
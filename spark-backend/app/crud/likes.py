@@ -0,0 +1,99 @@
+from itertools import groupby
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.core.redis import redis_client
+from app.core.logger import logger
+from app.models.swipe import Swipe
+
+# Sets are rebuilt lazily from the swipes table once they expire or Redis loses them
+LIKE_SET_TTL = 7 * 24 * 3600
+REBUILD_CHUNK_SIZE = 1000
+
+#   liked_by:{id}  SET  users who liked this user, plus SENTINEL once loaded from the DB
+#
+# Without the sentinel the set may only hold likes added since it was last built,
+# so a miss is not proof of absence and the set is loaded first.
+SENTINEL = "*"
+
+def _liked_by_key(user_id: int):
+    return f"liked_by:{user_id}"
+
+def _load_likers(db: Session, liked_id: int):
+    return db.scalars(select(Swipe.liker_id).where(Swipe.liked_id == liked_id, Swipe.is_like == True)).all()
+
+def _build(db: Session, liked_id: int):
+    # SADD rather than replace: likes still waiting in the write-behind stream only live in the set
+    pipe = redis_client.pipeline()
+    pipe.sadd(_liked_by_key(liked_id), SENTINEL, *_load_likers(db, liked_id))
+    pipe.expire(_liked_by_key(liked_id), LIKE_SET_TTL)
+    pipe.execute()
+
+def add_like(liker_id: int, liked_id: int):
+    add_likes(liker_id, [liked_id])
+
+def add_likes(liker_id: int, liked_ids):
+    try:
+        pipe = redis_client.pipeline()
+        for liked_id in liked_ids:
+            pipe.sadd(_liked_by_key(liked_id), liker_id)
+            pipe.expire(_liked_by_key(liked_id), LIKE_SET_TTL)
+        pipe.execute()
+    except Exception as e:
+        logger.warning(f"Failed to record likes by user {liker_id}: {e}")
+
+def remove_like(liker_id: int, liked_id: int):
+    try:
+        redis_client.srem(_liked_by_key(liked_id), liker_id)
+    except Exception as e:
+        logger.warning(f"Failed to remove like of user {liked_id} by {liker_id}: {e}")
+
+def remove_pair(user_a: int, user_b: int):
+    remove_like(user_a, user_b)
+    remove_like(user_b, user_a)
+
+def likers_among(db: Session, liked_id: int, candidate_ids):
+    """Return the subset of `candidate_ids` who have liked `liked_id`."""
+    candidate_ids = list(candidate_ids)
+    if not candidate_ids:
+        return set()
+
+    key = _liked_by_key(liked_id)
+    try:
+        if not redis_client.sismember(key, SENTINEL):
+            _build(db, liked_id)
+        flags = redis_client.smismember(key, candidate_ids)
+        return {candidate for candidate, flag in zip(candidate_ids, flags) if flag}
+    except Exception as e:
+        logger.warning(f"Like set unavailable for user {liked_id}, using the swipes table: {e}")
+        return set(db.scalars(
+            select(Swipe.liker_id).distinct()
+            .where(Swipe.liked_id == liked_id, Swipe.liker_id.in_(candidate_ids), Swipe.is_like == True)
+        ))
+
+def has_liked(db: Session, liker_id: int, liked_id: int):
+    """True if `liker_id` has liked `liked_id`; one set lookup once the set is loaded."""
+    return liker_id in likers_among(db, liked_id, [liker_id])
+
+def rebuild_all(db: Session):
+    """Replace every like set with the contents of the swipes table. Returns the number of sets written.
+
+    Likes still queued in the write-behind stream are not in the table yet, so run
+    this while the flush worker is caught up.
+    """
+    for key in redis_client.scan_iter(match=_liked_by_key("*"), count=REBUILD_CHUNK_SIZE):
+        redis_client.delete(key)
+
+    rows = db.execute(
+        select(Swipe.liked_id, Swipe.liker_id).where(Swipe.is_like == True).order_by(Swipe.liked_id)
+    ).yield_per(REBUILD_CHUNK_SIZE)
+
+    written = 0
+    pipe = redis_client.pipeline()
+    for liked_id, group in groupby(rows, key=lambda row: row.liked_id):
+        pipe.sadd(_liked_by_key(liked_id), SENTINEL, *(row.liker_id for row in group))
+        pipe.expire(_liked_by_key(liked_id), LIKE_SET_TTL)
+        written += 1
+        if written % REBUILD_CHUNK_SIZE == 0:
+            pipe.execute()
+    pipe.execute()
+    return written
@@ -0,0 +1,144 @@
+import asyncio
+import uuid
+from datetime import datetime, timezone
+from app.core.config import settings
+from app.core.db_threads import run_db
+from app.core.logger import logger
+from app.crud import chat as chat_crud
+from app.crud import unread
+from app.database import SessionLocal
+
+_STOP = object()
+
+def prepare_message(sender_id: int, receiver_id: int, content: str):
+    """Give a message its uid and timestamp now, so it can be delivered before it is stored."""
+    return {
+        "uid": uuid.uuid4().hex,
+        "sender_id": sender_id,
+        "receiver_id": receiver_id,
+        "content": content,
+        "timestamp": datetime.now(timezone.utc),
+    }
+
+class MessageWriter:
+    """Per-worker queue that group-commits chat messages.
+
+    A batch is written once it holds `max_batch` messages or `interval_ms` after its
+    first message, whichever comes first. `submit` returns a future that resolves
+    once the message is committed, which is the sender's durability ack. `stop`
+    writes everything still queued, so a clean shutdown loses nothing.
+    """
+
+    def __init__(self, session_factory=SessionLocal, max_batch: int = None, interval_ms: int = None):
+        self.session_factory = session_factory
+        self.max_batch = max_batch or settings.CHAT_FLUSH_MAX_MESSAGES
+        self.interval_ms = interval_ms or settings.CHAT_FLUSH_INTERVAL_MS
+        self._queue = None
+        self._task = None
+
+    @property
+    def running(self):
+        return self._task is not None
+
+    async def start(self):
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        task, self._task = self._task, None
+        await self._queue.put(_STOP)
+        await task
+
+    def submit(self, message: dict):
+        if not self.running:
+            raise RuntimeError("Message writer is not running")
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((message, future))
+        return future
+
+    async def _next_batch(self):
+        """Wait for a first message, then collect more until the batch is full or its time is up.
+
+        Returns the batch and whether a stop was requested.
+        """
+        item = await self._queue.get()
+        if item is _STOP:
+            return [], True
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.interval_ms / 1000
+        batch = [item]
+        while len(batch) < self.max_batch:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self._queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    async def _run(self):
+        stopping = False
+        while not stopping:
+            batch, stopping = await self._next_batch()
+            if batch:
+                await self._flush(batch)
+        # Anything submitted between the stop request and now
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is not _STOP:
+                await self._flush([item])
+
+    async def _flush(self, batch: list):
+        messages = [message for message, _ in batch]
+        try:
+            await run_db(self._store, messages)
+            errors = [None] * len(batch)
+        except Exception as e:
+            # One bad message (e.g. a deleted receiver) must not fail the others
+            logger.warning(f"Chat batch of {len(batch)} failed, storing one by one: {e}")
+            errors = await run_db(self._store_each, messages)
+
+        for (_, future), error in zip(batch, errors):
+            if future.done():
+                continue
+            if error is None:
+                future.set_result(None)
+            else:
+                future.set_exception(error)
+
+    def _store(self, messages: list):
+        db = self.session_factory()
+        try:
+            chat_crud.create_messages_batch(db, messages)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        unread_counts = {}
+        for message in messages:
+            key = (message["receiver_id"], message["sender_id"])
+            unread_counts[key] = unread_counts.get(key, 0) + 1
+        for (receiver_id, sender_id), count in unread_counts.items():
+            unread.increment(receiver_id, sender_id, count)
+
+    def _store_each(self, messages: list):
+        errors = []
+        for message in messages:
+            try:
+                self._store([message])
+                errors.append(None)
+            except Exception as e:
+                logger.error(f"Failed to store chat message {message['uid']}: {e}")
+                errors.append(e)
+        return errors
+
+message_writer = MessageWriter()
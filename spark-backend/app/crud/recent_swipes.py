@@ -0,0 +1,50 @@
+import json
+from app.core.redis import redis_client
+from app.core.logger import logger
+from app.core.config import settings
+
+RECENT_SWIPES_TTL = 24 * 3600
+
+#   swipes:recent:{id}  LIST  newest first, at most SWIPE_UNDO_DEPTH entries
+#
+# Each entry names the stored row (swipe_id) or, in write-behind mode, the queued
+# event (event_id). A missing or exhausted list just means undo reads the swipes table.
+
+def _recent_key(user_id: int):
+    return f"swipes:recent:{user_id}"
+
+def record(liker_id: int, entry: dict):
+    record_many(liker_id, [entry])
+
+def record_many(liker_id: int, entries: list):
+    """Push swipes oldest first, so the last entry ends up at the head of the list."""
+    if not entries:
+        return
+    key = _recent_key(liker_id)
+    try:
+        pipe = redis_client.pipeline()
+        pipe.lpush(key, *(json.dumps(entry) for entry in entries))
+        pipe.ltrim(key, 0, settings.SWIPE_UNDO_DEPTH - 1)
+        pipe.expire(key, RECENT_SWIPES_TTL)
+        pipe.execute()
+    except Exception as e:
+        logger.warning(f"Failed to record recent swipes of user {liker_id}: {e}")
+
+def pop(liker_id: int):
+    """Remove and return the newest entry, or None when the list is empty or Redis is down."""
+    try:
+        raw = redis_client.lpop(_recent_key(liker_id))
+    except Exception as e:
+        logger.warning(f"Recent swipes unavailable for user {liker_id}: {e}")
+        return None
+    return json.loads(raw) if raw else None
+
+def drop_target(liker_id: int, liked_id: int):
+    """Forget the user's swipes on `liked_id`, e.g. once a block has deleted them."""
+    key = _recent_key(liker_id)
+    try:
+        for raw in redis_client.lrange(key, 0, -1):
+            if json.loads(raw)["liked_id"] == liked_id:
+                redis_client.lrem(key, 0, raw)
+    except Exception as e:
+        logger.warning(f"Failed to drop recent swipes of user {liker_id} on {liked_id}: {e}")
@@ -0,0 +1,168 @@
+import time
+import uuid
+from datetime import datetime, timezone
+from sqlalchemy import delete, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import DataError, IntegrityError
+from sqlalchemy.orm import Session
+from app.core import swipe_stream as stream_module
+from app.core.redis import redis_client
+from app.core.logger import logger
+from app.models.swipe import Swipe
+
+FLUSH_BATCH_SIZE = 500
+FLUSH_BLOCK_MS = 1000
+# Undone events and pending targets only need to outlive the flush lag
+TOMBSTONE_TTL = 24 * 3600
+PENDING_TTL = 24 * 3600
+
+def _stream(stream):
+    return stream if stream is not None else stream_module.swipe_stream
+
+def enqueue_swipe(liker_id: int, liked_id: int, is_like: bool, stream=None):
+    """Append a swipe to the write-behind stream; the flush worker stores it later."""
+    event = {
+        "event_id": uuid.uuid4().hex,
+        "liker_id": liker_id,
+        "liked_id": liked_id,
+        "is_like": is_like,
+        "created_at": datetime.now(timezone.utc),
+    }
+    _stream(stream).append(event)
+    try:
+        pipe = redis_client.pipeline()
+        pipe.sadd(_pending_key(liker_id), liked_id)
+        pipe.expire(_pending_key(liker_id), PENDING_TTL)
+        pipe.execute()
+    except Exception as e:
+        logger.warning(f"Failed to mark swipe of user {liker_id} on {liked_id} as pending: {e}")
+    return event
+
+def _pending_key(liker_id: int):
+    return f"swipes:pending:{liker_id}"
+
+def pending_targets(liker_id: int):
+    """Users `liker_id` swiped on whose swipes are still queued, so not yet in the swipes table."""
+    try:
+        return {int(liked_id) for liked_id in redis_client.smembers(_pending_key(liker_id))}
+    except Exception as e:
+        logger.warning(f"Pending swipes unavailable for user {liker_id}: {e}")
+        return set()
+
+def forget_pending(events: list):
+    """Drop targets whose swipes were stored, undone or dead-lettered."""
+    if not events:
+        return
+    try:
+        pipe = redis_client.pipeline()
+        for event in events:
+            pipe.srem(_pending_key(event["liker_id"]), event["liked_id"])
+        pipe.execute()
+    except Exception as e:
+        logger.warning(f"Failed to clear pending swipes: {e}")
+
+def _tombstone_key(event_id: str):
+    return f"swipes:tombstone:{event_id}"
+
+def tombstone(event_id: str):
+    """Mark a queued swipe as undone so the flush worker does not store it."""
+    redis_client.set(_tombstone_key(event_id), 1, ex=TOMBSTONE_TTL)
+
+def tombstoned(event_ids: list):
+    if not event_ids:
+        return set()
+    pipe = redis_client.pipeline()
+    for event_id in event_ids:
+        pipe.exists(_tombstone_key(event_id))
+    return {event_id for event_id, flag in zip(event_ids, pipe.execute()) if flag}
+
+def insert_swipes(db: Session, events: list):
+    """Insert swipe events, skipping any event_id already stored so redelivery is harmless."""
+    rows = list({event["event_id"]: event for event in events}.values())
+    if not rows:
+        return
+
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        db.execute(postgresql.insert(Swipe).on_conflict_do_nothing(index_elements=["event_id"]), rows)
+    elif dialect == "sqlite":
+        db.execute(sqlite.insert(Swipe).on_conflict_do_nothing(index_elements=["event_id"]), rows)
+    else:
+        stored = set(db.scalars(select(Swipe.event_id).where(Swipe.event_id.in_([r["event_id"] for r in rows]))))
+        rows = [r for r in rows if r["event_id"] not in stored]
+        if rows:
+            db.execute(insert(Swipe), rows)
+
+def _store_each(db: Session, entries: list):
+    """Store entries one by one after their batch failed. Returns the entries the database rejected."""
+    rejected = []
+    for entry_id, event in entries:
+        try:
+            insert_swipes(db, [event])
+            db.commit()
+        except (IntegrityError, DataError) as e:
+            # A row that breaks a constraint fails on every retry, e.g. a swipe on a deleted user
+            db.rollback()
+            logger.error(f"Dead-lettering swipe {event['event_id']}: {e}")
+            rejected.append((entry_id, event))
+        except Exception:
+            db.rollback()
+            raise
+    return rejected
+
+def flush_once(db: Session, consumer: str, stream=None, count: int = FLUSH_BATCH_SIZE, block_ms: int = None):
+    """Move one batch from the stream into the swipes table. Returns the number of entries handled.
+
+    Entries are acknowledged only after the commit, so a crash in between redelivers them.
+    If the database rejects the batch, its entries are stored one by one and the ones
+    that still fail are dead-lettered, so one bad entry cannot hold up the stream.
+    Undone events are skipped, and checked again after the commit: an undo that tombstones
+    an event after the first check deletes the row itself once it is committed.
+    """
+    stream = _stream(stream)
+    entries = stream.read(consumer, count, block_ms)
+    if not entries:
+        return 0
+
+    skipped = tombstoned([event["event_id"] for _, event in entries])
+    live = [(entry_id, event) for entry_id, event in entries if event["event_id"] not in skipped]
+    try:
+        insert_swipes(db, [event for _, event in live])
+        db.commit()
+        rejected = []
+    except (IntegrityError, DataError) as e:
+        db.rollback()
+        logger.warning(f"Swipe batch of {len(live)} failed, storing one by one: {e}")
+        rejected = _store_each(db, live)
+    except Exception:
+        db.rollback()
+        raise
+
+    rejected_ids = {entry_id for entry_id, _ in rejected}
+    try:
+        late = tombstoned([event["event_id"] for entry_id, event in live if entry_id not in rejected_ids])
+        if late:
+            db.execute(delete(Swipe).where(Swipe.event_id.in_(late)))
+            db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    stream.dead_letter([event for _, event in rejected])
+    stream.ack([entry_id for entry_id, _ in entries])
+    forget_pending([event for _, event in entries])
+    return len(entries)
+
+def run_worker(session_factory, consumer: str, stream=None, should_stop=lambda: False):
+    logger.info("Swipe flush worker started", extra={"consumer": consumer})
+    while not should_stop():
+        db = session_factory()
+        try:
+            flushed = flush_once(db, consumer, stream, block_ms=FLUSH_BLOCK_MS)
+            if flushed:
+                logger.info("Swipes flushed", extra={"consumer": consumer, "count": flushed})
+        except Exception as e:
+            logger.error(f"Swipe flush failed, retrying: {e}", extra={"consumer": consumer})
+            time.sleep(FLUSH_BLOCK_MS / 1000)
+        finally:
+            db.close()
@@ -0,0 +1,67 @@
+from sqlalchemy import case, or_, select
+from sqlalchemy.orm import Session
+from app.core.redis import redis_client
+from app.core.logger import logger
+from app.models.conversation import Conversation
+
+# Counters drift if a write is lost (Redis restart, failed increment), so they are
+# rebuilt from the conversations table once this marker expires.
+RECONCILE_INTERVAL = 300
+
+#   unread:user:{id}    HASH  sender id -> unread messages from that sender
+#   unread:synced:{id}  STRING  present while the hash is trusted
+
+def _counts_key(user_id: int):
+    return f"unread:user:{user_id}"
+
+def _synced_key(user_id: int):
+    return f"unread:synced:{user_id}"
+
+def increment(receiver_id: int, sender_id: int, amount: int = 1):
+    try:
+        redis_client.hincrby(_counts_key(receiver_id), str(sender_id), amount)
+    except Exception as e:
+        logger.warning(f"Failed to bump unread counter for user {receiver_id}: {e}")
+
+def reset(receiver_id: int, sender_id: int):
+    try:
+        redis_client.hdel(_counts_key(receiver_id), str(sender_id))
+    except Exception as e:
+        logger.warning(f"Failed to reset unread counter for user {receiver_id}: {e}")
+
+def invalidate(user_id: int):
+    try:
+        redis_client.delete(_counts_key(user_id), _synced_key(user_id))
+    except Exception as e:
+        logger.warning(f"Failed to drop unread counters for user {user_id}: {e}")
+
+def _load_counts(db: Session, user_id: int):
+    other_id = case((Conversation.user1_id == user_id, Conversation.user2_id), else_=Conversation.user1_id)
+    unread = case((Conversation.user1_id == user_id, Conversation.unread_count_user1), else_=Conversation.unread_count_user2)
+    rows = db.execute(
+        select(other_id, unread)
+        .where(or_(Conversation.user1_id == user_id, Conversation.user2_id == user_id), unread > 0)
+    )
+    return {sender_id: count for sender_id, count in rows}
+
+def reconcile(db: Session, user_id: int):
+    """Overwrite the user's counters with the values from the conversations table."""
+    counts = _load_counts(db, user_id)
+    pipe = redis_client.pipeline()
+    pipe.delete(_counts_key(user_id))
+    if counts:
+        pipe.hset(_counts_key(user_id), mapping={str(k): v for k, v in counts.items()})
+    pipe.set(_synced_key(user_id), 1, ex=RECONCILE_INTERVAL)
+    pipe.execute()
+    return counts
+
+def get_unread_counts(db: Session, user_id: int):
+    """Return {sender_id: unread_count} for every conversation with unread messages."""
+    try:
+        if redis_client.exists(_synced_key(user_id)):
+            counts = redis_client.hgetall(_counts_key(user_id))
+            return {int(k): int(v) for k, v in counts.items() if int(v) > 0}
+        return reconcile(db, user_id)
+    except Exception as e:
+        logger.warning(f"Unread counters unavailable for user {user_id}: {e}")
+        return _load_counts(db, user_id)
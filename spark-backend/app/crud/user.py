@@ -1,23 +1,41 @@
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func, or_, and_, extract
-from app.models.chat import Message
+from sqlalchemy.orm import Session, joinedload, contains_eager
+from sqlalchemy import func, or_, and_, exists, case, select, insert, delete
 from app.models.user import User, PasswordReset
 from app.models.profile import Profile, ProfileImage
 from app.models.swipe import Swipe
 from app.models.match import Match
 from app.models.location import UserLocation
 from app.models.block import Block
+from app.models.conversation import Conversation
 from passlib.context import CryptContext
 from fastapi import HTTPException, status
 from app.schemas.user import UserCreate, PasswordChange, ProfileUpdate, LocationUpdate, SwipeCreate
 import math
-from datetime import datetime, timedelta, timezone
+from datetime import date, datetime, timedelta, timezone
 import secrets
 import string
 from sqlalchemy.orm.attributes import flag_modified
+from sqlalchemy.exc import IntegrityError
 import json
-from app.core.redis import redis_client
+import base64
+from app.database import SessionLocal
+from app.crud import discovery_deck
+from app.crud import chat as chat_crud
+from app.crud import unread
+from app.crud import likes
+from app.crud import swipe_writer
+from app.crud import recent_swipes
+from app.crud import interest as interest_crud
 from app.core.logger import logger
+from app.core.config import settings
+from app.core import events
+from app.core import cache
+from app.core.geo import encode_geohash, geohash_cells_within
+from app.core.ranking import rank_candidates
+
+DISCOVERY_RADIUS_KM = 200
+MATCHES_SOFT_TTL = 300
+MATCHES_HARD_TTL = 900
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -52,7 +70,8 @@ def create_user(db: Session, user_in: UserCreate):
         gender=user_in.gender,
         interests=default_interests,
         age_min=18,
-        age_max=100
+        age_max=100,
+        interests_mask=interest_crud.encode_mask(0)
     )
     db.add(db_profile)
     db.commit()
@@ -91,6 +110,10 @@ def update_profile(db: Session, user_id: int, profile_in: ProfileUpdate):
     
     update_data = profile_in.model_dump(exclude_unset=True)
 
+    if "interests_tags" in update_data:
+        db_profile.interests_mask = interest_crud.tags_to_mask(db, update_data["interests_tags"])
+
+    changes = {field: value for field, value in update_data.items() if getattr(db_profile, field) != value}
     for field, value in update_data.items():
         setattr(db_profile, field, value)
         if field == "interests_tags":
@@ -98,6 +121,8 @@ def update_profile(db: Session, user_id: int, profile_in: ProfileUpdate):
     
     db.commit()
     db.refresh(db_profile)
+    if changes:
+        events.publish(events.PROFILE_UPDATED, user_id=user_id, changes=changes)
     return db_profile
 
 def get_profile(db: Session, user_id: int):
@@ -121,14 +146,14 @@ def get_user_profile_data(db: Session, target_user_id: int, current_user_id: int
         )
 
     target_interests = u.profile.interests_tags or []
-    my_interests = me.profile.interests_tags or []
-    common_interests = list(set(target_interests).intersection(set(my_interests)))
+    common_mask = interest_crud.profile_mask(db, u.profile) & interest_crud.profile_mask(db, me.profile)
+    common_interests = interest_crud.mask_to_tags(db, common_mask)
 
     return {
         "id": u.id,
         "full_name": u.profile.full_name,
         "bio": u.profile.bio,
-        "age": datetime.now().year - u.profile.birthdate.year,
+        "age": calculate_age(u.profile.birthdate),
         "distance": round(dist, 1),
         "images": sorted(u.profile.images, key=lambda x: x.position),
         "interests": target_interests,
@@ -155,6 +180,7 @@ def upload_profile_image(db: Session, profile_id: int, image_url: str, public_id
     db.add(db_image)
     db.commit()
     db.refresh(db_image)
+    _publish_images_updated(db, profile_id)
     return db_image
     
 def delete_profile_image(db: Session, image_id: int, profile_id: int):
@@ -166,25 +192,37 @@ def delete_profile_image(db: Session, image_id: int, profile_id: int):
     if img:
         db.delete(img)
         db.commit()
+        _publish_images_updated(db, profile_id)
         return img
     return None
 
+def _publish_images_updated(db: Session, profile_id: int):
+    profile = db.query(Profile).filter(Profile.id == profile_id).first()
+    if profile:
+        db.refresh(profile, ["images"])
+        events.publish(events.IMAGES_UPDATED, user_id=profile.user_id, images=_format_images(profile.images))
+
 def update_user_location(db: Session, user_id: int, loc_in: LocationUpdate):
     db_loc = db.query(UserLocation).filter(UserLocation.user_id == user_id).first()
 
+    geohash = encode_geohash(loc_in.latitude, loc_in.longitude)
+
     if db_loc:
         db_loc.latitude = loc_in.latitude
         db_loc.longitude = loc_in.longitude
+        db_loc.geohash = geohash
     else:
         db_loc = UserLocation(
             user_id=user_id,
             latitude=loc_in.latitude,
-            longitude=loc_in.longitude
+            longitude=loc_in.longitude,
+            geohash=geohash
         )
         db.add(db_loc)
 
     db.commit()
     db.refresh(db_loc)
+    events.publish(events.LOCATION_UPDATED, user_id=user_id)
     return db_loc
 
 def calculate_distance(lat1, lon1, lat2, lon2):
@@ -193,178 +231,431 @@ def calculate_distance(lat1, lon1, lat2, lon2):
     a = math.sin(dlat/2)**2 + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(dlon/2)**2
     return R * (2 * math.atan2(math.sqrt(a), math.sqrt(1-a)))
 
-def get_discovery_users(db: Session, current_user_id: int):
-    cache_key = f"discovery:user:{current_user_id}"
+def calculate_age(birthdate: date, today: date = None):
+    today = today or date.today()
+    return today.year - birthdate.year - ((today.month, today.day) < (birthdate.month, birthdate.day))
 
+def _years_before(today: date, years: int):
     try:
-        cached_data = redis_client.get(cache_key)
-        if cached_data:
-            logger.info("Discovery cache hit", extra={"user_id": current_user_id})
-            return json.loads(cached_data)
-    except Exception as e:
-        logger.error(f"Redis error: {e}", extra={"user_id": current_user_id})
-        
-    me = db.query(User).filter(User.id == current_user_id).first()
-    if not me or not me.location or not me.profile:
-        return []
-    
+        return today.replace(year=today.year - years)
+    except ValueError:
+        # Feb 29 in a non-leap target year
+        return today.replace(year=today.year - years, day=28)
+
+def birthdate_range(age_min: int, age_max: int, today: date = None):
+    """Inclusive birthdate bounds for everyone whose exact age is within [age_min, age_max]."""
+    today = today or date.today()
+    oldest = _years_before(today, age_max + 1) + timedelta(days=1)
+    youngest = _years_before(today, age_min)
+    return oldest, youngest
+
+def _format_images(images):
+    return sorted(
+        [{"id": img.id, "url": img.url, "position": img.position} for img in images],
+        key=lambda x: x['position']
+    )
+
+def _discovery_card(u: User, distance: float, common_interests_count: int, today: date):
+    return {
+        "id": u.id,
+        "full_name": u.profile.full_name,
+        "bio": u.profile.bio,
+        "age": calculate_age(u.profile.birthdate, today),
+        "distance": distance,
+        "images": _format_images(u.profile.images),
+        "interests": u.profile.interests_tags or [],
+        "common_interests_count": common_interests_count
+    }
+
+def rank_discovery_users_reference(me: User, users: list):
+    """Scalar reference ranking, kept to validate the vectorized path."""
     my_interests = set(me.profile.interests_tags or [])
+    today = datetime.now()
+
+    results = []
+    for u in users:
+        dist = calculate_distance(me.location.latitude, me.location.longitude, u.location.latitude, u.location.longitude)
+        if dist <= DISCOVERY_RADIUS_KM:
+            other_interests = set(u.profile.interests_tags or [])
+            common_interests = list(my_interests.intersection(other_interests))
+            results.append(_discovery_card(u, round(dist, 1), len(common_interests), today))
+
+    return sorted(results, key=lambda x: (x['distance'] > 30, -x['common_interests_count'], x['distance']))
+
+def rank_discovery_users(db: Session, me: User, users: list, limit: int = None):
+    """Vectorized ranking: only the top `limit` candidates are turned into response dicts."""
+    if not users:
+        return []
+
+    my_mask = interest_crud.profile_mask(db, me.profile)
+    common_counts = [interest_crud.common_count(my_mask, interest_crud.profile_mask(db, u.profile)) for u in users]
 
+    indices, distances = rank_candidates(
+        me.location.latitude, me.location.longitude,
+        [u.location.latitude for u in users],
+        [u.location.longitude for u in users],
+        common_counts,
+        DISCOVERY_RADIUS_KM,
+        limit=limit
+    )
+
+    today = date.today()
+    return [_discovery_card(users[i], float(d), common_counts[i], today) for i, d in zip(indices, distances)]
+
+def get_discovery_candidates(db: Session, me: User):
     now_utc = datetime.now(timezone.utc)
     one_week_ago = now_utc - timedelta(days=7)
 
-    swiped_ids = db.query(Swipe.liked_id).filter(
-        Swipe.liker_id == current_user_id,
+    # Anti-joins keep the exclusion inside the candidate query instead of binding
+    # every swiped/blocked id as a parameter
+    swiped = exists().where(
+        Swipe.liker_id == me.id,
+        Swipe.liked_id == User.id,
         or_(Swipe.is_like == True, and_(Swipe.is_like == False, Swipe.created_at > one_week_ago))
-    ).all()
-    
-    blocked_by_me = db.query(Block.blocked_id).filter(Block.blocker_id == current_user_id).all()
-    blocking_me = db.query(Block.blocker_id).filter(Block.blocked_id == current_user_id).all()
-
-    excluded = (
-        [s[0] for s in swiped_ids] + 
-        [b[0] for b in blocked_by_me] + 
-        [b[0] for b in blocking_me] + 
-        [current_user_id]
     )
-
-    query = db.query(User).join(Profile).filter(User.id.notin_(excluded))
+    blocked_by_me = exists().where(Block.blocker_id == me.id, Block.blocked_id == User.id)
+    blocking_me = exists().where(Block.blocker_id == User.id, Block.blocked_id == me.id)
+
+    # Only pull candidates from the geohash cells overlapping the search radius
+    cells = geohash_cells_within(me.location.latitude, me.location.longitude, DISCOVERY_RADIUS_KM)
+
+    query = db.query(User).join(Profile).join(UserLocation, UserLocation.user_id == User.id).filter(
+        User.id != me.id,
+        ~swiped,
+        ~blocked_by_me,
+        ~blocking_me,
+        UserLocation.geohash.in_(cells)
+    )
+    if settings.SWIPE_WRITE_BEHIND:
+        # Queued swipes only reach the swipes table when the flush worker stores them
+        pending = swipe_writer.pending_targets(me.id)
+        if pending:
+            query = query.filter(User.id.notin_(pending))
     if me.profile.interests != 'both':
         query = query.filter(Profile.gender == me.profile.interests)
 
-    today = datetime.now()
-    query = query.filter((extract('year', today) - extract('year', Profile.birthdate)).between(me.profile.age_min, me.profile.age_max))
-    users = query.options(joinedload(User.profile).joinedload(Profile.images), joinedload(User.location)).all()
+    oldest, youngest = birthdate_range(me.profile.age_min, me.profile.age_max)
+    query = query.filter(Profile.birthdate.between(oldest, youngest))
+    return query.options(joinedload(User.profile).joinedload(Profile.images), contains_eager(User.location)).all()
 
-    results = []
-    for u in users:
-        if not u.location:
-            continue
-        
-        dist = calculate_distance(me.location.latitude, me.location.longitude, u.location.latitude, u.location.longitude)
-        if dist <= 200:
-            other_interests = set(u.profile.interests_tags or [])
-            common_interests = list(my_interests.intersection(other_interests))
+def _read_discovery_deck(user_id: int):
+    try:
+        return discovery_deck.read_deck_snapshot(user_id)
+    except Exception as e:
+        logger.error(f"Redis error: {e}", extra={"user_id": user_id})
+        return None
 
-            formatted_images = sorted(
-                [{"id": img.id, "url": img.url, "position": img.position} for img in u.profile.images],
-                key=lambda x: x['position']
-            )
-
-            results.append({
-                "id": u.id,
-                "full_name": u.profile.full_name,
-                "bio": u.profile.bio,
-                "age": today.year - u.profile.birthdate.year,
-                "distance": round(dist, 1),
-                "images": formatted_images,
-                "interests": u.profile.interests_tags or [],
-                "common_interests_count": len(common_interests)
-            })
+def get_discovery_users(db: Session, current_user_id: int):
+    snapshot = _read_discovery_deck(current_user_id)
+    cached_deck = None
+    if snapshot is not None:
+        cached_deck, _, built_at = snapshot
+        if not discovery_deck.is_stale(built_at):
+            logger.info("Discovery deck hit", extra={"user_id": current_user_id})
+            return cached_deck
+
+    with cache.single_flight(discovery_deck.deck_lock_key(current_user_id)) as leader:
+        if leader:
+            return _build_discovery_deck(db, current_user_id)
+
+    if cached_deck is not None:
+        logger.info("Discovery deck stale hit - rebuild in progress", extra={"user_id": current_user_id})
+        return cached_deck
+
+    built = cache.wait_for(lambda: _read_discovery_deck(current_user_id))
+    return built[0] if built is not None else _build_discovery_deck(db, current_user_id)
+
+def _build_discovery_deck(db: Session, current_user_id: int):
+    me = db.query(User).filter(User.id == current_user_id).first()
+    if not me or not me.location or not me.profile:
+        return []
     
-    final_results = sorted(results, key=lambda x: (x['distance'] > 30, -x['common_interests_count'], x['distance']))
+    users = get_discovery_candidates(db, me)
+    final_results = rank_discovery_users(db, me, users, limit=discovery_deck.DECK_SIZE)
 
     try:
-        redis_client.setex(cache_key, 600, json.dumps(final_results))
-        logger.info("Discovery cache miss - Data cached", extra={"user_id": current_user_id})
+        discovery_deck.replace_deck(current_user_id, final_results)
+        logger.info("Discovery deck miss - Deck built", extra={"user_id": current_user_id})
     except Exception as e:
-        logger.warning(f"Cache save failed: {e}")
+        logger.warning(f"Deck save failed: {e}")
 
     return final_results
 
+def encode_discovery_cursor(position: int, version: str):
+    raw = json.dumps({"p": position, "v": version}).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_discovery_cursor(cursor: str):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded))
+        return int(data["p"]), data.get("v")
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+def get_discovery_page(db: Session, current_user_id: int, cursor: str = None, page_size: int = 20):
+    position, version = decode_discovery_cursor(cursor) if cursor else (-1, None)
+
+    page = None
+    try:
+        page = discovery_deck.read_page(current_user_id, position, version, page_size)
+        if page is None:
+            # Build the deck once, then serve every page from it
+            get_discovery_users(db, current_user_id)
+            page = discovery_deck.read_page(current_user_id, position, version, page_size)
+    except Exception as e:
+        logger.error(f"Redis error in discovery page: {e}", extra={"user_id": current_user_id})
+
+    if page is None:
+        ranked = get_discovery_users(db, current_user_id)
+        start = position + 1 if version is None else 0
+        items = ranked[start:start + page_size]
+        has_more = start + page_size < len(ranked)
+        next_cursor = encode_discovery_cursor(start + page_size - 1, None) if has_more else None
+        return {"items": items, "next_cursor": next_cursor}
+
+    items, last_rank, current_version, has_more = page
+    next_cursor = encode_discovery_cursor(int(last_rank), current_version) if has_more else None
+    return {"items": items, "next_cursor": next_cursor}
+
+def refill_discovery_deck(user_id: int, session_factory=None):
+    """Top the deck back up once swipes have drained it below the low-water mark.
+
+    Runs as a background task after the response, so it opens and closes its own session.
+    """
+    db = (session_factory or SessionLocal)()
+    try:
+        me = db.query(User).filter(User.id == user_id).first()
+        if not me or not me.location or not me.profile:
+            return 0
+
+        size = discovery_deck.deck_size(user_id)
+        if size >= discovery_deck.DECK_LOW_WATER:
+            return 0
+        in_deck = discovery_deck.deck_ids(user_id)
+
+        users = [u for u in get_discovery_candidates(db, me) if u.id not in in_deck]
+        batch = rank_discovery_users(db, me, users, limit=discovery_deck.DECK_SIZE - size)
+        discovery_deck.append_to_deck(user_id, batch)
+    except Exception as e:
+        logger.warning(f"Deck refill failed: {e}", extra={"user_id": user_id})
+        return 0
+    finally:
+        db.close()
+
+    logger.info("Discovery deck refilled", extra={"user_id": user_id, "added": len(batch)})
+    return len(batch)
+
+def _insert_match_row(db: Session, user_a: int, user_b: int):
+    try:
+        with db.begin_nested():
+            db.add(Match(user1_id=min(user_a, user_b), user2_id=max(user_a, user_b)))
+        return True
+    except IntegrityError:
+        return False
+
+def _create_match(db: Session, user_a: int, user_b: int):
+    # The unique pair index rejects the match if it exists or the other like created it concurrently
+    created = _insert_match_row(db, user_a, user_b)
+    db.commit()
+    if created:
+        invalidate_match_cache(user_a, user_b)
+    return created
+
 def create_swipe(db: Session, liker_id: int, swipe_in: SwipeCreate):
+    if settings.SWIPE_WRITE_BEHIND:
+        return _enqueue_swipe(db, liker_id, swipe_in)
+
     db_swipe = Swipe(liker_id=liker_id, liked_id=swipe_in.liked_id, is_like=swipe_in.is_like)
     db.add(db_swipe)
+    db.flush()
+    swipe_id = db_swipe.id
     db.commit()
 
-    redis_client.delete(f"discovery:user:{liker_id}")
+    recent_swipes.record(liker_id, {"swipe_id": swipe_id, "liked_id": swipe_in.liked_id, "is_like": swipe_in.is_like})
+    discovery_deck.pop_from_deck(liker_id, swipe_in.liked_id)
 
     if swipe_in.is_like:
-        reverse_like = db.query(Swipe).filter(Swipe.liker_id == swipe_in.liked_id, Swipe.liked_id == liker_id, Swipe.is_like == True).first()
-
-        if reverse_like:
-            u1, u2 = min(liker_id, swipe_in.liked_id), max(liker_id, swipe_in.liked_id)
+        # Record our like before checking theirs, so two simultaneous likes cannot both miss
+        likes.add_like(liker_id, swipe_in.liked_id)
 
-            existing_match = db.query(Match).filter(Match.user1_id == u1, Match.user2_id == u2).first()
-            
-            if not existing_match:
-                new_match = Match(user1_id=u1, user2_id=u2)
-                db.add(new_match)
-                db.commit()
-                invalidate_match_cache(liker_id)
-                invalidate_match_cache(swipe_in.liked_id)
-                return db_swipe, True
+        if likes.has_liked(db, swipe_in.liked_id, liker_id) and _create_match(db, liker_id, swipe_in.liked_id):
+            return db_swipe, True
             
     return db_swipe, False
 
-def get_user_matches(db: Session, user_id: int):
-    cache_key = f"matches:user:{user_id}"
+def _enqueue_swipe(db: Session, liker_id: int, swipe_in: SwipeCreate):
+    """Write-behind path: the swipe row is stored later by the flush worker, only matches are written now."""
+    # The foreign key is only checked at flush time, long after this request returned
+    if db.scalar(select(User.id).where(User.id == swipe_in.liked_id)) is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+
+    event = swipe_writer.enqueue_swipe(liker_id, swipe_in.liked_id, swipe_in.is_like)
+    recent_swipes.record(liker_id, {"event_id": event["event_id"], "liked_id": swipe_in.liked_id, "is_like": swipe_in.is_like})
+    discovery_deck.pop_from_deck(liker_id, swipe_in.liked_id)
+
+    if not swipe_in.is_like:
+        return event, False
+
+    likes.add_like(liker_id, swipe_in.liked_id)
+    is_match = likes.has_liked(db, swipe_in.liked_id, liker_id) and _create_match(db, liker_id, swipe_in.liked_id)
+    return event, is_match
+
+def create_swipes_batch(db: Session, liker_id: int, swipes: list):
+    """Store a batch of swipes in one transaction and report which of them made a match.
+
+    Reciprocal likes come from one like-set lookup, existing matches from one query,
+    new matches are inserted with one statement, and caches are invalidated once.
+    """
+    # Ordered by id, as undo falls back to reading the table (all rows share created_at)
+    stored = sorted(db.execute(insert(Swipe).returning(Swipe.id, Swipe.liked_id, Swipe.is_like), [
+        {"liker_id": liker_id, "liked_id": s.liked_id, "is_like": s.is_like} for s in swipes
+    ]).all())
+
+    # Record our likes before checking theirs, as create_swipe does, so a single swipe
+    # racing this batch cannot miss the match on both sides. The like set is Redis-only
+    # and additive, so this needs no commit first.
+    liked_ids = {s.liked_id for s in swipes if s.is_like}
+    likes.add_likes(liker_id, liked_ids)
+
+    matched_ids = set()
+    if liked_ids:
+        reciprocal = likes.likers_among(db, liker_id, liked_ids)
+        existing = set(db.scalars(
+            select(case((Match.user1_id == liker_id, Match.user2_id), else_=Match.user1_id))
+            .where(or_(
+                and_(Match.user1_id == liker_id, Match.user2_id.in_(reciprocal)),
+                and_(Match.user2_id == liker_id, Match.user1_id.in_(reciprocal))
+            ))
+        )) if reciprocal else set()
+        matched_ids = reciprocal - existing
+
+    if matched_ids:
+        try:
+            with db.begin_nested():
+                db.execute(insert(Match), [
+                    {"user1_id": min(liker_id, other), "user2_id": max(liker_id, other)} for other in sorted(matched_ids)
+                ])
+        except IntegrityError:
+            # A concurrent swipe matched some of these pairs first; insert the rest one by one
+            matched_ids = {other for other in matched_ids if _insert_match_row(db, liker_id, other)}
+    db.commit()
 
-    try:
-        cached_data = redis_client.get(cache_key)
-        if cached_data:
-            logger.info("Match list cache hit", extra={"user_id": user_id})
-            return json.loads(cached_data)
-    except Exception as e:
-        logger.error(f"Redis error in matches: {e}", extra={"user_id": user_id})
+    recent_swipes.record_many(liker_id, [
+        {"swipe_id": row.id, "liked_id": row.liked_id, "is_like": row.is_like} for row in stored
+    ])
+    discovery_deck.pop_many_from_deck(liker_id, {s.liked_id for s in swipes})
+    if matched_ids:
+        invalidate_match_cache(liker_id, *matched_ids)
 
-    matches = db.query(Match).filter((Match.user1_id == user_id) | (Match.user2_id == user_id)).all()
+    # Only the first like of a newly matched user reports the match, as repeated single swipes would
     results = []
-    
-    for m in matches:
-        other_id = m.user2_id if m.user1_id == user_id else m.user1_id
-        other_user = db.query(User).filter(User.id == other_id).first()
-
-        if other_user and other_user.profile:
-            last_msg = db.query(Message).filter(
-                or_(
-                    and_(Message.sender_id == user_id, Message.receiver_id == other_id),
-                    and_(Message.sender_id == other_id, Message.receiver_id == user_id)
-                )
-            ).order_by(Message.timestamp.desc()).first()
-
-            main_img = next((img.url for img in sorted(other_user.profile.images, key=lambda x: x.position)), None)
-
-            age = None
-            if other_user.profile.birthdate:
-                age = datetime.now().year - other_user.profile.birthdate.year
-
-            results.append({
-                "match_id": m.id,
-                "user_id": other_user.id,
-                "full_name": other_user.profile.full_name,
-                "age": age,
-                "image": main_img,
-                "last_message": last_msg.content if last_msg else "No messages yet",
-                "created_at": m.created_at.isoformat() if m.created_at else None
-            })
-    
-    sorted_results = sorted(results, key=lambda x: x['created_at'] or "", reverse=True)
+    for s in swipes:
+        is_match = s.is_like and s.liked_id in matched_ids
+        if is_match:
+            matched_ids.discard(s.liked_id)
+        results.append({"liked_id": s.liked_id, "is_like": s.is_like, "is_match": is_match})
+    return results
 
-    try:
-        redis_client.setex(cache_key, 300, json.dumps(sorted_results))
-        logger.info("Match list cache miss - Data cached", extra={"user_id": user_id})
-    except Exception as e:
-        logger.warning(f"Failed to cache matches: {e}")
+def get_user_matches(db: Session, user_id: int):
+    return cache.get_or_compute(
+        f"matches:user:{user_id}",
+        lambda: _load_user_matches(db, user_id),
+        soft_ttl=MATCHES_SOFT_TTL,
+        hard_ttl=MATCHES_HARD_TTL
+    )
 
-    return sorted_results
+def _match_list_query(user_id: int):
+    """Select every match of the user, most recently active first.
+
+    Matches and conversations share the canonical (user1_id < user2_id) pair,
+    so the last message and unread badge come from one conversation row per match.
+    """
+    other_id = case((Match.user1_id == user_id, Match.user2_id), else_=Match.user1_id)
+    unread = case((Match.user1_id == user_id, Conversation.unread_count_user1), else_=Conversation.unread_count_user2)
+
+    main_image = (
+        select(ProfileImage.url)
+        .where(ProfileImage.profile_id == Profile.id)
+        .order_by(ProfileImage.position, ProfileImage.id)
+        .limit(1)
+        .scalar_subquery()
+    )
+
+    return (
+        select(Match.id, Match.created_at, Match.last_activity_at, Profile.user_id, Profile.full_name, Profile.birthdate,
+               main_image.label("image"), Conversation.last_message_preview, unread.label("unread_count"))
+        .join(Profile, Profile.user_id == other_id)
+        .outerjoin(Conversation, and_(Conversation.user1_id == Match.user1_id, Conversation.user2_id == Match.user2_id))
+        .where(or_(Match.user1_id == user_id, Match.user2_id == user_id))
+        .order_by(Match.last_activity_at.desc(), Match.id.desc())
+    )
+
+def _match_item(row):
+    return {
+        "match_id": row.id,
+        "user_id": row.user_id,
+        "full_name": row.full_name,
+        "age": calculate_age(row.birthdate) if row.birthdate else None,
+        "image": row.image,
+        "last_message": row.last_message_preview if row.last_message_preview is not None else "No messages yet",
+        "unread_count": row.unread_count or 0,
+        "created_at": row.created_at.isoformat() if row.created_at else None,
+        "last_activity_at": row.last_activity_at.isoformat()
+    }
+
+def _load_user_matches(db: Session, user_id: int):
+    """Load the whole match list in a single statement."""
+    return [_match_item(row) for row in db.execute(_match_list_query(user_id))]
+
+def encode_match_cursor(last_activity_at: str, match_id: int):
+    raw = json.dumps({"t": last_activity_at, "id": match_id}).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_match_cursor(cursor: str):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(data["t"]), int(data["id"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+def _load_match_page(db: Session, user_id: int, cursor: str, page_size: int):
+    query = _match_list_query(user_id)
+    if cursor:
+        last_activity_at, match_id = decode_match_cursor(cursor)
+        query = query.where(or_(
+            Match.last_activity_at < last_activity_at,
+            and_(Match.last_activity_at == last_activity_at, Match.id < match_id)
+        ))
+
+    rows = db.execute(query.limit(page_size + 1)).all()
+    items = [_match_item(row) for row in rows[:page_size]]
+    next_cursor = None
+    if len(rows) > page_size:
+        next_cursor = encode_match_cursor(items[-1]["last_activity_at"], items[-1]["match_id"])
+    return {"items": items, "next_cursor": next_cursor}
+
+def get_match_page(db: Session, user_id: int, cursor: str = None, page_size: int = settings.MATCHES_PAGE_SIZE):
+    """Keyset page of matches ordered by (last_activity_at, match_id), newest first.
+
+    Only the default-sized first page is cached; deeper pages are cheap index range scans.
+    """
+    if cursor is None and page_size == settings.MATCHES_PAGE_SIZE:
+        return cache.get_or_compute(
+            f"matches:page:{user_id}",
+            lambda: _load_match_page(db, user_id, None, page_size),
+            soft_ttl=MATCHES_SOFT_TTL,
+            hard_ttl=MATCHES_HARD_TTL
+        )
+    return _load_match_page(db, user_id, cursor, page_size)
 
 def block_user_and_cleanup(db: Session, blocker_id: int, blocked_id: int):
     # Delete chat
-    db.query(Message).filter(
-        or_(
-            and_(Message.sender_id == blocker_id, Message.receiver_id == blocked_id),
-            and_(Message.sender_id == blocked_id, Message.receiver_id == blocker_id)
-        )
-    ).delete(synchronize_session=False)
+    chat_crud.delete_conversation(db, blocker_id, blocked_id)
 
     # Delete Match
-    db.query(Match).filter(
-        or_(
-            and_(Match.user1_id == blocker_id, Match.user2_id == blocked_id),
-            and_(Match.user1_id == blocked_id, Match.user2_id == blocker_id)
-        )
-    ).delete(synchronize_session=False)
+    _delete_match(db, blocker_id, blocked_id)
 
     #Delete Swipe
     db.query(Swipe).filter(
@@ -379,42 +670,82 @@ def block_user_and_cleanup(db: Session, blocker_id: int, blocked_id: int):
     
     db.commit()
 
-    invalidate_match_cache(blocker_id)
-    invalidate_match_cache(blocked_id)
-    redis_client.delete(f"discovery:user:{blocker_id}")
-    redis_client.delete(f"discovery:user:{blocked_id}")
+    invalidate_match_cache(blocker_id, blocked_id)
+    likes.remove_pair(blocker_id, blocked_id)
+    recent_swipes.drop_target(blocker_id, blocked_id)
+    recent_swipes.drop_target(blocked_id, blocker_id)
+    unread.reset(blocker_id, blocked_id)
+    unread.reset(blocked_id, blocker_id)
+    discovery_deck.invalidate_deck(blocker_id)
+    discovery_deck.invalidate_deck(blocked_id)
     
     return True
 
-def undo_last_swipe(db: Session, user_id: int):
-    last_swipe = db.query(Swipe).filter(
-        Swipe.liker_id == user_id
-    ).order_by(Swipe.created_at.desc()).first()
+def _delete_match(db: Session, user_a: int, user_b: int):
+    """Delete the pair's match through the unique (user1_id, user2_id) index. Returns True if one existed."""
+    return db.execute(
+        delete(Match).where(Match.user1_id == min(user_a, user_b), Match.user2_id == max(user_a, user_b))
+    ).rowcount > 0
 
-    if not last_swipe:
+def _latest_stored_swipe(db: Session, user_id: int):
+    swipe = db.query(Swipe).filter(
+        Swipe.liker_id == user_id
+    ).order_by(Swipe.created_at.desc(), Swipe.id.desc()).first()
+    if not swipe:
         return None
-    
-    if last_swipe.is_like:
-        liked_id = last_swipe.liked_id
-        
-        db.query(Match).filter(
-            or_(
-                and_(Match.user1_id == user_id, Match.user2_id == liked_id),
-                and_(Match.user1_id == liked_id, Match.user2_id == user_id)
-            )
-        ).delete(synchronize_session=False)
-
-        db.query(Message).filter(
-            or_(
-                and_(Message.sender_id == user_id, Message.receiver_id == liked_id),
-                and_(Message.sender_id == liked_id, Message.receiver_id == user_id)
-            )
-        ).delete(synchronize_session=False)
-        
-    db.delete(last_swipe)
+    return {"swipe_id": swipe.id, "liked_id": swipe.liked_id, "is_like": swipe.is_like}
+
+def _delete_swipe(db: Session, user_id: int, entry: dict):
+    if entry.get("event_id"):
+        # Write-behind: stop the worker storing it, and delete the row if it already did
+        swipe_writer.tombstone(entry["event_id"])
+        swipe_writer.forget_pending([{"liker_id": user_id, "liked_id": entry["liked_id"]}])
+        db.execute(delete(Swipe).where(Swipe.event_id == entry["event_id"]))
+        return True
+    return db.execute(delete(Swipe).where(Swipe.id == entry["swipe_id"])).rowcount > 0
+
+def undo_swipes(db: Session, user_id: int, steps: int = 1):
+    """Undo up to `steps` of the user's latest swipes, newest first. Returns the undone entries.
+
+    Targets come from the recent-swipes list; once it is empty (or Redis is down) the
+    swipes table is read instead, so undo still works, one query per step.
+    """
+    undone = []
+    unmatched = []
+    while len(undone) < steps:
+        entry = recent_swipes.pop(user_id) or _latest_stored_swipe(db, user_id)
+        if entry is None:
+            break
+        if not _delete_swipe(db, user_id, entry):
+            # Already gone, e.g. deleted along with its account
+            continue
+
+        if entry["is_like"]:
+            if _delete_match(db, user_id, entry["liked_id"]):
+                unmatched.append(entry["liked_id"])
+            chat_crud.delete_conversation(db, user_id, entry["liked_id"])
+        undone.append(entry)
+
+    if not undone:
+        return undone
     db.commit()
-    
-    return last_swipe
+
+    for entry in undone:
+        if entry["is_like"]:
+            likes.remove_like(user_id, entry["liked_id"])
+            unread.reset(user_id, entry["liked_id"])
+            unread.reset(entry["liked_id"], user_id)
+    if unmatched:
+        invalidate_match_cache(user_id, *unmatched)
+
+    # The undone candidates are eligible again, so rebuild the deck on the next read
+    discovery_deck.invalidate_deck(user_id)
+
+    return undone
+
+def undo_last_swipe(db: Session, user_id: int):
+    undone = undo_swipes(db, user_id, steps=1)
+    return undone[0] if undone else None
 
 def create_password_reset_code(db: Session, email: str):
     user = db.query(User).filter(User.email == email).first()
@@ -458,13 +789,14 @@ def reset_password_with_token(db: Session, token: str, new_password: str):
 
 
 def invalidate_profile_cache(user_id: int):
-    try:
-        redis_client.delete(f"profile:user:{user_id}")
-    except Exception as e:
-        logger.warning(f"Failed to delete profile cache for user {user_id}: {e}")
+    cache.invalidate(f"profile:user:{user_id}")
 
-def invalidate_match_cache(user_id: int):
-    try:
-        redis_client.delete(f"matches:user:{user_id}")
-    except Exception as e:
-        logger.warning(f"Failed to delete match cache for user {user_id}: {e}")
+def invalidate_match_cache(*user_ids: int):
+    keys = [key for user_id in user_ids for key in (f"matches:user:{user_id}", f"matches:page:{user_id}")]
+    cache.invalidate(*keys)
+
+@events.subscribe(events.MESSAGE_CREATED)
+@events.subscribe(events.MESSAGES_READ)
+def refresh_matches_on_message(sender_id: int, receiver_id: int, **_):
+    # Match items carry the last message, unread badge and activity order of both sides
+    invalidate_match_cache(sender_id, receiver_id)
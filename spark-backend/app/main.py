@@ -2,15 +2,15 @@ import uvicorn
 from fastapi import FastAPI
 from app.core.config import settings
 from app.core.logger import logger
-from app.database import engine, Base
+from app.core import cache, events
 from app.api.v1 import auth, users, chat
+from app.api.v1.websocket_manager import manager
+from app.crud.message_writer import message_writer
 from fastapi.middleware.cors import CORSMiddleware
 import cloudinary
 from datetime import datetime
 from prometheus_fastapi_instrumentator import Instrumentator
 
-Base.metadata.create_all(bind=engine)
-
 description = """
 Spark Dating API helps people find their matches based on location and interests. 🚀
 
@@ -51,6 +51,37 @@ cloud_name = settings.CLOUDINARY_CLOUD_NAME,
   secure = True
 )
 
+@app.on_event("startup")
+def start_cache_listener():
+    cache.start_invalidation_listener()
+
+@app.on_event("shutdown")
+def stop_cache_listener():
+    cache.stop_invalidation_listener()
+
+@app.on_event("startup")
+async def start_websocket_broker():
+    await manager.start()
+
+@app.on_event("shutdown")
+async def stop_websocket_broker():
+    await manager.stop()
+
+@app.on_event("shutdown")
+def drain_events():
+    # Let queued deck updates finish before the worker exits
+    events.drain(timeout=5)
+
+@app.on_event("startup")
+async def start_message_writer():
+    if settings.CHAT_WRITE_BEHIND:
+        await message_writer.start()
+
+@app.on_event("shutdown")
+async def drain_message_writer():
+    # Store every queued chat message before the worker exits
+    await message_writer.stop()
+
 app.include_router(auth.router)
 app.include_router(users.router)
 app.include_router(chat.router)
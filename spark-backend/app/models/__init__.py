@@ -4,5 +4,8 @@ from app.models.swipe import Swipe
 from app.models.match import Match
 from app.models.location import UserLocation
 from app.models.chat import Message
+from app.models.block import Block
+from app.models.interest import InterestTag
+from app.models.conversation import Conversation
 
-__all__ = ["User", "Profile", "Swipe", "Match", "UserLocation", "ProfileImage", "Message", "PasswordReset"]
\ No newline at end of file
+__all__ = ["User", "Profile", "Swipe", "Match", "UserLocation", "ProfileImage", "Message", "Block", "PasswordReset", "InterestTag", "Conversation"]
\ No newline at end of file
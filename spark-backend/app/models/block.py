@@ -1,9 +1,13 @@
-from sqlalchemy import Column, Integer, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, Index
 from sqlalchemy.sql import func
 from app.database import Base
 
 class Block(Base):
     __tablename__ = "blocks"
+    __table_args__ = (
+        Index("ix_blocks_blocker_id_blocked_id", "blocker_id", "blocked_id"),
+        Index("ix_blocks_blocked_id_blocker_id", "blocked_id", "blocker_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     blocker_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
@@ -1,10 +1,15 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
 from datetime import datetime, timezone
+import uuid
 
 class Message(Base):
     __tablename__ = "messages"
+    __table_args__ = (
+        Index("ix_messages_sender_id_receiver_id_timestamp", "sender_id", "receiver_id", "timestamp"),
+        Index("uq_messages_uid", "uid", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     sender_id = Column(Integer, ForeignKey("users.id"))
@@ -12,6 +17,8 @@ class Message(Base):
     content = Column(String, nullable=False)
     timestamp = Column(DateTime, default=lambda: datetime.now(timezone.utc))
     is_read = Column(Boolean, default=False)
+    # Assigned when the message is accepted, before it is stored; clients match acks by it
+    uid = Column(String, default=lambda: uuid.uuid4().hex)
 
     sender = relationship("User", foreign_keys=[sender_id])
     receiver = relationship("User", foreign_keys=[receiver_id])
\ No newline at end of file
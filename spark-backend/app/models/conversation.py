@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, UniqueConstraint
+from app.database import Base
+
+class Conversation(Base):
+    __tablename__ = "conversations"
+    __table_args__ = (
+        UniqueConstraint("user1_id", "user2_id", name="uq_conversations_user_pair"),
+    )
+
+    # One row per user pair, stored with user1_id < user2_id
+    id = Column(Integer, primary_key=True, index=True)
+    user1_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    user2_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    last_message_id = Column(Integer, ForeignKey("messages.id", ondelete="SET NULL"))
+    last_message_preview = Column(String)
+    last_message_at = Column(DateTime)
+    unread_count_user1 = Column(Integer, default=0, nullable=False)
+    unread_count_user2 = Column(Integer, default=0, nullable=False)
@@ -0,0 +1,8 @@
+from sqlalchemy import Column, Integer, String
+from app.database import Base
+
+class InterestTag(Base):
+    __tablename__ = "interest_tags"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, unique=True, nullable=False)
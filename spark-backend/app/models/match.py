@@ -1,11 +1,20 @@
-from sqlalchemy import Column, Integer, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, Index
 from sqlalchemy.sql import func
 from app.database import Base
+from datetime import datetime, timezone
 
 class Match(Base):
     __tablename__ = "matches"
+    __table_args__ = (
+        # Pairs are stored as (min, max), so this also stops concurrent mutual likes from matching twice
+        Index("uq_matches_user1_id_user2_id", "user1_id", "user2_id", unique=True),
+        Index("ix_matches_user1_id_last_activity_at_id", "user1_id", "last_activity_at", "id"),
+        Index("ix_matches_user2_id_last_activity_at_id", "user2_id", "last_activity_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user1_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     user2_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
\ No newline at end of file
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Bumped on every message so the match list can be ordered by recent activity
+    last_activity_at = Column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
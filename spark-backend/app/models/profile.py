@@ -1,10 +1,13 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, Date
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, Date, LargeBinary
 from sqlalchemy.orm import relationship
 from app.database import Base
-from sqlalchemy import JSON
+from sqlalchemy import JSON, Index
 
 class Profile(Base):
     __tablename__ = "profiles"
+    __table_args__ = (
+        Index("ix_profiles_gender_birthdate", "gender", "birthdate"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), unique=True, nullable=False)
@@ -17,12 +20,16 @@ class Profile(Base):
     age_min = Column(Integer, default=18)
     age_max = Column(Integer, default=100)
     interests_tags = Column(JSON, default=[])
+    interests_mask = Column(LargeBinary)
 
     user = relationship("User", back_populates="profile")
     images = relationship("ProfileImage", back_populates="profile", cascade="all, delete-orphan")
 
 class ProfileImage(Base):
     __tablename__ = "profile_images"
+    __table_args__ = (
+        Index("ix_profile_images_profile_id_position", "profile_id", "position"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     profile_id = Column(Integer, ForeignKey("profiles.id", ondelete="CASCADE"))
@@ -1,12 +1,20 @@
-from sqlalchemy import Column, Integer, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Index
 from sqlalchemy.sql import func
 from app.database import Base
 
 class Swipe(Base):
     __tablename__ = "swipes"
+    __table_args__ = (
+        Index("ix_swipes_liker_id_liked_id", "liker_id", "liked_id"),
+        Index("ix_swipes_liked_id_liker_id", "liked_id", "liker_id"),
+        Index("ix_swipes_liker_id_created_at", "liker_id", "created_at"),
+        Index("uq_swipes_event_id", "event_id", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     liker_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     liked_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     is_like = Column(Boolean, nullable=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
\ No newline at end of file
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Set for swipes that went through the write-behind stream, so redelivered events are ignored
+    event_id = Column(String)
@@ -19,6 +19,6 @@ class PasswordReset(Base):
     __tablename__ = "password_resets"
     id = Column(Integer, primary_key=True, index=True)
     email = Column(String, index=True)
-    token = Column(String)
+    token = Column(String, unique=True, index=True)
     expires_at = Column(DateTime)
 
@@ -44,6 +44,17 @@ class SwipeCreate(BaseModel):
     liked_id: int
     is_like: bool
 
+class SwipeBatchCreate(BaseModel):
+    swipes: List[SwipeCreate] = Field(..., min_length=1, max_length=100)
+
+class SwipeResult(BaseModel):
+    liked_id: int
+    is_like: bool
+    is_match: bool
+
+class SwipeBatchResponse(BaseModel):
+    results: List[SwipeResult]
+
 class DiscoveryImageResponse(BaseModel):
     url: str
     position: int
@@ -62,6 +73,14 @@ class DiscoveryUserResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class DiscoveryPageResponse(BaseModel):
+    items: List[DiscoveryUserResponse]
+    next_cursor: Optional[str] = None
+
+class MatchPageResponse(BaseModel):
+    items: List[dict]
+    next_cursor: Optional[str] = None
+
 class ForgotPasswordRequest(BaseModel):
     email: EmailStr
 
@@ -0,0 +1,5 @@
+"""Load benchmarks for discovery, matches and swiping.
+
+Run with ``python -m benchmarks --users 10000`` from the spark-backend directory,
+and the chat WebSocket load test with ``python -m benchmarks.chat_sockets --sockets 1000``.
+"""
@@ -0,0 +1,134 @@
+import argparse
+import json
+import logging
+import os
+import random
+import statistics
+import tempfile
+import time
+from contextlib import contextmanager
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from app.database import Base
+from app.core import cache
+from app.core.logger import logger
+from app.crud import user as user_crud
+from app.crud import discovery_deck
+from app.schemas.user import SwipeCreate
+from benchmarks.population import seed_population
+
+class QueryCounter:
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args):
+        self.count += 1
+
+    @contextmanager
+    def measure(self, samples: list, queries: list):
+        before = self.count
+        start = time.perf_counter()
+        yield
+        samples.append((time.perf_counter() - start) * 1000)
+        queries.append(self.count - before)
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+def summarize(samples: list, queries: list):
+    if not samples:
+        return {}
+    return {
+        "runs": len(samples),
+        "p50_ms": round(_percentile(samples, 50), 3),
+        "p95_ms": round(_percentile(samples, 95), 3),
+        "p99_ms": round(_percentile(samples, 99), 3),
+        "mean_ms": round(statistics.fmean(samples), 3),
+        "mean_queries": round(statistics.fmean(queries), 2),
+        "max_queries": max(queries),
+    }
+
+def _clear_caches(user_id: int):
+    discovery_deck.invalidate_deck(user_id)
+    user_crud.invalidate_match_cache(user_id)
+    cache.local_cache.clear()
+
+def run(db_url: str, users: int, samples: int, swipes: int, seed: int, skip_seed: bool = False):
+    engine = create_engine(db_url)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    counter = QueryCounter(engine)
+    rng = random.Random(seed)
+
+    report = {"db_url": engine.url.render_as_string(hide_password=True), "users": users}
+
+    with Session() as db:
+        if not skip_seed:
+            start = time.perf_counter()
+            user_ids = seed_population(db, users, seed=seed)
+            report["seed_seconds"] = round(time.perf_counter() - start, 2)
+        else:
+            from app.models.user import User
+            user_ids = [uid for (uid,) in db.query(User.id).all()]
+
+        sample_ids = rng.sample(user_ids, min(samples, len(user_ids)))
+        timings = {name: ([], []) for name in (
+            "discovery_cold", "discovery_warm", "discovery_page_warm", "matches_cold", "matches_warm", "swipe"
+        )}
+
+        for uid in sample_ids:
+            _clear_caches(uid)
+            with counter.measure(*timings["discovery_cold"]):
+                user_crud.get_discovery_users(db, uid)
+            with counter.measure(*timings["discovery_warm"]):
+                user_crud.get_discovery_users(db, uid)
+            with counter.measure(*timings["discovery_page_warm"]):
+                user_crud.get_discovery_page(db, uid, page_size=20)
+            with counter.measure(*timings["matches_cold"]):
+                user_crud.get_user_matches(db, uid)
+            with counter.measure(*timings["matches_warm"]):
+                user_crud.get_user_matches(db, uid)
+
+        swipers = rng.sample(user_ids, min(swipes, len(user_ids)))
+        start = time.perf_counter()
+        for uid in swipers:
+            target = rng.choice(user_ids)
+            if target == uid:
+                continue
+            with counter.measure(*timings["swipe"]):
+                user_crud.create_swipe(db, uid, SwipeCreate(liked_id=target, is_like=rng.random() < 0.5))
+        elapsed = time.perf_counter() - start
+
+    report["results"] = {name: summarize(*values) for name, values in timings.items()}
+    report["results"]["swipe"]["throughput_per_s"] = round(len(timings["swipe"][0]) / elapsed, 1) if elapsed else None
+    report["cache"] = cache.cache_stats()
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark discovery, match listing and swipes on a synthetic population.")
+    parser.add_argument("--users", type=int, default=10000, help="Population size, e.g. 10000, 100000, 1000000")
+    parser.add_argument("--db-url", default=None, help="Target database (defaults to a fresh SQLite file)")
+    parser.add_argument("--samples", type=int, default=200, help="Users sampled for discovery/match timings")
+    parser.add_argument("--swipes", type=int, default=1000, help="Swipes issued for the throughput run")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--skip-seed", action="store_true", help="Reuse an already seeded database")
+    parser.add_argument("--output", default=None, help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    # Keep per-request info logs out of the JSON report
+    logger.setLevel(logging.WARNING)
+
+    db_url = args.db_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'spark_bench.db')}"
+    report = run(db_url, args.users, args.samples, args.swipes, args.seed, skip_seed=args.skip_seed)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    print(output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""Chat load test: many concurrent WebSockets against a real uvicorn server and a local database.
+
+Run with ``python -m benchmarks.chat_sockets --sockets 1000`` from the spark-backend directory.
+Redis must be reachable at REDIS_URL, as for the app itself.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import socket
+import tempfile
+import threading
+import time
+import httpx
+import uvicorn
+import websockets
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.database import Base
+from app.main import app
+from app.api.v1.deps import get_db_websocket
+from app.core.logger import logger
+from benchmarks.__main__ import _percentile
+from benchmarks.population import seed_population
+
+HEALTH_PROBE_INTERVAL = 0.05
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def _raise_open_file_limit(needed: int):
+    # Client and server ends both live in this process
+    try:
+        import resource
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        if soft < needed:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (min(needed, hard), hard))
+    except (ImportError, ValueError, OSError) as e:
+        logger.warning(f"Could not raise the open file limit: {e}")
+
+def _latency_summary(samples: list):
+    if not samples:
+        return {}
+    return {
+        "count": len(samples),
+        "p50_ms": round(_percentile(samples, 50), 3),
+        "p95_ms": round(_percentile(samples, 95), 3),
+        "p99_ms": round(_percentile(samples, 99), 3),
+        "max_ms": round(max(samples), 3),
+    }
+
+class ServerThread:
+    """uvicorn serving the app on its own event loop, like a single worker."""
+
+    def __init__(self, port: int):
+        config = uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", backlog=4096)
+        self.server = uvicorn.Server(config)
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        while not self.server.started:
+            time.sleep(0.05)
+        return self
+
+    def __exit__(self, *exc):
+        self.server.should_exit = True
+        self.thread.join()
+
+async def _client(url: str, user_id: int, partner_id: int, messages: int, latencies: list, ready: asyncio.Barrier):
+    async with websockets.connect(f"{url}/chat/ws/{user_id}", open_timeout=60, max_queue=None) as ws:
+        await ready.wait()
+        for _ in range(messages):
+            await ws.send(json.dumps({"receiver_id": partner_id, "content": str(time.perf_counter())}))
+        for _ in range(messages):
+            received = json.loads(await ws.recv())
+            latencies.append((time.perf_counter() - float(received["content"])) * 1000)
+
+async def _probe_health(url: str, samples: list, done: asyncio.Event):
+    # Answered by the same event loop, so a blocking DB call shows up here as a stall
+    async with httpx.AsyncClient(base_url=url) as http:
+        while not done.is_set():
+            start = time.perf_counter()
+            await http.get("/health")
+            samples.append((time.perf_counter() - start) * 1000)
+            await asyncio.sleep(HEALTH_PROBE_INTERVAL)
+
+async def _drive(port: int, user_ids: list, messages: int):
+    url = f"ws://127.0.0.1:{port}"
+    latencies, health = [], []
+    ready = asyncio.Barrier(len(user_ids))
+    done = asyncio.Event()
+    probe = asyncio.create_task(_probe_health(f"http://127.0.0.1:{port}", health, done))
+
+    # Sockets are paired up and each side sends `messages` to the other
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        _client(url, uid, user_ids[i ^ 1], messages, latencies, ready) for i, uid in enumerate(user_ids)
+    ))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await probe
+
+    return {
+        "seconds": round(elapsed, 2),
+        "messages": len(latencies),
+        "throughput_per_s": round(len(latencies) / elapsed, 1) if elapsed else None,
+        "delivery_latency": _latency_summary(latencies),
+        "health_latency": _latency_summary(health),
+    }
+
+def run(db_url: str, sockets: int, messages: int, seed: int = 1):
+    sockets -= sockets % 2
+    engine = create_engine(db_url)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    with Session() as db:
+        user_ids = seed_population(db, sockets, swipes_per_user=0, seed=seed)
+
+    def override_get_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    _raise_open_file_limit(4 * sockets + 256)
+    app.dependency_overrides[get_db_websocket] = override_get_db
+    try:
+        with ServerThread(_free_port()) as server:
+            report = asyncio.run(_drive(server.server.config.port, user_ids, messages))
+    finally:
+        app.dependency_overrides.pop(get_db_websocket, None)
+        engine.dispose()
+
+    report.update({"db_url": engine.url.render_as_string(hide_password=True), "sockets": sockets, "messages_per_socket": messages})
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Open many chat WebSockets at once and measure delivery latency.")
+    parser.add_argument("--sockets", type=int, default=1000, help="Concurrent sockets, paired into conversations")
+    parser.add_argument("--messages", type=int, default=5, help="Messages each socket sends")
+    parser.add_argument("--db-url", default=None, help="Target database (defaults to a fresh SQLite file)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", default=None, help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    logger.setLevel(logging.WARNING)
+
+    db_url = args.db_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'spark_chat_bench.db')}"
+    report = run(db_url, args.sockets, args.messages, args.seed)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    print(output)
+
+if __name__ == "__main__":
+    main()
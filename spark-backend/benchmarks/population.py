@@ -0,0 +1,132 @@
+import random
+from datetime import date, datetime, timedelta, timezone
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from app.core.geo import encode_geohash
+from app.crud import chat as chat_crud
+from app.crud import interest as interest_crud
+from app.models.block import Block
+from app.models.chat import Message
+from app.models.location import UserLocation
+from app.models.match import Match
+from app.models.profile import Profile
+from app.models.swipe import Swipe
+from app.models.user import User
+
+TAGS = ["Gaming", "Pizza", "Hiking", "Cooking", "Travel", "Music", "Gym", "Art", "Coffee",
+        "Movies", "Photography", "Coding", "Yoga", "Wine", "Dancing", "Nature", "Reading", "Sports"]
+
+# (latitude, longitude, spread in degrees, relative weight)
+CITIES = [
+    (47.4979, 19.0402, 0.15, 5),   # Budapest
+    (48.2082, 16.3738, 0.12, 3),   # Vienna
+    (48.1486, 17.1077, 0.08, 1),   # Bratislava
+    (50.0755, 14.4378, 0.12, 3),   # Prague
+    (52.5200, 13.4050, 0.20, 6),   # Berlin
+    (46.2530, 20.1414, 0.05, 1),   # Szeged
+    (47.5316, 21.6273, 0.05, 1),   # Debrecen
+]
+
+CHUNK_SIZE = 5000
+
+def _chunks(rows, size: int = CHUNK_SIZE):
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+def _bulk_insert(db: Session, model, rows):
+    for chunk in _chunks(rows):
+        db.execute(insert(model), chunk)
+    db.commit()
+
+def seed_population(
+    db: Session,
+    users: int,
+    swipes_per_user: int = 40,
+    match_rate: float = 0.15,
+    block_rate: float = 0.01,
+    messages_per_match: int = 6,
+    seed: int = 1,
+):
+    """Insert a synthetic population and return the created user ids.
+
+    Users cluster around a handful of cities, ages spread between 18 and 60 and
+    each profile carries a few interest tags. Swipes target users from the same
+    city; a share of likes is reciprocated into matches with short conversations.
+    """
+    rng = random.Random(seed)
+    today = date.today()
+    tag_ids = {name: interest_crud.intern_tags(db, [name])[0] for name in TAGS}
+
+    first_id = (db.query(User.id).order_by(User.id.desc()).limit(1).scalar() or 0) + 1
+    user_ids = list(range(first_id, first_id + users))
+    weights = [c[3] for c in CITIES]
+    city_of = {uid: rng.choices(range(len(CITIES)), weights=weights)[0] for uid in user_ids}
+
+    user_rows, profile_rows, location_rows = [], [], []
+    for uid in user_ids:
+        lat, lon, spread, _ = CITIES[city_of[uid]]
+        gender = rng.choice(["male", "female"])
+        tags = rng.sample(TAGS, rng.randint(0, 6))
+        latitude, longitude = rng.gauss(lat, spread), rng.gauss(lon, spread)
+
+        user_rows.append({"id": uid, "email": f"bench{uid}@spark.test", "password": "x", "is_active": True})
+        profile_rows.append({
+            "user_id": uid,
+            "full_name": f"Bench User {uid}",
+            "bio": "Synthetic benchmark profile",
+            "birthdate": today - timedelta(days=rng.randint(18 * 365 + 5, 60 * 365)),
+            "gender": gender,
+            "interests": "female" if gender == "male" else "male",
+            "age_min": 18,
+            "age_max": rng.choice([35, 45, 100]),
+            "interests_tags": tags,
+            "interests_mask": interest_crud.encode_mask(interest_crud.mask_from_ids(tag_ids[t] for t in tags)),
+        })
+        location_rows.append({
+            "user_id": uid, "latitude": latitude, "longitude": longitude,
+            "geohash": encode_geohash(latitude, longitude),
+        })
+
+    _bulk_insert(db, User, user_rows)
+    _bulk_insert(db, Profile, profile_rows)
+    _bulk_insert(db, UserLocation, location_rows)
+
+    by_city = {}
+    for uid, city in city_of.items():
+        by_city.setdefault(city, []).append(uid)
+
+    now = datetime.now(timezone.utc)
+    swipe_rows, match_rows, message_rows, block_rows = [], [], [], []
+    for uid in user_ids:
+        neighbours = by_city[city_of[uid]]
+        targets = rng.sample(neighbours, min(swipes_per_user, len(neighbours)))
+        for target in targets:
+            if target == uid:
+                continue
+            is_like = rng.random() < 0.5
+            swipe_rows.append({"liker_id": uid, "liked_id": target, "is_like": is_like,
+                               "created_at": now - timedelta(minutes=rng.randint(0, 60 * 24 * 30))})
+
+            if is_like and uid < target and rng.random() < match_rate:
+                swipe_rows.append({"liker_id": target, "liked_id": uid, "is_like": True, "created_at": now})
+                match_rows.append({"user1_id": uid, "user2_id": target, "created_at": now})
+                for i in range(rng.randint(0, messages_per_match)):
+                    sender, receiver = (uid, target) if i % 2 == 0 else (target, uid)
+                    message_rows.append({
+                        "sender_id": sender, "receiver_id": receiver, "content": f"Message {i}",
+                        "timestamp": now - timedelta(minutes=messages_per_match - i), "is_read": i < 2,
+                    })
+            elif rng.random() < block_rate:
+                block_rows.append({"blocker_id": uid, "blocked_id": target, "created_at": now})
+
+        if len(swipe_rows) >= CHUNK_SIZE * 4:
+            _bulk_insert(db, Swipe, swipe_rows)
+            swipe_rows = []
+
+    _bulk_insert(db, Swipe, swipe_rows)
+    _bulk_insert(db, Match, match_rows)
+    _bulk_insert(db, Message, message_rows)
+    _bulk_insert(db, Block, block_rows)
+    chat_crud.backfill_conversations(db)
+
+    return user_ids
@@ -0,0 +1,17 @@
+"""Rebuild the conversations summary table from existing messages.
+
+Usage: python -m scripts.backfill_conversations
+"""
+from app.database import SessionLocal
+from app.crud import chat as chat_crud
+
+def main():
+    db = SessionLocal()
+    try:
+        written = chat_crud.backfill_conversations(db)
+    finally:
+        db.close()
+    print(f"Backfilled {written} conversations")
+
+if __name__ == "__main__":
+    main()
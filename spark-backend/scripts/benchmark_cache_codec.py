@@ -0,0 +1,55 @@
+import json
+import random
+import time
+from app.core import cache_codec
+
+TAGS = ["Gaming", "Pizza", "Hiking", "Cooking", "Travel", "Music", "Gym", "Art", "Coffee",
+        "Movies", "Photography", "Coding", "Yoga", "Wine", "Dancing", "Nature", "Reading", "Sports"]
+
+def build_deck(size: int = 500, seed: int = 7):
+    rng = random.Random(seed)
+    return [
+        {
+            "id": 1000 + i,
+            "full_name": f"Candidate {i}",
+            "bio": "Coffee first, adventures second. " * rng.randint(1, 4),
+            "age": rng.randint(18, 60),
+            "distance": round(rng.uniform(0, 200), 1),
+            "images": [
+                {"id": i * 10 + p, "url": f"https://res.cloudinary.com/spark/image/upload/v1/spark/user_{i}/{p}.jpg", "position": p}
+                for p in range(rng.randint(1, 4))
+            ],
+            "interests": rng.sample(TAGS, rng.randint(0, 6)),
+            "common_interests_count": rng.randint(0, 3),
+        }
+        for i in range(size)
+    ]
+
+def _time_per_call(fn, rounds: int):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    return (time.perf_counter() - start) / rounds * 1000
+
+def run(size: int = 500, rounds: int = 200):
+    deck = build_deck(size)
+    as_json = json.dumps(deck).encode()
+    as_codec = cache_codec.encode(deck)
+
+    return {
+        "candidates": size,
+        "json": {
+            "bytes": len(as_json),
+            "encode_ms": _time_per_call(lambda: json.dumps(deck).encode(), rounds),
+            "decode_ms": _time_per_call(lambda: json.loads(as_json), rounds),
+        },
+        "codec": {
+            "bytes": len(as_codec),
+            "compressed": bool(as_codec[1] & cache_codec.FLAG_ZLIB),
+            "encode_ms": _time_per_call(lambda: cache_codec.encode(deck), rounds),
+            "decode_ms": _time_per_call(lambda: cache_codec.decode(as_codec), rounds),
+        },
+    }
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2))
@@ -0,0 +1,17 @@
+"""Drain the write-behind swipe stream into the swipes table.
+
+Usage: python -m scripts.flush_swipes
+Run one or more of these whenever SWIPE_WRITE_BEHIND is enabled.
+"""
+from app.database import SessionLocal
+from app.core.swipe_stream import consumer_name
+from app.crud import swipe_writer
+
+def main():
+    try:
+        swipe_writer.run_worker(SessionLocal, consumer_name())
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,17 @@
+"""Repopulate the liked_by:{id} Redis sets from the swipes table.
+
+Usage: python -m scripts.rebuild_like_sets
+"""
+from app.database import SessionLocal
+from app.crud import likes
+
+def main():
+    db = SessionLocal()
+    try:
+        written = likes.rebuild_all(db)
+    finally:
+        db.close()
+    print(f"Rebuilt {written} like sets")
+
+if __name__ == "__main__":
+    main()
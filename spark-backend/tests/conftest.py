@@ -6,6 +6,14 @@ from fastapi.testclient import TestClient
 
 from app.main import app
 from app.database import Base, get_db
+from app.api.v1.deps import get_db_websocket
+from app.api.v1.websocket_manager import manager
+from app.crud import interest as interest_crud
+from app.crud import user as user_crud
+from app.core import cache
+from app.core.redis import redis_client
+from app.core.db_threads import db_limiter
+from tests.helpers import FakeBroker
 
 SQLALCHEMY_DATABASE_URL = "sqlite://"
 
@@ -19,6 +27,12 @@ TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engin
 @pytest.fixture(scope="function")
 def db():
     Base.metadata.create_all(bind=engine)
+    interest_crud.clear_tag_cache()
+    cache.local_cache.clear()
+    # Like sets and recent swipes are keyed by user id, and ids restart with every test database
+    for pattern in ("liked_by:*", "swipes:recent:*", "swipes:pending:*"):
+        for key in redis_client.scan_iter(match=pattern):
+            redis_client.delete(key)
     db = TestingSessionLocal()
     try:
         yield db
@@ -27,7 +41,7 @@ def db():
         Base.metadata.drop_all(bind=engine)
 
 @pytest.fixture(scope="function")
-def client(db):
+def client(db, monkeypatch):
     def override_get_db():
         try:
             yield db
@@ -35,6 +49,15 @@ def client(db):
             pass
     
     app.dependency_overrides[get_db] = override_get_db
-    with TestClient(app) as c:
-        yield c
-    app.dependency_overrides.clear()
\ No newline at end of file
+    app.dependency_overrides[get_db_websocket] = override_get_db
+    manager.broker = FakeBroker()
+    # Background tasks open their own sessions
+    monkeypatch.setattr(user_crud, "SessionLocal", TestingSessionLocal)
+    # Every socket shares the one StaticPool connection, so their offloaded DB calls must not overlap
+    tokens, db_limiter.total_tokens = db_limiter.total_tokens, 1
+    try:
+        with TestClient(app) as c:
+            yield c
+    finally:
+        db_limiter.total_tokens = tokens
+        app.dependency_overrides.clear()
\ No newline at end of file
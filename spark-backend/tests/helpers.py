@@ -0,0 +1,86 @@
+from datetime import date
+from app.core import events
+from app.crud import user as user_crud
+from app.models.profile import Profile
+from app.models.user import User
+from app.schemas.user import LocationUpdate
+
+def create_seeded_user(db, email, gender="female", latitude=47.49, longitude=19.04, interests_tags=None):
+    # Skips password hashing so tests can build larger populations quickly
+    user = User(email=email, password="not-a-real-hash")
+    db.add(user)
+    db.flush()
+    db.add(Profile(
+        user_id=user.id, full_name=email, birthdate=date(1995, 1, 1), gender=gender,
+        interests="male" if gender == "female" else "female", age_min=18, age_max=100,
+        interests_tags=interests_tags or []
+    ))
+    db.commit()
+    user_crud.update_user_location(db, user.id, LocationUpdate(latitude=latitude, longitude=longitude))
+    # Deck updates for the new location run in the background; let them land before the test goes on
+    events.drain()
+    return user
+
+class FakeSwipeStream:
+    """In-memory stand-in for RedisSwipeStream with the same pending/ack semantics."""
+
+    def __init__(self):
+        self.entries = []
+        self.pending = {}
+        self.dead = []
+        self._next_id = 0
+
+    def append(self, event):
+        self._next_id += 1
+        self.entries.append((str(self._next_id), event))
+        return str(self._next_id)
+
+    def read(self, consumer, count, block_ms=None):
+        redelivered = [(entry_id, event) for entry_id, (owner, event) in self.pending.items()][:count]
+        if redelivered:
+            return redelivered
+        batch, self.entries = self.entries[:count], self.entries[count:]
+        for entry_id, event in batch:
+            self.pending[entry_id] = (consumer, event)
+        return batch
+
+    def ack(self, entry_ids):
+        for entry_id in entry_ids:
+            self.pending.pop(entry_id, None)
+
+    def dead_letter(self, events):
+        self.dead.extend(events)
+
+    def backlog(self):
+        return len(self.entries) + len(self.pending)
+
+class FakeBrokerHub:
+    """Stands in for Redis: the channels every FakeBroker attached to it subscribed to."""
+
+    def __init__(self):
+        self.subscribers = {}
+
+class FakeBroker:
+    """In-process broker; publishing awaits the handlers of subscribed brokers directly."""
+
+    def __init__(self, hub=None):
+        self.hub = hub if hub is not None else FakeBrokerHub()
+        self.handler = None
+        self.published = []
+
+    async def start(self, handler):
+        self.handler = handler
+
+    async def stop(self):
+        self.handler = None
+
+    async def subscribe(self, channel):
+        self.hub.subscribers.setdefault(channel, set()).add(self)
+
+    async def unsubscribe(self, channel):
+        self.hub.subscribers.get(channel, set()).discard(self)
+
+    async def publish(self, channel, data):
+        self.published.append((channel, data))
+        for broker in list(self.hub.subscribers.get(channel, ())):
+            await broker.handler(channel, data)
@@ -1,7 +1,14 @@
 import pytest
 from fastapi.testclient import TestClient
 from datetime import date
+import asyncio
 import json
+from app.crud import chat as chat_crud
+from app.crud import unread
+from app.core.config import settings
+from app.crud.message_writer import message_writer
+from app.models.chat import Message
+from tests.conftest import TestingSessionLocal
 
 def get_token(client: TestClient, email: str):
     client.post(
@@ -57,6 +64,92 @@ class TestChatEndpoints:
                 assert received_data["sender_id"] == 1
                 assert received_data["content"] == "Hello via WebSocket!"
 
+    def test_websocket_reaches_every_open_socket(self, client: TestClient):
+        get_token(client, "multi_sender@ws.com")
+        get_token(client, "multi_receiver@ws.com")
+
+        with client.websocket_connect("/chat/ws/1") as ws1:
+            with client.websocket_connect("/chat/ws/2") as phone, client.websocket_connect("/chat/ws/2") as browser:
+                ws1.send_text(json.dumps({"receiver_id": 2, "content": "Both?"}))
+
+                assert phone.receive_json()["content"] == "Both?"
+                assert browser.receive_json()["content"] == "Both?"
+
+    def test_websocket_stores_messages_off_the_event_loop(self, client: TestClient, monkeypatch):
+        get_token(client, "offload_sender@ws.com")
+        get_token(client, "offload_receiver@ws.com")
+        create_message = chat_crud.create_message
+        loop_running = []
+
+        def recording_create_message(*args, **kwargs):
+            try:
+                asyncio.get_running_loop()
+                loop_running.append(True)
+            except RuntimeError:
+                loop_running.append(False)
+            return create_message(*args, **kwargs)
+
+        monkeypatch.setattr(chat_crud, "create_message", recording_create_message)
+
+        with client.websocket_connect("/chat/ws/1") as ws1:
+            with client.websocket_connect("/chat/ws/2") as ws2:
+                ws1.send_text(json.dumps({"receiver_id": 2, "content": "Threaded"}))
+                assert ws2.receive_json()["content"] == "Threaded"
+
+        assert loop_running == [False]
+
+    def test_write_behind_delivers_first_and_acks_after_commit(self, client: TestClient, db, monkeypatch):
+        get_token(client, "wb_sender@ws.com")
+        get_token(client, "wb_receiver@ws.com")
+        monkeypatch.setattr(settings, "CHAT_WRITE_BEHIND", True)
+        monkeypatch.setattr(message_writer, "session_factory", TestingSessionLocal)
+        monkeypatch.setattr(message_writer, "interval_ms", 200)
+        batches = []
+        create_messages_batch = chat_crud.create_messages_batch
+        monkeypatch.setattr(chat_crud, "create_messages_batch", lambda db, messages: batches.append(len(messages)) or create_messages_batch(db, messages))
+        client.portal.call(message_writer.start)
+
+        try:
+            with client.websocket_connect("/chat/ws/1") as ws1:
+                with client.websocket_connect("/chat/ws/2") as ws2:
+                    for text in ("Queued", "Right behind"):
+                        ws1.send_text(json.dumps({"receiver_id": 2, "content": text}))
+
+                    received = [ws2.receive_json() for _ in range(2)]
+                    acks = [ws1.receive_json() for _ in range(2)]
+        finally:
+            client.portal.call(message_writer.stop)
+
+        assert [m["content"] for m in received] == ["Queued", "Right behind"]
+        # The sender kept sending while the first ack was pending, so both share one commit
+        assert batches == [2]
+        uids = [m["message_uid"] for m in received]
+        assert sorted(acks, key=lambda ack: uids.index(ack["message_uid"])) == [
+            {"type": "message_stored", "message_uid": uid} for uid in uids
+        ]
+        assert db.query(Message).filter(Message.uid.in_(uids)).count() == 2
+
     def test_websocket_disconnect(self, client: TestClient):
         with client.websocket_connect("/chat/ws/10") as ws:
-            pass
\ No newline at end of file
+            pass
+
+    def test_unread_counts_follow_messages_and_mark_read(self, client: TestClient):
+        get_token(client, "unread_sender@ws.com")
+        token = get_token(client, "unread_receiver@ws.com")
+        headers = {"Authorization": f"Bearer {token}"}
+        unread.invalidate(2)
+
+        assert client.get("/chat/unread", headers=headers).json() == {"total": 0, "by_sender": {}}
+
+        with client.websocket_connect("/chat/ws/1") as ws1:
+            with client.websocket_connect("/chat/ws/2") as ws2:
+                for text in ("Hi", "Still there?"):
+                    ws1.send_text(json.dumps({"receiver_id": 2, "content": text}))
+                    ws2.receive_json()
+
+        response = client.get("/chat/unread", headers=headers)
+        assert response.status_code == 200
+        assert response.json() == {"total": 2, "by_sender": {"1": 2}}
+
+        client.post("/chat/mark-read/1", headers=headers)
+        assert client.get("/chat/unread", headers=headers).json() == {"total": 0, "by_sender": {}}
@@ -53,6 +53,30 @@ class TestUserEndpoints:
         assert response.status_code == 200
         assert isinstance(response.json(), list)
 
+    def test_discovery_page_flow(self, client: TestClient):
+        token = get_auth_token(client, "disco_page@test.com")
+        headers = {"Authorization": f"Bearer {token}"}
+        client.post("/users/me/location", json={"latitude": 47.49, "longitude": 19.04}, headers=headers)
+
+        response = client.get("/users/discovery/page?limit=5", headers=headers)
+        assert response.status_code == 200
+        assert response.json()["items"] == []
+        assert response.json()["next_cursor"] is None
+
+        assert client.get("/users/discovery/page?cursor=garbage", headers=headers).status_code == 400
+        assert client.get("/users/discovery/page?limit=0", headers=headers).status_code == 422
+
+    def test_match_page_endpoint(self, client: TestClient):
+        token = get_auth_token(client, "match_page@test.com")
+        headers = {"Authorization": f"Bearer {token}"}
+
+        response = client.get("/users/matches/page?limit=5", headers=headers)
+        assert response.status_code == 200
+        assert response.json() == {"items": [], "next_cursor": None}
+
+        assert client.get("/users/matches/page?cursor=garbage", headers=headers).status_code == 400
+        assert client.get("/users/matches/page?limit=500", headers=headers).status_code == 422
+
     def test_get_other_user_profile_not_found(self, client: TestClient):
         token = get_auth_token(client, "other_not_found@test.com")
         response = client.get("/users/9999/profile", headers={"Authorization": f"Bearer {token}"})
@@ -67,6 +91,34 @@ class TestUserEndpoints:
         response = client.post("/users/swipe", json={"liked_id": 2, "is_like": True}, headers={"Authorization": f"Bearer {token}"})
         assert response.status_code == 200
 
+    def test_swipe_refills_the_deck_in_its_own_session(self, client: TestClient):
+        token = get_auth_token(client, "refill_swiper@test.com")
+        with patch("app.api.v1.users.discovery_deck.needs_refill", return_value=True), \
+                patch("app.api.v1.users.user_crud.refill_discovery_deck") as refill:
+            response = client.post("/users/swipe", json={"liked_id": 2, "is_like": False}, headers={"Authorization": f"Bearer {token}"})
+
+        assert response.status_code == 200
+        refill.assert_called_once_with(1)
+
+    def test_swipe_batch_endpoint(self, client: TestClient):
+        token = get_auth_token(client, "batch_swiper@test.com")
+        target_token = get_auth_token(client, "batch_target@test.com")
+        get_auth_token(client, "batch_skipped@test.com")
+        client.post("/users/swipe", json={"liked_id": 1, "is_like": True}, headers={"Authorization": f"Bearer {target_token}"})
+
+        response = client.post("/users/swipes/batch", json={"swipes": [
+            {"liked_id": 2, "is_like": True},
+            {"liked_id": 3, "is_like": False}
+        ]}, headers={"Authorization": f"Bearer {token}"})
+        assert response.status_code == 200
+        assert response.json()["results"] == [
+            {"liked_id": 2, "is_like": True, "is_match": True},
+            {"liked_id": 3, "is_like": False, "is_match": False}
+        ]
+
+        empty = client.post("/users/swipes/batch", json={"swipes": []}, headers={"Authorization": f"Bearer {token}"})
+        assert empty.status_code == 422
+
     def test_block_user_and_self_block_error(self, client: TestClient):
         token = get_auth_token(client, "block_test@test.com")
         response_self = client.post("/users/1/block", headers={"Authorization": f"Bearer {token}"})
@@ -84,6 +136,9 @@ class TestUserEndpoints:
         response = client.post("/users/swipe/undo", headers={"Authorization": f"Bearer {token}"})
         assert response.status_code == 404
 
+        too_deep = client.post(f"/users/swipe/undo?steps={settings.SWIPE_UNDO_DEPTH + 1}", headers={"Authorization": f"Bearer {token}"})
+        assert too_deep.status_code == 422
+
     def test_get_current_user_invalid_token_scenarios(self, client: TestClient):
         res1 = client.get("/users/me/profile", headers={"Authorization": "NotBearer token"})
         assert res1.status_code == 401
@@ -0,0 +1,32 @@
+from benchmarks.__main__ import summarize
+from benchmarks import chat_sockets
+from benchmarks.population import seed_population
+from app.models.user import User
+from app.models.swipe import Swipe
+from app.models.location import UserLocation
+
+
+class TestBenchmarkPopulation:
+
+    def test_seed_population_builds_a_consistent_dataset(self, db):
+        user_ids = seed_population(db, 60, swipes_per_user=10, seed=3)
+
+        assert len(user_ids) == 60
+        assert db.query(User).count() == 60
+        assert db.query(UserLocation).filter(UserLocation.geohash.isnot(None)).count() == 60
+        assert db.query(Swipe).filter(Swipe.liker_id == Swipe.liked_id).count() == 0
+
+        more = seed_population(db, 5, seed=4)
+        assert more[0] == user_ids[-1] + 1
+
+    def test_summarize_reports_percentiles(self):
+        report = summarize([float(i) for i in range(1, 101)], [1] * 100)
+        assert (report["p50_ms"], report["p95_ms"], report["p99_ms"]) == (50.0, 95.0, 99.0)
+        assert report["mean_queries"] == 1
+
+    def test_chat_socket_load_delivers_every_message(self, tmp_path):
+        report = chat_sockets.run(f"sqlite:///{tmp_path / 'chat_bench.db'}", sockets=8, messages=3)
+
+        assert report["sockets"] == 8
+        assert report["messages"] == 24
+        assert report["delivery_latency"]["count"] == 24
@@ -0,0 +1,132 @@
+import json
+import pytest
+import threading
+import time
+from app.core import cache, cache_codec
+from app.core.redis import redis_client, redis_binary
+
+
+class TestCacheHelper:
+
+    def setup_method(self):
+        redis_client.delete("test:cache", "lock:test:cache")
+        cache.local_cache.clear()
+
+    def test_fresh_entry_is_not_recomputed(self):
+        calls = []
+        compute = lambda: calls.append(1) or {"n": len(calls)}
+
+        assert cache.get_or_compute("test:cache", compute, soft_ttl=60, hard_ttl=120) == {"n": 1}
+        assert cache.get_or_compute("test:cache", compute, soft_ttl=60, hard_ttl=120) == {"n": 1}
+        assert len(calls) == 1
+        assert 120 <= redis_client.ttl("test:cache") <= 132
+
+    def test_stale_entry_is_served_while_another_worker_refreshes(self):
+        redis_client.set("test:cache", json.dumps({"value": "old", "fresh_until": time.time() - 1}))
+        redis_client.set("lock:test:cache", "other-worker")
+
+        assert cache.get_or_compute("test:cache", lambda: "new", soft_ttl=60, hard_ttl=120) == "old"
+
+        redis_client.delete("lock:test:cache")
+        assert cache.get_or_compute("test:cache", lambda: "new", soft_ttl=60, hard_ttl=120) == "new"
+
+    def test_legacy_bare_value_is_treated_as_a_miss(self):
+        # matches:user:{id} used to hold the match list itself
+        redis_client.set("test:cache", json.dumps([{"id": 1}]))
+
+        assert cache.get_or_compute("test:cache", lambda: [{"id": 2}], soft_ttl=60, hard_ttl=120) == [{"id": 2}]
+        assert cache_codec.decode(redis_binary.get("test:cache"))["value"] == [{"id": 2}]
+
+    def test_concurrent_cold_misses_compute_once(self):
+        calls = []
+
+        def slow_compute():
+            calls.append(1)
+            time.sleep(0.3)
+            return [1, 2, 3]
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(cache.get_or_compute("test:cache", slow_compute, 60, 120)))
+            for _ in range(5)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert results == [[1, 2, 3]] * 5
+        assert len(calls) == 1
+
+    def test_lock_is_released_only_by_its_owner(self):
+        with cache.single_flight("test:cache") as leader:
+            assert leader
+            with cache.single_flight("test:cache") as follower:
+                assert not follower
+            assert redis_client.exists("lock:test:cache")
+        assert not redis_client.exists("lock:test:cache")
+
+    def test_l1_serves_repeat_reads_without_redis(self):
+        cache.get_or_compute("test:cache", lambda: "value", soft_ttl=60, hard_ttl=120)
+        before = cache.cache_stats()
+
+        redis_client.delete("test:cache")
+        assert cache.get_or_compute("test:cache", lambda: "recomputed", soft_ttl=60, hard_ttl=120) == "value"
+
+        after = cache.cache_stats()
+        assert after["l1_hit"] == before["l1_hit"] + 1
+        assert after["l2_hit"] == before["l2_hit"]
+
+    def test_local_cache_is_bounded_and_expires(self):
+        local = cache.LocalCache(max_entries=2, ttl=0.1)
+        local.set("a", 1)
+        local.set("b", 2)
+        local.get("a")
+        local.set("c", 3)
+        assert local.get("b") is None
+        assert local.get("a") == 1
+
+        time.sleep(0.15)
+        assert local.get("c") is None
+
+    def test_invalidation_from_another_worker_evicts_l1(self):
+        cache.get_or_compute("test:cache", lambda: "value", soft_ttl=60, hard_ttl=120)
+        cache.start_invalidation_listener()
+        try:
+            time.sleep(0.2)
+            redis_client.publish(cache.INVALIDATION_CHANNEL, json.dumps(["test:cache"]))
+            deadline = time.monotonic() + 3
+            while cache.local_cache.get("test:cache") is not None and time.monotonic() < deadline:
+                time.sleep(0.05)
+            assert cache.local_cache.get("test:cache") is None
+        finally:
+            cache.stop_invalidation_listener()
+
+
+class TestCacheCodec:
+
+    def test_roundtrip_small_and_compressed(self):
+        small = {"id": 1, "full_name": "Anna"}
+        assert cache_codec.decode(cache_codec.encode(small)) == small
+
+        deck = [{"id": i, "full_name": f"User {i}", "interests": ["Gaming", "Music"]} for i in range(200)]
+        encoded = cache_codec.encode(deck)
+        assert encoded[1] & cache_codec.FLAG_ZLIB
+        assert len(encoded) < len(json.dumps(deck))
+        assert cache_codec.decode(encoded) == deck
+
+    def test_legacy_json_entries_are_still_readable(self):
+        assert cache_codec.decode(b'[{"id": 1}]') == [{"id": 1}]
+
+    def test_unknown_versions_are_dropped_as_misses(self):
+        with pytest.raises(cache_codec.CodecError):
+            cache_codec.decode(bytes((99, 0)) + b"payload")
+        with pytest.raises(cache_codec.CodecError):
+            cache_codec.decode(b'[{"id": 1')
+        with pytest.raises(cache_codec.CodecError):
+            cache_codec.decode(bytes((cache_codec.FORMAT_VERSION, cache_codec.FLAG_ZLIB)) + b"not zlib")
+
+        redis_client.delete("test:codec")
+        redis_client.set("test:codec", "\x63\x00garbage")
+        assert cache.get_or_compute("test:codec", lambda: "fresh", soft_ttl=60, hard_ttl=120) == "fresh"
+        redis_client.delete("test:codec")
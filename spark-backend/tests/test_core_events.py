@@ -0,0 +1,40 @@
+import threading
+from app.core import events
+
+class TestEvents:
+
+    def test_background_handlers_run_after_publish_in_order(self):
+        release = threading.Event()
+        seen = []
+
+        @events.subscribe("test_background", background=True)
+        def slow_consumer(n, **_):
+            release.wait(timeout=5)
+            seen.append(n)
+
+        @events.subscribe("test_background")
+        def inline_consumer(n, **_):
+            seen.append(f"inline {n}")
+
+        try:
+            events.publish("test_background", n=1)
+            events.publish("test_background", n=2)
+            assert seen == ["inline 1", "inline 2"]
+
+            release.set()
+            events.drain()
+            assert seen == ["inline 1", "inline 2", 1, 2]
+        finally:
+            events._background_subscribers.pop("test_background", None)
+            events._subscribers.pop("test_background", None)
+
+    def test_failing_background_handler_is_contained(self):
+        @events.subscribe("test_failing", background=True)
+        def broken(**_):
+            raise RuntimeError("boom")
+
+        try:
+            events.publish("test_failing", user_id=1)
+            events.drain()
+        finally:
+            events._background_subscribers.pop("test_failing", None)
@@ -0,0 +1,24 @@
+from app.core.geo import encode_geohash, geohash_cells_within, geohash_cell_size
+
+
+class TestGeohash:
+
+    def test_encode_known_points(self):
+        assert encode_geohash(57.64911, 10.40744, precision=6) == "u4pruy"
+        assert encode_geohash(47.49, 19.04) == "u2m"
+
+    def test_cells_cover_search_radius(self):
+        cells = geohash_cells_within(47.49, 19.04, 200)
+        assert "u2m" in cells
+        # Szeged (~160 km) must be covered, New York must not
+        assert encode_geohash(46.25, 20.15) in cells
+        assert encode_geohash(40.71, -74.0) not in cells
+
+    def test_cells_wrap_the_antimeridian(self):
+        cells = geohash_cells_within(0.0, 179.9, 200)
+        assert encode_geohash(0.0, -179.9) in cells
+        assert encode_geohash(0.0, 179.9) in cells
+
+    def test_cell_size(self):
+        height, width = geohash_cell_size(3)
+        assert height == width == 1.40625
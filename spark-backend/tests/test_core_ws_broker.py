@@ -0,0 +1,128 @@
+import asyncio
+import json
+import uuid
+from prometheus_client import REGISTRY
+from app.api.v1.websocket_manager import ConnectionManager
+from app.core.ws_broker import RedisBroker, user_channel
+from tests.helpers import FakeBroker, FakeBrokerHub
+
+class FakeWebSocket:
+
+    def __init__(self, dead=False):
+        self.sent = []
+        self.dead = dead
+
+    async def accept(self):
+        pass
+
+    async def send_json(self, message):
+        if self.dead:
+            raise RuntimeError("Cannot call send once a close message has been sent")
+        self.sent.append(message)
+
+async def start_workers(count):
+    hub = FakeBrokerHub()
+    workers = [ConnectionManager(FakeBroker(hub)) for _ in range(count)]
+    for worker in workers:
+        await worker.start()
+    return workers
+
+class TestWebSocketFanOut:
+
+    def test_message_reaches_user_on_another_worker(self):
+        async def scenario():
+            worker_a, worker_b = await start_workers(2)
+            alice, bob = FakeWebSocket(), FakeWebSocket()
+            await worker_a.connect(1, alice)
+            await worker_b.connect(2, bob)
+
+            await worker_a.send_personal_message({"type": "new_message", "content": "hi"}, 2)
+            await worker_b.send_personal_message({"type": "messages_read", "reader_id": 2}, 1)
+            return alice, bob
+
+        alice, bob = asyncio.run(scenario())
+        assert bob.sent == [{"type": "new_message", "content": "hi"}]
+        assert alice.sent == [{"type": "messages_read", "reader_id": 2}]
+
+    def test_local_sockets_do_not_get_the_broker_echo(self):
+        async def scenario():
+            worker, = await start_workers(1)
+            socket = FakeWebSocket()
+            await worker.connect(1, socket)
+            await worker.send_personal_message({"type": "ping"}, 1)
+            return worker, socket
+
+        worker, socket = asyncio.run(scenario())
+        assert socket.sent == [{"type": "ping"}]
+        assert len(worker.broker.published) == 1
+
+    def test_every_socket_of_a_user_gets_the_message(self):
+        async def scenario():
+            worker_a, worker_b = await start_workers(2)
+            phone, browser, laptop = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+            await worker_a.connect(2, phone)
+            await worker_a.connect(2, browser)
+            await worker_b.connect(2, laptop)
+
+            await worker_a.send_personal_message({"type": "ping"}, 2)
+            await worker_a.disconnect(2, phone)
+            await worker_b.send_personal_message({"type": "pong"}, 2)
+            return worker_a, phone, browser, laptop
+
+        worker_a, phone, browser, laptop = asyncio.run(scenario())
+        assert phone.sent == [{"type": "ping"}]
+        assert browser.sent == laptop.sent == [{"type": "ping"}, {"type": "pong"}]
+        assert worker_a.connection_count(2) == 1
+
+    def test_dead_sockets_are_pruned(self):
+        before = REGISTRY.get_sample_value("spark_websocket_connections")
+
+        async def scenario():
+            worker, = await start_workers(1)
+            alive, dead = FakeWebSocket(), FakeWebSocket(dead=True)
+            await worker.connect(1, alive)
+            await worker.connect(1, dead)
+            assert REGISTRY.get_sample_value("spark_websocket_connections") == before + 2
+
+            await worker.send_personal_message({"type": "ping"}, 1)
+            await worker.disconnect(1, alive)
+            return worker, alive
+
+        worker, alive = asyncio.run(scenario())
+        assert alive.sent == [{"type": "ping"}]
+        assert worker.connection_count() == 0
+        assert 1 not in worker.activate_connections
+        assert REGISTRY.get_sample_value("spark_websocket_connections") == before
+
+    def test_disconnect_unsubscribes_the_worker(self):
+        async def scenario():
+            worker_a, worker_b = await start_workers(2)
+            socket = FakeWebSocket()
+            await worker_b.connect(2, socket)
+            await worker_b.disconnect(2, socket)
+            await worker_a.send_personal_message({"type": "ping"}, 2)
+            return worker_a, socket
+
+        worker_a, socket = asyncio.run(scenario())
+        assert socket.sent == []
+        assert worker_a.broker.hub.subscribers[user_channel(2)] == set()
+
+    def test_redis_broker_round_trip(self):
+        channel = f"ws:user:test:{uuid.uuid4().hex}"
+
+        async def scenario():
+            received = asyncio.Queue()
+
+            async def handler(channel, data):
+                await received.put((channel, data))
+
+            broker = RedisBroker()
+            await broker.start(handler)
+            try:
+                await broker.subscribe(channel)
+                await broker.publish(channel, json.dumps({"type": "ping"}))
+                return await asyncio.wait_for(received.get(), timeout=5)
+            finally:
+                await broker.stop()
+
+        assert asyncio.run(scenario()) == (channel, json.dumps({"type": "ping"}))
@@ -1,6 +1,10 @@
 import pytest
 from app.crud import chat as chat_crud
 from app.crud import user as user_crud
+from app.crud import unread
+from app.crud.message_writer import prepare_message
+from app.core.redis import redis_client
+from app.models.conversation import Conversation
 from app.schemas.user import UserCreate
 from datetime import date
 
@@ -62,4 +66,97 @@ class TestChatCRUD:
             chat_crud.create_message(db, u1.id, u2.id, f"Message {i}")
 
         limited_conv = chat_crud.get_conversation(db, u1.id, u2.id, limit=2)
-        assert len(limited_conv) == 2
\ No newline at end of file
+        assert len(limited_conv) == 2
+
+    def test_conversation_summary_tracks_messages(self, db):
+        u1 = create_test_user(db, "u1_summary@example.com")
+        u2 = create_test_user(db, "u2_summary@example.com")
+
+        chat_crud.create_message(db, u2.id, u1.id, "Hi")
+        chat_crud.create_message(db, u2.id, u1.id, "Are you there?")
+        last = chat_crud.create_message(db, u1.id, u2.id, "x" * 500)
+
+        summary = chat_crud.get_conversation_summary(db, u2.id, u1.id)
+        assert (summary.user1_id, summary.user2_id) == (min(u1.id, u2.id), max(u1.id, u2.id))
+        assert summary.last_message_id == last.id
+        assert len(summary.last_message_preview) == chat_crud.PREVIEW_LENGTH
+
+        inbox = chat_crud.get_inbox(db, u1.id)
+        assert len(inbox) == 1
+        assert inbox[0]["user_id"] == u2.id
+        assert inbox[0]["unread_count"] == 2
+        assert chat_crud.get_inbox(db, u2.id)[0]["unread_count"] == 1
+
+        chat_crud.mark_messages_as_read(db, receiver_id=u1.id, sender_id=u2.id)
+        assert chat_crud.get_inbox(db, u1.id)[0]["unread_count"] == 0
+        assert chat_crud.get_inbox(db, u2.id)[0]["unread_count"] == 1
+
+    def test_batch_updates_each_conversation_once(self, db):
+        u1 = create_test_user(db, "u1_batch@example.com")
+        u2 = create_test_user(db, "u2_batch@example.com")
+        u3 = create_test_user(db, "u3_batch@example.com")
+        chat_crud.create_message(db, u2.id, u1.id, "Before the batch")
+
+        batch = [
+            prepare_message(u1.id, u2.id, "One"),
+            prepare_message(u2.id, u1.id, "Two"),
+            prepare_message(u1.id, u2.id, "Three"),
+            prepare_message(u3.id, u1.id, "Elsewhere"),
+        ]
+        rows = chat_crud.create_messages_batch(db, batch)
+
+        assert {row.uid for row in rows} == {m["uid"] for m in batch}
+        summary = chat_crud.get_conversation_summary(db, u1.id, u2.id)
+        assert summary.last_message_preview == "Three"
+        assert summary.last_message_id == next(row.id for row in rows if row.uid == batch[2]["uid"])
+        inbox = {item["user_id"]: item["unread_count"] for item in chat_crud.get_inbox(db, u1.id)}
+        assert inbox == {u2.id: 2, u3.id: 1}
+        assert chat_crud.get_inbox(db, u2.id)[0]["unread_count"] == 2
+
+    def test_backfill_matches_incremental_updates(self, db):
+        users = [create_test_user(db, f"backfill{i}@example.com") for i in range(3)]
+        chat_crud.create_message(db, users[0].id, users[1].id, "One")
+        chat_crud.create_message(db, users[1].id, users[0].id, "Two")
+        chat_crud.create_message(db, users[2].id, users[0].id, "Three")
+        chat_crud.mark_messages_as_read(db, receiver_id=users[1].id, sender_id=users[0].id)
+
+        columns = lambda c: (c.user1_id, c.user2_id, c.last_message_id, c.last_message_preview,
+                             c.unread_count_user1, c.unread_count_user2)
+        incremental = sorted(columns(c) for c in db.query(Conversation).all())
+
+        assert chat_crud.backfill_conversations(db) == 2
+        assert sorted(columns(c) for c in db.query(Conversation).all()) == incremental
+
+    def test_block_removes_conversation(self, db):
+        u1 = create_test_user(db, "u1_block_conv@example.com")
+        u2 = create_test_user(db, "u2_block_conv@example.com")
+        chat_crud.create_message(db, u1.id, u2.id, "Hello")
+
+        user_crud.block_user_and_cleanup(db, u2.id, u1.id)
+
+        assert chat_crud.get_conversation_summary(db, u1.id, u2.id) is None
+        assert chat_crud.get_inbox(db, u1.id) == []
+
+    def test_unread_counters_reconcile_from_conversations(self, db):
+        u1 = create_test_user(db, "u1_unread@example.com")
+        u2 = create_test_user(db, "u2_unread@example.com")
+        u3 = create_test_user(db, "u3_unread@example.com")
+        unread.invalidate(u1.id)
+
+        chat_crud.create_message(db, u2.id, u1.id, "One")
+        chat_crud.create_message(db, u2.id, u1.id, "Two")
+        chat_crud.create_message(db, u3.id, u1.id, "Three")
+
+        # First read has no trusted counters yet and rebuilds them from the DB
+        assert unread.get_unread_counts(db, u1.id) == {u2.id: 2, u3.id: 1}
+        assert redis_client.ttl(f"unread:synced:{u1.id}") > 0
+
+        chat_crud.create_message(db, u3.id, u1.id, "Four")
+        unread.increment(u1.id, u3.id)
+        unread.reset(u1.id, u2.id)
+        assert unread.get_unread_counts(db, u1.id) == {u3.id: 2}
+
+        # Drifted counters are corrected on the next reconcile
+        redis_client.hset(f"unread:user:{u1.id}", str(u3.id), 40)
+        redis_client.delete(f"unread:synced:{u1.id}")
+        assert unread.get_unread_counts(db, u1.id) == {u2.id: 2, u3.id: 2}
@@ -0,0 +1,37 @@
+from sqlalchemy import inspect
+from app.crud import interest as interest_crud
+from app.models.interest import InterestTag
+
+
+class TestInterestCRUD:
+
+    def test_intern_tags_is_idempotent(self, db):
+        ids = interest_crud.intern_tags(db, ["Gaming", "Pizza"])
+        assert len(ids) == 2
+        assert interest_crud.intern_tags(db, ["Pizza", "Gaming", "Pizza"]) == ids
+        assert db.query(InterestTag).count() == 2
+
+    def test_intern_recovers_from_cold_cache(self, db):
+        ids = interest_crud.intern_tags(db, ["Yoga"])
+        interest_crud.clear_tag_cache()
+        assert interest_crud.intern_tags(db, ["Yoga"]) == ids
+        assert db.query(InterestTag).count() == 1
+
+    def test_mask_roundtrip_and_common_count(self, db):
+        a = interest_crud.decode_mask(interest_crud.tags_to_mask(db, ["Gaming", "Music", "Coffee"]))
+        b = interest_crud.decode_mask(interest_crud.tags_to_mask(db, ["Music", "Coffee", "Hiking"]))
+
+        assert interest_crud.common_count(a, b) == 2
+        assert sorted(interest_crud.mask_to_tags(db, a & b)) == ["Coffee", "Music"]
+
+        interest_crud.clear_tag_cache()
+        assert sorted(interest_crud.mask_to_tags(db, a & b)) == ["Coffee", "Music"]
+        assert interest_crud.decode_mask(interest_crud.tags_to_mask(db, [])) == 0
+
+    def test_interning_leaves_the_callers_session_alone(self, db):
+        interest_crud.intern_tags(db, ["Gaming"])
+        tag = db.query(InterestTag).filter(InterestTag.name == "Gaming").one()
+
+        interest_crud.intern_tags(db, ["Sailing"])
+
+        assert not inspect(tag).expired
@@ -0,0 +1,69 @@
+from sqlalchemy import event
+from app.core.redis import redis_client
+from app.crud import likes
+from app.crud import user as user_crud
+from app.models.match import Match
+from app.models.swipe import Swipe
+from app.schemas.user import SwipeCreate
+from tests.helpers import create_seeded_user
+
+class TestLikeSets:
+
+    def test_sets_load_lazily_from_swipes_table(self, db):
+        a = create_seeded_user(db, "lazy_a@test.com", gender="male")
+        b = create_seeded_user(db, "lazy_b@test.com")
+        db.add(Swipe(liker_id=a.id, liked_id=b.id, is_like=True))
+        db.commit()
+
+        assert likes.has_liked(db, a.id, b.id) is True
+        assert likes.has_liked(db, b.id, a.id) is False
+        assert redis_client.sismember(f"liked_by:{b.id}", likes.SENTINEL)
+
+    def test_reciprocal_like_is_a_set_lookup(self, db):
+        a = create_seeded_user(db, "o1_a@test.com", gender="male")
+        b = create_seeded_user(db, "o1_b@test.com")
+        user_crud.create_swipe(db, a.id, SwipeCreate(liked_id=b.id, is_like=True))
+        # Load the set the next swipe checks
+        assert likes.has_liked(db, a.id, b.id) is True
+
+        statements = []
+        record = lambda *args: statements.append(args[2])
+        event.listen(db.get_bind(), "before_cursor_execute", record)
+        try:
+            _, is_match = user_crud.create_swipe(db, b.id, SwipeCreate(liked_id=a.id, is_like=True))
+        finally:
+            event.remove(db.get_bind(), "before_cursor_execute", record)
+
+        assert is_match is True
+        assert not [sql for sql in statements if sql.lstrip().upper().startswith("SELECT") and "FROM swipes" in sql]
+
+    def test_undo_and_block_remove_likes(self, db):
+        a = create_seeded_user(db, "undo_like_a@test.com", gender="male")
+        b = create_seeded_user(db, "undo_like_b@test.com")
+        c = create_seeded_user(db, "undo_like_c@test.com")
+
+        user_crud.create_swipe(db, a.id, SwipeCreate(liked_id=b.id, is_like=True))
+        user_crud.undo_last_swipe(db, a.id)
+        _, is_match = user_crud.create_swipe(db, b.id, SwipeCreate(liked_id=a.id, is_like=True))
+        assert is_match is False
+
+        user_crud.create_swipe(db, c.id, SwipeCreate(liked_id=a.id, is_like=True))
+        user_crud.block_user_and_cleanup(db, a.id, c.id)
+        assert likes.has_liked(db, c.id, a.id) is False
+        assert db.query(Match).count() == 0
+
+    def test_rebuild_replaces_drifted_sets(self, db):
+        users = [create_seeded_user(db, f"rebuild{i}@test.com") for i in range(3)]
+        db.add_all([
+            Swipe(liker_id=users[0].id, liked_id=users[1].id, is_like=True),
+            Swipe(liker_id=users[2].id, liked_id=users[1].id, is_like=True),
+            Swipe(liker_id=users[1].id, liked_id=users[0].id, is_like=False),
+        ])
+        db.commit()
+        redis_client.sadd(f"liked_by:{users[0].id}", likes.SENTINEL, users[2].id)
+
+        assert likes.rebuild_all(db) == 1
+
+        assert redis_client.smembers(f"liked_by:{users[1].id}") == {likes.SENTINEL, str(users[0].id), str(users[2].id)}
+        assert not redis_client.exists(f"liked_by:{users[0].id}")
+        assert likes.has_liked(db, users[2].id, users[0].id) is False
@@ -0,0 +1,83 @@
+import asyncio
+import pytest
+from app.crud import chat as chat_crud
+from app.crud import unread
+from app.crud.message_writer import MessageWriter, prepare_message
+from app.models.chat import Message
+from tests.conftest import TestingSessionLocal
+from tests.helpers import create_seeded_user
+
+class TestMessageWriter:
+
+    def _users(self, db, prefix):
+        a = create_seeded_user(db, f"{prefix}_a@test.com", gender="male")
+        b = create_seeded_user(db, f"{prefix}_b@test.com")
+        unread.invalidate(a.id)
+        unread.invalidate(b.id)
+        return a.id, b.id
+
+    def _run(self, writer, scenario):
+        async def wrapper():
+            await writer.start()
+            try:
+                return await scenario()
+            finally:
+                await writer.stop()
+        return asyncio.run(wrapper())
+
+    def test_concurrent_messages_share_one_commit(self, db, monkeypatch):
+        a, b = self._users(db, "group")
+        batches = []
+        create_messages_batch = chat_crud.create_messages_batch
+        monkeypatch.setattr(chat_crud, "create_messages_batch", lambda db, messages: batches.append(len(messages)) or create_messages_batch(db, messages))
+        writer = MessageWriter(TestingSessionLocal, max_batch=100, interval_ms=50)
+
+        async def scenario():
+            futures = [writer.submit(prepare_message(a, b, f"Message {i}")) for i in range(5)]
+            await asyncio.gather(*futures)
+
+        self._run(writer, scenario)
+
+        assert batches == [5]
+        assert db.query(Message).count() == 5
+        assert unread.get_unread_counts(db, b) == {a: 5}
+
+    def test_full_batch_does_not_wait_for_the_interval(self, db):
+        a, b = self._users(db, "full")
+        writer = MessageWriter(TestingSessionLocal, max_batch=2, interval_ms=60_000)
+
+        async def scenario():
+            futures = [writer.submit(prepare_message(a, b, text)) for text in ("One", "Two")]
+            await asyncio.wait_for(asyncio.gather(*futures), timeout=5)
+
+        self._run(writer, scenario)
+        assert db.query(Message).count() == 2
+
+    def test_stop_writes_everything_queued(self, db):
+        a, b = self._users(db, "drain")
+        writer = MessageWriter(TestingSessionLocal, max_batch=100, interval_ms=60_000)
+
+        async def scenario():
+            await writer.start()
+            futures = [writer.submit(prepare_message(a, b, f"Message {i}")) for i in range(3)]
+            await writer.stop()
+            return futures
+
+        futures = asyncio.run(scenario())
+        assert all(future.done() and future.exception() is None for future in futures)
+        assert db.query(Message).count() == 3
+        assert not writer.running
+
+    def test_a_bad_message_fails_alone(self, db):
+        a, b = self._users(db, "bad")
+        writer = MessageWriter(TestingSessionLocal, max_batch=100, interval_ms=20)
+
+        async def scenario():
+            good = writer.submit(prepare_message(a, b, "Fine"))
+            bad = writer.submit(prepare_message(a, b, None))
+            await good
+            with pytest.raises(Exception):
+                await bad
+
+        self._run(writer, scenario)
+        assert [m.content for m in db.query(Message)] == ["Fine"]
@@ -0,0 +1,72 @@
+from sqlalchemy import event
+from app.core.config import settings
+from app.core.redis import redis_client
+from app.crud import user as user_crud
+from app.crud import swipe_writer
+from app.models.match import Match
+from app.models.swipe import Swipe
+from app.schemas.user import SwipeCreate
+from tests.helpers import FakeSwipeStream, create_seeded_user
+
+class TestRecentSwipes:
+
+    def _users(self, db, prefix, count):
+        me = create_seeded_user(db, f"{prefix}_me@test.com", gender="male")
+        return me, [create_seeded_user(db, f"{prefix}{i}@test.com") for i in range(count)]
+
+    def test_multi_step_undo_reads_the_list(self, db):
+        me, others = self._users(db, "multi", 3)
+        for other in others:
+            user_crud.create_swipe(db, me.id, SwipeCreate(liked_id=other.id, is_like=True))
+        user_crud.create_swipe(db, others[2].id, SwipeCreate(liked_id=me.id, is_like=True))
+        me_id = me.id
+
+        statements = []
+        record = lambda *args: statements.append(args[2])
+        event.listen(db.get_bind(), "before_cursor_execute", record)
+        try:
+            undone = user_crud.undo_swipes(db, me_id, steps=2)
+        finally:
+            event.remove(db.get_bind(), "before_cursor_execute", record)
+
+        assert [entry["liked_id"] for entry in undone] == [others[2].id, others[1].id]
+        assert not [sql for sql in statements if sql.lstrip().upper().startswith("SELECT") and "FROM swipes" in sql]
+        assert db.query(Match).count() == 0
+        assert [s.liked_id for s in db.query(Swipe).filter(Swipe.liker_id == me_id)] == [others[0].id]
+
+    def test_list_is_trimmed_and_falls_back_to_the_table(self, db, monkeypatch):
+        monkeypatch.setattr(settings, "SWIPE_UNDO_DEPTH", 2)
+        me, others = self._users(db, "trim", 3)
+        user_crud.create_swipes_batch(db, me.id, [SwipeCreate(liked_id=o.id, is_like=False) for o in others])
+        assert redis_client.llen(f"swipes:recent:{me.id}") == 2
+
+        undone = user_crud.undo_swipes(db, me.id, steps=5)
+        assert [entry["liked_id"] for entry in undone] == [o.id for o in reversed(others)]
+        assert user_crud.undo_last_swipe(db, me.id) is None
+
+    def test_block_drops_swipes_on_the_blocked_user(self, db):
+        me, others = self._users(db, "blocked", 2)
+        for other in others:
+            user_crud.create_swipe(db, me.id, SwipeCreate(liked_id=other.id, is_like=False))
+
+        user_crud.block_user_and_cleanup(db, me.id, others[1].id)
+
+        assert user_crud.undo_last_swipe(db, me.id)["liked_id"] == others[0].id
+        assert db.query(Swipe).count() == 0
+
+    def test_undone_queued_swipe_is_never_stored(self, db, monkeypatch):
+        stream = FakeSwipeStream()
+        monkeypatch.setattr(settings, "SWIPE_WRITE_BEHIND", True)
+        monkeypatch.setattr("app.core.swipe_stream.swipe_stream", stream)
+        me, others = self._users(db, "tombstone", 2)
+        for other in others:
+            user_crud.create_swipe(db, me.id, SwipeCreate(liked_id=other.id, is_like=True))
+
+        assert user_crud.undo_last_swipe(db, me.id)["liked_id"] == others[1].id
+        assert swipe_writer.pending_targets(me.id) == {others[0].id}
+        assert swipe_writer.flush_once(db, "worker-1", stream) == 2
+        assert [s.liked_id for s in db.query(Swipe)] == [others[0].id]
+
+        # Undo after the flush deletes the stored row
+        assert user_crud.undo_last_swipe(db, me.id)["liked_id"] == others[0].id
+        assert db.query(Swipe).count() == 0
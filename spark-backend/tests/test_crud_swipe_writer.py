@@ -0,0 +1,134 @@
+import pytest
+import uuid
+from fastapi import HTTPException
+from sqlalchemy import text
+from app.core.config import settings
+from app.core.redis import redis_client
+from app.core.swipe_stream import RedisSwipeStream
+from app.crud import user as user_crud
+from app.crud import swipe_writer
+from app.crud import discovery_deck
+from app.models.match import Match
+from app.models.swipe import Swipe
+from app.schemas.user import SwipeCreate
+from tests.conftest import TestingSessionLocal
+from tests.helpers import FakeSwipeStream, create_seeded_user
+
+class TestSwipeWriteBehind:
+
+    def setup_method(self):
+        self.stream = FakeSwipeStream()
+
+    def _users(self, db, prefix):
+        a = create_seeded_user(db, f"{prefix}_a@test.com", gender="male")
+        b = create_seeded_user(db, f"{prefix}_b@test.com")
+        return a, b
+
+    def test_swipes_are_queued_and_matched_before_flush(self, db, monkeypatch):
+        monkeypatch.setattr(settings, "SWIPE_WRITE_BEHIND", True)
+        monkeypatch.setattr("app.core.swipe_stream.swipe_stream", self.stream)
+        a, b = self._users(db, "wb_match")
+
+        _, first = user_crud.create_swipe(db, a.id, SwipeCreate(liked_id=b.id, is_like=True))
+        _, second = user_crud.create_swipe(db, b.id, SwipeCreate(liked_id=a.id, is_like=True))
+
+        assert (first, second) == (False, True)
+        assert db.query(Swipe).count() == 0
+        assert db.query(Match).count() == 1
+        assert self.stream.backlog() == 2
+
+        assert swipe_writer.flush_once(db, "worker-1", self.stream) == 2
+        assert db.query(Swipe).filter(Swipe.is_like == True).count() == 2
+        assert self.stream.backlog() == 0
+
+    def test_redelivered_entries_are_inserted_once(self, db):
+        a, b = self._users(db, "wb_redeliver")
+        for _ in range(3):
+            swipe_writer.enqueue_swipe(a.id, b.id, False, stream=self.stream)
+
+        # A worker that dies after reading leaves the batch pending
+        self.stream.read("worker-1", count=2)
+        db.execute(Swipe.__table__.insert(), [{
+            "liker_id": a.id, "liked_id": b.id, "is_like": False, "event_id": self.stream.pending["1"][1]["event_id"]
+        }])
+        db.commit()
+
+        assert swipe_writer.flush_once(db, "worker-2", self.stream) == 2
+        assert swipe_writer.flush_once(db, "worker-2", self.stream) == 1
+        assert swipe_writer.flush_once(db, "worker-2", self.stream) == 0
+        assert db.query(Swipe).count() == 3
+
+    def test_queued_swipes_stay_out_of_the_refilled_deck(self, db, monkeypatch):
+        monkeypatch.setattr(settings, "SWIPE_WRITE_BEHIND", True)
+        monkeypatch.setattr("app.core.swipe_stream.swipe_stream", self.stream)
+        monkeypatch.setattr(discovery_deck, "DECK_SIZE", 3)
+        monkeypatch.setattr(discovery_deck, "DECK_LOW_WATER", 3)
+        me = create_seeded_user(db, "wb_deck_me@test.com", gender="male")
+        others = [create_seeded_user(db, f"wb_deck{i}@test.com") for i in range(4)]
+        discovery_deck.invalidate_deck(me.id)
+
+        deck = user_crud.get_discovery_users(db, me.id)
+        swiped = deck[0]["id"]
+        user_crud.create_swipe(db, me.id, SwipeCreate(liked_id=swiped, is_like=False))
+
+        assert user_crud.refill_discovery_deck(me.id, TestingSessionLocal) == 1
+        assert swiped not in {card["id"] for card in discovery_deck.read_deck(me.id)}
+        discovery_deck.invalidate_deck(me.id)
+        assert swiped not in {card["id"] for card in user_crud.get_discovery_users(db, me.id)}
+
+        # Once stored, the swipes table excludes it on its own
+        swipe_writer.flush_once(db, "worker-1", self.stream)
+        assert swipe_writer.pending_targets(me.id) == set()
+        discovery_deck.invalidate_deck(me.id)
+        assert {card["id"] for card in user_crud.get_discovery_users(db, me.id)} == {u.id for u in others} - {swiped}
+
+    def test_unknown_target_is_rejected_before_queueing(self, db, monkeypatch):
+        monkeypatch.setattr(settings, "SWIPE_WRITE_BEHIND", True)
+        monkeypatch.setattr("app.core.swipe_stream.swipe_stream", self.stream)
+        a, _ = self._users(db, "wb_unknown")
+
+        with pytest.raises(HTTPException) as exc:
+            user_crud.create_swipe(db, a.id, SwipeCreate(liked_id=999999, is_like=True))
+        assert exc.value.status_code == 404
+        assert self.stream.backlog() == 0
+
+    def test_rejected_entry_is_dead_lettered_without_blocking_the_rest(self, db):
+        a, b = self._users(db, "wb_dead")
+        a_id, b_id = a.id, b.id
+        swipe_writer.enqueue_swipe(a_id, 999999, True, stream=self.stream)
+        swipe_writer.enqueue_swipe(a_id, b_id, True, stream=self.stream)
+
+        db.execute(text("PRAGMA foreign_keys=ON"))
+        try:
+            assert swipe_writer.flush_once(db, "worker-1", self.stream) == 2
+        finally:
+            db.execute(text("PRAGMA foreign_keys=OFF"))
+
+        assert [event["liked_id"] for event in self.stream.dead] == [999999]
+        assert self.stream.backlog() == 0
+        assert [s.liked_id for s in db.query(Swipe).filter(Swipe.liker_id == a_id)] == [b_id]
+
+    def test_redis_stream_redelivers_unacked_entries(self, db):
+        stream = RedisSwipeStream(key=f"swipes:stream:test:{uuid.uuid4().hex}")
+        try:
+            for liked_id in (2, 3, 4):
+                swipe_writer.enqueue_swipe(1, liked_id, True, stream=stream)
+
+            batch = stream.read("worker-1", count=2)
+            assert [event["liked_id"] for _, event in batch] == [2, 3]
+            assert batch[0][1]["is_like"] is True
+
+            # Not acknowledged yet, so the same consumer gets them again
+            again = stream.read("worker-1", count=10)
+            assert [entry_id for entry_id, _ in again] == [entry_id for entry_id, _ in batch]
+
+            stream.ack([entry_id for entry_id, _ in again])
+            rest = stream.read("worker-1", count=10)
+            assert [event["liked_id"] for _, event in rest] == [4]
+            stream.ack([entry_id for entry_id, _ in rest])
+            assert stream.backlog() == 0
+
+            stream.dead_letter([event for _, event in rest])
+            assert redis_client.xlen(stream.dead_key) == 1
+        finally:
+            redis_client.delete(stream.key, stream.dead_key)
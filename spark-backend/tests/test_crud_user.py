@@ -1,11 +1,20 @@
 import pytest
+import random
+from sqlalchemy import event, insert
 from datetime import date, datetime, timedelta, timezone
 from fastapi import HTTPException
 from app.crud import user as user_crud
+from tests.conftest import TestingSessionLocal
+from tests.helpers import create_seeded_user
 from app.schemas.user import UserCreate, ProfileUpdate, LocationUpdate, SwipeCreate, PasswordChange
 from app.models.swipe import Swipe
 from app.models.match import Match
+from app.models.block import Block
 from app.models.profile import ProfileImage
+from app.core import events
+from app.crud import discovery_deck
+from app.crud import likes
+from app.crud import chat as chat_crud
 
 def create_mock_user(db, email, full_name="Test User", gender="male"):
     user_in = UserCreate(
@@ -58,6 +67,12 @@ class TestUserCRUD:
         res_loc = user_crud.get_user_profile_data(db, u2.id, u1.id)
         assert res_loc["distance"] > 0
 
+        user_crud.update_profile(db, u1.id, ProfileUpdate(interests_tags=["Gaming", "Yoga", "Art"]))
+        user_crud.update_profile(db, u2.id, ProfileUpdate(interests_tags=["Art", "Gaming", "Wine"]))
+        res_common = user_crud.get_user_profile_data(db, u2.id, u1.id)
+        assert sorted(res_common["common_interests"]) == ["Art", "Gaming"]
+        assert res_common["common_interests_count"] == 2
+
     def test_image_and_location_branches(self, db):
         user = create_mock_user(db, "img@test.com")
         
@@ -87,6 +102,224 @@ class TestUserCRUD:
         
         assert len(user_crud.get_discovery_users(db, me.id)) == 0
 
+    def test_discovery_only_scans_nearby_cells(self, db):
+        me = create_mock_user(db, "me_geo@test.com")
+        near = create_mock_user(db, "near_geo@test.com", gender="female")
+        far = create_mock_user(db, "far_geo@test.com", gender="female")
+        discovery_deck.invalidate_deck(me.id)
+
+        user_crud.update_user_location(db, me.id, LocationUpdate(latitude=47.49, longitude=19.04))
+        user_crud.update_user_location(db, near.id, LocationUpdate(latitude=47.6, longitude=19.2))
+        user_crud.update_user_location(db, far.id, LocationUpdate(latitude=40.71, longitude=-74.0))
+
+        assert near.location.geohash == "u2m"
+        results = user_crud.get_discovery_users(db, me.id)
+        assert [r["id"] for r in results] == [near.id]
+
+    def test_discovery_excludes_heavy_swiper_history_with_anti_joins(self, db):
+        me = create_seeded_user(db, "me_heavy@test.com", gender="male")
+        swiped = create_seeded_user(db, "swiped_heavy@test.com")
+        blocker = create_seeded_user(db, "blocker_heavy@test.com")
+        fresh = create_seeded_user(db, "fresh_heavy@test.com")
+        discovery_deck.invalidate_deck(me.id)
+
+        rows = [{"liker_id": me.id, "liked_id": 100000 + i, "is_like": i % 2 == 0} for i in range(50000)]
+        rows.append({"liker_id": me.id, "liked_id": swiped.id, "is_like": True})
+        db.execute(insert(Swipe), rows)
+        db.add(Block(blocker_id=blocker.id, blocked_id=me.id))
+        db.commit()
+
+        max_params = []
+        def count_params(conn, cursor, statement, parameters, context, executemany):
+            max_params.append(len(parameters) if isinstance(parameters, (list, tuple, dict)) else 0)
+
+        event.listen(db.get_bind(), "before_cursor_execute", count_params)
+        try:
+            results = user_crud.get_discovery_users(db, me.id)
+        finally:
+            event.remove(db.get_bind(), "before_cursor_execute", count_params)
+
+        assert [r["id"] for r in results] == [fresh.id]
+        assert max(max_params) < 100
+
+    def test_birthdate_range_matches_exact_age(self):
+        today = date(2026, 3, 15)
+        oldest, youngest = user_crud.birthdate_range(25, 30, today)
+        assert (oldest, youngest) == (date(1995, 3, 16), date(2001, 3, 15))
+        assert user_crud.calculate_age(oldest, today) == 30
+        assert user_crud.calculate_age(oldest - timedelta(days=1), today) == 31
+        assert user_crud.calculate_age(youngest, today) == 25
+        assert user_crud.calculate_age(youngest + timedelta(days=1), today) == 24
+
+        leap_today = date(2028, 2, 29)
+        oldest, youngest = user_crud.birthdate_range(18, 18, leap_today)
+        assert (oldest, youngest) == (date(2009, 3, 1), date(2010, 2, 28))
+        assert user_crud.calculate_age(date(2010, 2, 28), leap_today) == 18
+
+    def test_discovery_age_filter_uses_exact_age(self, db):
+        me = create_seeded_user(db, "me_age@test.com", gender="male")
+        user_crud.update_profile(db, me.id, ProfileUpdate(age_min=25, age_max=30))
+        discovery_deck.invalidate_deck(me.id)
+
+        oldest, youngest = user_crud.birthdate_range(25, 30)
+        inside = create_seeded_user(db, "inside_age@test.com")
+        too_old = create_seeded_user(db, "old_age@test.com")
+        too_young = create_seeded_user(db, "young_age@test.com")
+        inside.profile.birthdate = oldest
+        too_old.profile.birthdate = oldest - timedelta(days=1)
+        too_young.profile.birthdate = youngest + timedelta(days=1)
+        db.commit()
+
+        results = user_crud.get_discovery_users(db, me.id)
+        assert [r["id"] for r in results] == [inside.id]
+        assert results[0]["age"] == 30
+
+    def test_vectorized_ranking_matches_reference(self, db):
+        rng = random.Random(42)
+        tags = ["Gaming", "Pizza", "Hiking", "Music", "Travel", "Coffee", "Yoga"]
+
+        me = create_mock_user(db, "me_rank@test.com")
+        user_crud.update_user_location(db, me.id, LocationUpdate(latitude=47.49, longitude=19.04))
+        user_crud.update_profile(db, me.id, ProfileUpdate(interests_tags=["Gaming", "Music", "Coffee"]))
+
+        for i in range(100):
+            create_seeded_user(
+                db, f"rank{i}@test.com",
+                latitude=47.49 + rng.uniform(-1.5, 1.5),
+                longitude=19.04 + rng.uniform(-2.0, 2.0),
+                interests_tags=rng.sample(tags, rng.randint(0, 4))
+            )
+
+        users = user_crud.get_discovery_candidates(db, me)
+        reference = user_crud.rank_discovery_users_reference(me, users)
+        vectorized = user_crud.rank_discovery_users(db, me, users)
+
+        assert [r["id"] for r in vectorized] == [r["id"] for r in reference]
+        assert vectorized == reference
+
+        top = user_crud.rank_discovery_users(db, me, users, limit=10)
+        assert [r["id"] for r in top] == [r["id"] for r in reference[:10]]
+
+    def test_swipe_pops_candidate_from_deck(self, db):
+        me = create_seeded_user(db, "me_deck@test.com", gender="male")
+        a = create_seeded_user(db, "a_deck@test.com")
+        b = create_seeded_user(db, "b_deck@test.com")
+        discovery_deck.invalidate_deck(me.id)
+
+        assert {c["id"] for c in user_crud.get_discovery_users(db, me.id)} == {a.id, b.id}
+
+        user_crud.create_swipe(db, me.id, SwipeCreate(liked_id=a.id, is_like=False))
+        assert [c["id"] for c in discovery_deck.read_deck(me.id)] == [b.id]
+        assert [c["id"] for c in user_crud.get_discovery_users(db, me.id)] == [b.id]
+
+    def test_profile_changes_patch_or_drop_cached_cards(self, db):
+        viewer = create_seeded_user(db, "viewer_evt@test.com", gender="male")
+        candidate = create_seeded_user(db, "cand_evt@test.com")
+        other = create_seeded_user(db, "other_evt@test.com")
+        discovery_deck.invalidate_deck(viewer.id)
+        discovery_deck.invalidate_deck(candidate.id)
+
+        user_crud.get_discovery_users(db, viewer.id)
+        user_crud.get_discovery_users(db, candidate.id)
+        assert discovery_deck.read_deck(candidate.id) is not None
+
+        user_crud.upload_profile_image(db, candidate.profile.id, "http://img/1.jpg", "pub1", 0)
+        events.drain()
+        card = next(c for c in discovery_deck.read_deck(viewer.id) if c["id"] == candidate.id)
+        assert [img["url"] for img in card["images"]] == ["http://img/1.jpg"]
+
+        # Display fields are patched in place; the candidate's own deck only depends on their tags
+        user_crud.update_profile(db, candidate.id, ProfileUpdate(bio="New bio", full_name="Cand"))
+        events.drain()
+        card = next(c for c in discovery_deck.read_deck(viewer.id) if c["id"] == candidate.id)
+        assert (card["bio"], card["full_name"]) == ("New bio", "Cand")
+        assert discovery_deck.read_deck(candidate.id) is not None
+
+        user_crud.update_user_location(db, candidate.id, LocationUpdate(latitude=40.71, longitude=-74.0))
+        events.drain()
+        assert [c["id"] for c in discovery_deck.read_deck(viewer.id)] == [other.id]
+        # Their own deck was built for the old location
+        assert discovery_deck.read_deck(candidate.id) is None
+
+        user_crud.update_profile(db, other.id, ProfileUpdate(gender="male"))
+        events.drain()
+        assert discovery_deck.read_deck(viewer.id) == []
+
+        user_crud.update_profile(db, viewer.id, ProfileUpdate(age_min=30))
+        events.drain()
+        assert discovery_deck.read_deck(viewer.id) is None
+
+    def test_deck_refills_below_low_water(self, db, monkeypatch):
+        monkeypatch.setattr(discovery_deck, "DECK_SIZE", 3)
+        monkeypatch.setattr(discovery_deck, "DECK_LOW_WATER", 2)
+
+        me = create_seeded_user(db, "me_refill@test.com", gender="male")
+        others = [create_seeded_user(db, f"refill{i}@test.com") for i in range(5)]
+        discovery_deck.invalidate_deck(me.id)
+
+        first = user_crud.get_discovery_users(db, me.id)
+        assert len(first) == 3
+        assert user_crud.refill_discovery_deck(me.id, TestingSessionLocal) == 0
+
+        for card in first[:2]:
+            user_crud.create_swipe(db, me.id, SwipeCreate(liked_id=card["id"], is_like=False))
+        assert discovery_deck.needs_refill(me.id)
+
+        assert user_crud.refill_discovery_deck(me.id, TestingSessionLocal) == 2
+        deck = discovery_deck.read_deck(me.id)
+        assert deck[0]["id"] == first[2]["id"]
+        assert {c["id"] for c in deck} == {u.id for u in others} - {c["id"] for c in first[:2]}
+
+    def test_deck_reads_are_one_round_trip(self, db, monkeypatch):
+        me = create_seeded_user(db, "me_round_trip@test.com", gender="male")
+        for i in range(3):
+            create_seeded_user(db, f"round_trip{i}@test.com")
+        discovery_deck.invalidate_deck(me.id)
+        deck = user_crud.get_discovery_users(db, me.id)
+        first_page = user_crud.get_discovery_page(db, me.id, page_size=2)
+
+        commands = []
+        for client in (discovery_deck.redis_client, discovery_deck.redis_binary):
+            execute = client.execute_command
+            monkeypatch.setattr(client, "execute_command", lambda *args, execute=execute, **kwargs: (
+                commands.append(args[0]) or execute(*args, **kwargs)
+            ))
+
+        assert user_crud.get_discovery_users(db, me.id) == deck
+        assert user_crud.get_discovery_page(db, me.id, page_size=2) == first_page
+        assert commands == ["EVALSHA", "EVALSHA"]
+
+    def test_discovery_pages_follow_deck_order(self, db):
+        me = create_seeded_user(db, "me_page@test.com", gender="male")
+        for i in range(5):
+            create_seeded_user(db, f"page{i}@test.com", latitude=47.49 + i * 0.1)
+        discovery_deck.invalidate_deck(me.id)
+
+        seen, cursor = [], None
+        while True:
+            page = user_crud.get_discovery_page(db, me.id, cursor=cursor, page_size=2)
+            seen += [c["id"] for c in page["items"]]
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+
+        assert seen == [c["id"] for c in user_crud.get_discovery_users(db, me.id)]
+        assert len(seen) == 5
+
+        first = user_crud.get_discovery_page(db, me.id, page_size=2)
+        user_crud.create_swipe(db, me.id, SwipeCreate(liked_id=first["items"][0]["id"], is_like=False))
+        second = user_crud.get_discovery_page(db, me.id, cursor=first["next_cursor"], page_size=2)
+        assert second["items"][0]["id"] == seen[2]
+
+        # A cursor from an older snapshot restarts at the top of the rebuilt deck
+        discovery_deck.invalidate_deck(me.id)
+        restarted = user_crud.get_discovery_page(db, me.id, cursor=first["next_cursor"], page_size=2)
+        assert restarted["items"][0]["id"] == seen[1]
+
+        with pytest.raises(HTTPException) as exc:
+            user_crud.get_discovery_page(db, me.id, cursor="not-a-cursor")
+        assert exc.value.status_code == 400
+
     def test_swipe_and_match_logic_branches(self, db):
         u1 = create_mock_user(db, "s1@test.com")
         u2 = create_mock_user(db, "s2@test.com")
@@ -100,6 +333,152 @@ class TestUserCRUD:
         assert len(matches) == 1
         assert matches[0]["last_message"] == "No messages yet"
 
+    def test_swipe_batch_detects_matches_in_bulk(self, db):
+        me = create_seeded_user(db, "me_batch@test.com", gender="male")
+        fans = [create_seeded_user(db, f"fan{i}@test.com") for i in range(3)]
+        stranger = create_seeded_user(db, "stranger_batch@test.com")
+        for fan in fans:
+            db.add(Swipe(liker_id=fan.id, liked_id=me.id, is_like=True))
+        db.add(Match(user1_id=min(me.id, fans[2].id), user2_id=max(me.id, fans[2].id)))
+        db.commit()
+
+        batch = [
+            SwipeCreate(liked_id=fans[0].id, is_like=True),
+            SwipeCreate(liked_id=fans[1].id, is_like=False),
+            SwipeCreate(liked_id=fans[2].id, is_like=True),
+            SwipeCreate(liked_id=stranger.id, is_like=True),
+            SwipeCreate(liked_id=fans[0].id, is_like=True),
+        ]
+
+        me_id = me.id
+        statements = []
+        count = lambda *args: statements.append(args[2])
+        event.listen(db.get_bind(), "before_cursor_execute", count)
+        try:
+            results = user_crud.create_swipes_batch(db, me_id, batch)
+        finally:
+            event.remove(db.get_bind(), "before_cursor_execute", count)
+
+        assert [r["is_match"] for r in results] == [True, False, False, False, False]
+        assert db.query(Swipe).filter(Swipe.liker_id == me_id).count() == 5
+        assert db.query(Match).count() == 2
+        # Swipe insert, like-set load, existing matches, match insert
+        assert len([sql for sql in statements if not sql.startswith(("SAVEPOINT", "RELEASE"))]) == 4
+
+    def test_swipe_batch_and_racing_single_swipe_still_match(self, db, monkeypatch):
+        me = create_seeded_user(db, "me_race@test.com", gender="male")
+        her = create_seeded_user(db, "her_race@test.com")
+        me_id, her_id = me.id, her.id
+        # With her like set loaded, her check only sees likes recorded in Redis
+        likes.likers_among(db, her_id, [me_id])
+        check_likers = likes.likers_among
+
+        def her_swipe_lands_during_our_check(db_, liked_id, candidate_ids):
+            # Our check runs before her like is recorded; hers runs right after
+            seen = check_likers(db_, liked_id, candidate_ids)
+            monkeypatch.setattr(likes, "likers_among", check_likers)
+            user_crud.create_swipe(db, her_id, SwipeCreate(liked_id=me_id, is_like=True))
+            return seen
+
+        monkeypatch.setattr(likes, "likers_among", her_swipe_lands_during_our_check)
+        results = user_crud.create_swipes_batch(db, me_id, [SwipeCreate(liked_id=her_id, is_like=True)])
+
+        assert results[0]["is_match"] is False
+        assert db.query(Match).count() == 1
+
+    def test_swipe_batch_is_one_transaction(self, db, monkeypatch):
+        me = create_seeded_user(db, "me_atomic@test.com", gender="male")
+        her = create_seeded_user(db, "her_atomic@test.com")
+        me_id, her_id = me.id, her.id
+
+        def match_check_fails(*args):
+            raise RuntimeError("database went away")
+
+        monkeypatch.setattr(likes, "likers_among", match_check_fails)
+        with pytest.raises(RuntimeError):
+            user_crud.create_swipes_batch(db, me_id, [SwipeCreate(liked_id=her_id, is_like=True)])
+        db.rollback()
+
+        assert db.query(Swipe).filter(Swipe.liker_id == me_id).count() == 0
+
+    def test_match_list_loads_in_one_query(self, db):
+        me = create_seeded_user(db, "me_matches@test.com", gender="male")
+        partners = [create_seeded_user(db, f"partner{i}@test.com") for i in range(5)]
+        for p in partners:
+            db.add(Match(user1_id=min(me.id, p.id), user2_id=max(me.id, p.id)))
+        db.add(ProfileImage(profile_id=partners[0].profile.id, url="second", cloudinary_public_id="b", position=2))
+        db.add(ProfileImage(profile_id=partners[0].profile.id, url="first", cloudinary_public_id="a", position=0))
+        db.commit()
+        chat_crud.create_message(db, me.id, partners[0].id, "Hi")
+        chat_crud.create_message(db, partners[0].id, me.id, "Hello back")
+        chat_crud.create_message(db, partners[1].id, me.id, "Hey")
+        user_crud.invalidate_match_cache(me.id)
+
+        statements = []
+        count = lambda *args: statements.append(args[2])
+        event.listen(db.get_bind(), "before_cursor_execute", count)
+        try:
+            matches = user_crud.get_user_matches(db, me.id)
+        finally:
+            event.remove(db.get_bind(), "before_cursor_execute", count)
+
+        assert len(statements) == 1
+        by_user = {m["user_id"]: m for m in matches}
+        assert set(by_user) == {p.id for p in partners}
+        assert by_user[partners[0].id]["last_message"] == "Hello back"
+        assert by_user[partners[0].id]["image"] == "first"
+        assert by_user[partners[0].id]["unread_count"] == 1
+        assert by_user[partners[1].id]["last_message"] == "Hey"
+        assert by_user[partners[2].id]["last_message"] == "No messages yet"
+        assert by_user[partners[2].id]["unread_count"] == 0
+        assert by_user[partners[2].id]["image"] is None
+        assert by_user[partners[2].id]["age"] == user_crud.calculate_age(date(1995, 1, 1))
+
+    def test_reading_messages_refreshes_the_unread_badge(self, db):
+        me = create_seeded_user(db, "me_badge@test.com", gender="male")
+        partner = create_seeded_user(db, "badge_partner@test.com")
+        db.add(Match(user1_id=min(me.id, partner.id), user2_id=max(me.id, partner.id)))
+        db.commit()
+        chat_crud.create_message(db, partner.id, me.id, "Hey")
+        assert user_crud.get_user_matches(db, me.id)[0]["unread_count"] == 1
+
+        chat_crud.mark_messages_as_read(db, receiver_id=me.id, sender_id=partner.id)
+
+        assert user_crud.get_user_matches(db, me.id)[0]["unread_count"] == 0
+
+    def test_match_page_keyset_by_recent_activity(self, db):
+        me = create_seeded_user(db, "me_match_page@test.com", gender="male")
+        partners = [create_seeded_user(db, f"page_partner{i}@test.com") for i in range(7)]
+        base = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        for i, p in enumerate(partners):
+            # Two matches share a timestamp so the id tiebreak is exercised
+            db.add(Match(user1_id=min(me.id, p.id), user2_id=max(me.id, p.id),
+                         last_activity_at=base + timedelta(minutes=min(i, 5))))
+        db.commit()
+        user_crud.invalidate_match_cache(me.id)
+
+        first = user_crud.get_match_page(db, me.id, page_size=3)
+        seen = [m["user_id"] for m in first["items"]]
+        cursor = first["next_cursor"]
+        while cursor:
+            page = user_crud.get_match_page(db, me.id, cursor=cursor, page_size=3)
+            seen += [m["user_id"] for m in page["items"]]
+            cursor = page["next_cursor"]
+
+        assert seen == [partners[i].id for i in (6, 5, 4, 3, 2, 1, 0)]
+
+        # A new message moves the conversation to the top and drops the cached first page
+        cached = user_crud.get_match_page(db, me.id)
+        assert cached["items"][0]["user_id"] == partners[6].id
+        chat_crud.create_message(db, partners[0].id, me.id, "Back again")
+        top = user_crud.get_match_page(db, me.id)["items"][0]
+        assert top["user_id"] == partners[0].id
+        assert top["last_message"] == "Back again"
+
+        with pytest.raises(HTTPException) as exc:
+            user_crud.get_match_page(db, me.id, cursor="not-a-cursor")
+        assert exc.value.status_code == 400
+
     def test_undo_swipe_branches(self, db):
         u1 = create_mock_user(db, "u1_undo@test.com")
         u2 = create_mock_user(db, "u2_undo@test.com")
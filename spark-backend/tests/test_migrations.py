@@ -0,0 +1,150 @@
+import os
+import re
+import pytest
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.config import Config
+from alembic.migration import MigrationContext
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, joinedload
+from app.database import Base
+from app.crud import chat as chat_crud
+from app.crud import likes
+from app.crud import user as user_crud
+from app.models.user import User
+from tests.helpers import create_seeded_user
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def alembic_config(url):
+    config = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(BACKEND_DIR, "alembic"))
+    config.set_main_option("sqlalchemy.url", url)
+    config.attributes["configure_logger"] = False
+    return config
+
+@pytest.fixture
+def migrated_engine(tmp_path):
+    url = f"sqlite:///{tmp_path / 'migrated.db'}"
+    command.upgrade(alembic_config(url), "head")
+    engine = create_engine(url)
+    yield engine
+    engine.dispose()
+
+def app_query_plans(engine, call):
+    """Run `call` and return the query plan of every statement it sent."""
+    statements = []
+    capture = lambda conn, cursor, statement, parameters, *_: statements.append((statement, parameters))
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        call()
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    with engine.connect() as conn:
+        return [
+            " ".join(row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters))
+            for statement, parameters in statements
+        ]
+
+def full_scans(plan):
+    return re.findall(r"SCAN (\w+)", plan)
+
+class TestMigrations:
+
+    def test_upgrade_matches_models(self, migrated_engine):
+        with migrated_engine.connect() as conn:
+            assert compare_metadata(MigrationContext.configure(conn), Base.metadata) == []
+
+    def test_downgrade_to_base_and_back(self, tmp_path):
+        config = alembic_config(f"sqlite:///{tmp_path / 'roundtrip.db'}")
+        command.upgrade(config, "head")
+        command.downgrade(config, "base")
+        command.upgrade(config, "head")
+
+    def test_upgrade_adopts_a_database_built_by_create_all(self, tmp_path):
+        # The baseline schema without alembic_version, as create_all left it
+        url = f"sqlite:///{tmp_path / 'create_all.db'}"
+        command.upgrade(alembic_config(url), "0001_baseline")
+        engine = create_engine(url)
+        with engine.begin() as conn:
+            conn.execute(text("DROP TABLE alembic_version"))
+            conn.execute(text("INSERT INTO users (id, email, password) VALUES (1, 'a@x', 'p')"))
+
+        command.upgrade(alembic_config(url), "head")
+
+        with engine.connect() as conn:
+            assert compare_metadata(MigrationContext.configure(conn), Base.metadata) == []
+            assert conn.execute(text("SELECT email FROM users")).scalar_one() == "a@x"
+        engine.dispose()
+
+    def test_match_pair_is_unique(self, migrated_engine):
+        with migrated_engine.begin() as conn:
+            conn.execute(text("INSERT INTO users (id, email, password) VALUES (1, 'a@x', 'p'), (2, 'b@x', 'p')"))
+            conn.execute(text("INSERT INTO matches (user1_id, user2_id, last_activity_at) VALUES (1, 2, CURRENT_TIMESTAMP)"))
+        with pytest.raises(IntegrityError):
+            with migrated_engine.begin() as conn:
+                conn.execute(text("INSERT INTO matches (user1_id, user2_id, last_activity_at) VALUES (1, 2, CURRENT_TIMESTAMP)"))
+
+    def test_existing_locations_get_a_geohash(self, tmp_path):
+        url = f"sqlite:///{tmp_path / 'geohash.db'}"
+        command.upgrade(alembic_config(url), "0001_baseline")
+        engine = create_engine(url)
+        with engine.begin() as conn:
+            conn.execute(text("INSERT INTO users (id, email, password) VALUES (1, 'a@x', 'p')"))
+            conn.execute(text("INSERT INTO user_locations (user_id, latitude, longitude) VALUES (1, 47.4979, 19.0402)"))
+
+        command.upgrade(alembic_config(url), "head")
+
+        with engine.connect() as conn:
+            # Precision-3 cell of Budapest, as the app encoded it when this revision was written
+            assert conn.execute(text("SELECT geohash FROM user_locations")).scalar() == "u2m"
+        engine.dispose()
+
+    def test_existing_profiles_get_an_interest_mask(self, tmp_path):
+        url = f"sqlite:///{tmp_path / 'masks.db'}"
+        command.upgrade(alembic_config(url), "0001_baseline")
+        engine = create_engine(url)
+        with engine.begin() as conn:
+            conn.execute(text("INSERT INTO users (id, email, password) VALUES (1, 'a@x', 'p'), (2, 'b@x', 'p')"))
+            conn.execute(text(
+                "INSERT INTO profiles (user_id, full_name, interests_tags) "
+                "VALUES (1, 'A', '[\"Hiking\", \"Coffee\"]'), (2, 'B', NULL)"
+            ))
+
+        command.upgrade(alembic_config(url), "head")
+
+        with engine.connect() as conn:
+            tag_ids = dict(conn.execute(text("SELECT name, id FROM interest_tags")).all())
+            masks = dict(conn.execute(text("SELECT user_id, interests_mask FROM profiles")).all())
+        engine.dispose()
+        assert set(tag_ids) == {"Hiking", "Coffee"}
+        assert masks[1] == bytes([(1 << tag_ids["Hiking"]) | (1 << tag_ids["Coffee"])])
+        assert masks[2] == b""
+
+    @pytest.mark.parametrize("call, indexes", [
+        # The NOT EXISTS anti-joins probe composite indexes instead of scanning per candidate
+        (lambda db, me, other_id: user_crud.get_discovery_candidates(db, me), ["ix_swipes_li", "ix_blocks_"]),
+        # Each side of user1_id = :u OR user2_id = :u is an index search
+        (lambda db, me, other_id: db.execute(user_crud._match_list_query(me.id)).all(),
+         ["MULTI-INDEX OR", "ix_matches_user2_id_last_activity_at_id"]),
+        (lambda db, me, other_id: likes._load_likers(db, me.id), ["ix_swipes_liked_id_liker_id"]),
+        (lambda db, me, other_id: user_crud._latest_stored_swipe(db, me.id), ["ix_swipes_liker_id_created_at"]),
+        (lambda db, me, other_id: user_crud._delete_match(db, me.id, other_id), ["uq_matches_user1_id_user2_id"]),
+        (lambda db, me, other_id: chat_crud.get_conversation(db, me.id, other_id), ["ix_messages_sender_id_receiver_id_timestamp"]),
+        (lambda db, me, other_id: user_crud.reset_password_with_token(db, "abc", "new-password"), ["ix_password_resets_token"]),
+    ])
+    def test_app_queries_use_indexes(self, migrated_engine, call, indexes):
+        with Session(migrated_engine) as db:
+            me = create_seeded_user(db, "me@plans.test", gender="male")
+            other_id = create_seeded_user(db, "other@plans.test").id
+            # Loaded up front, so the plans below are only the app's own statements
+            me = db.query(User).options(joinedload(User.profile), joinedload(User.location)).filter(User.id == me.id).one()
+
+            plans = app_query_plans(migrated_engine, lambda: call(db, me, other_id))
+            db.rollback()
+
+        assert plans
+        assert [full_scans(plan) for plan in plans] == [[]] * len(plans)
+        for index in indexes:
+            assert index in plans[0]